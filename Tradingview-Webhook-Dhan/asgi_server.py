@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qs
+
+import config
+import ingest
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler("webhook_logs.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Same broker client, routing table, executor and dedup cache as the Flask server
+import webhook_service as service
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
+
+# Bounded pool for the blocking broker calls this server makes itself.
+# Strategies run on the service's lane executor; requests only hold a coroutine.
+broker_pool = ThreadPoolExecutor(max_workers=config.ASGI_BROKER_THREADS, thread_name_prefix='asgi-broker')
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call (e.g. Tradehull I/O) on the bounded broker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(broker_pool, partial(func, *args, **kwargs))
+
+
+async def run_queue_call(func, *args):
+    """
+    Run a service call that submits or looks up jobs
+    With the shared backend these read and write SQLite, so they run on the
+    broker pool instead of blocking the event loop; lane-executor calls are
+    in-memory and stay inline.
+    """
+    if service.shared_queue is not None:
+        return await run_blocking(func, *args)
+    return func(*args)
+
+
+async def wait_job(job):
+    """Await a lane-executor job without tying up a thread while it runs"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(_):
+        if not future.done():
+            future.set_result(None)
+
+    job.add_done_callback(lambda finished: loop.call_soon_threadsafe(resolve, finished))
+    await future
+    return job
+
+
+async def read_body(receive):
+    """Read the request body, stopping as soon as it exceeds config.MAX_BODY_BYTES"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        ingest.check_size(size)
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def send_response(send, body, status, headers=None, content_type='application/json'):
+    if isinstance(body, (bytes, str)):
+        payload = body.encode('utf-8') if isinstance(body, str) else body
+    else:
+        payload = json.dumps(body, default=str).encode('utf-8')
+    raw_headers = [(b'content-type', content_type.encode('latin-1')),
+                   (b'content-length', str(len(payload)).encode('latin-1'))]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def webhook(raw_body, async_mode):
+    job, duplicate, rejection = await run_queue_call(service.submit_alert, ingest.read_alert(raw_body))
+    if rejection:
+        return rejection
+
+    # Ack-fast mode: answer immediately and let the lane run the strategy
+    if async_mode:
+        return service.accepted_reply(job, duplicate)
+
+    await wait_job(job)
+    return service.completed_reply(job, duplicate)
+
+
+async def webhook_batch(raw_body, async_mode):
+    results, routed, rejection = service.parse_batch(ingest.read_batch(raw_body))
+    if rejection:
+        return rejection
+
+    await run_blocking(service.prefetch_entry_quotes, [signal for _, _, signal, _ in routed])
+    submitted = await run_queue_call(service.submit_batch, results, routed)
+
+    if not async_mode:
+        await asyncio.gather(*(wait_job(job) for _, job, _ in submitted))
+    for index, job, duplicate in submitted:
+        results[index] = service.batch_item_result(job, duplicate, async_mode)
+    return service.batch_reply(results, async_mode)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            logger.info("Starting asyncio webhook server...")
+            if not await run_blocking(service.warmup.wait, config.WARMUP_WAIT_SECONDS):
+                logger.warning(f"Warm-up still running after {config.WARMUP_WAIT_SECONDS}s, starting anyway")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await run_blocking(service.executor.shutdown)
+            broker_pool.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application serving the same endpoints and replies as webhook_server.py"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path'].rstrip('/') or '/'
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    async_mode = config.ASYNC_MODE or query.get('async') == ['1']
+
+    try:
+        if method == 'GET' and path == '/':
+            with open(INDEX_PATH, 'rb') as f:
+                await send_response(send, f.read(), 200, content_type='text/html; charset=utf-8')
+            return
+        if method == 'GET' and path == '/routes':
+            result = service.routes_reply()
+        elif method == 'GET' and path == '/ready':
+            result = await run_queue_call(service.ready_reply)
+        elif method == 'GET' and path == '/metrics':
+            result = await run_queue_call(service.metrics_reply)
+        elif method == 'GET' and path == '/positions':
+            result = await run_blocking(service.positions_reply)
+        elif method == 'GET' and path.startswith('/jobs/'):
+            result = await run_queue_call(service.job_reply, path[len('/jobs/'):])
+        elif method == 'POST' and path == '/webhook':
+            result = await webhook(await read_body(receive), async_mode)
+        elif method == 'POST' and path == '/webhook/batch':
+            result = await webhook_batch(await read_body(receive), async_mode)
+        else:
+            result = {"status": "error", "message": f"Not found: {method} {path}"}, 404, {}
+    except ingest.BodyTooLarge as e:
+        logger.warning(f"Rejected {method} {path}: {str(e)}")
+        result = service.too_large_reply(e)
+    except Exception as e:
+        logger.error(f"Error processing {method} {path}: {str(e)}", exc_info=True)
+        result = service.error_reply(f"Error processing webhook: {str(e)}")
+
+    body, status, headers = result
+    await send_response(send, body, status, headers)
+
+
+if __name__ == '__main__':
+    # uvicorn is only needed for this entry point; webhook_server.py does not use it
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=config.ASGI_PORT, log_config=None)
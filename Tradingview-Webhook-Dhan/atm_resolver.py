@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+
+from quote_snapshot import cached_ltp_data
+from rate_limiter import RateLimited
+from singleflight import SingleFlight
+import config
+import expiry_calendar
+import instrument_state
+import strike_ladder
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# (underlying, expiry) -> (fetched_at, (CE_symbol, PE_symbol, strike))
+_atm = {}
+_lock = threading.Lock()
+_flight = SingleFlight()
+stats = {"hits": 0, "misses": 0, "stale_served": 0, "errors": 0, "from_ladder": 0, "from_broker": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def from_ladder(tsl, underlying, expiry=0):
+    """
+    ATM contracts picked locally: the listed strike nearest to the spot
+    price, on the calendar's current (expiry=0) or next (1) expiry
+    Returns: (CE_symbol_name, PE_symbol_name, strike_price), or None when
+    the master has no ladder for the expiry or the spot has no quote
+    """
+    entry = expiry_calendar.expiries(underlying)
+    if not entry or expiry not in (0, 1) or entry[expiry] is None:
+        return None
+    expiry_date = entry[expiry][0]
+    # Both sides from the same snapshot, so a refresh cannot land between them
+    state = instrument_state.current()
+    calls = strike_ladder.get(underlying, expiry_date, 'CALL', state)
+    puts = strike_ladder.get(underlying, expiry_date, 'PUT', state)
+    if not calls or not puts:
+        return None
+
+    try:
+        spot = cached_ltp_data(tsl, names=[underlying]).get(underlying)
+    except RateLimited:
+        raise
+    except Exception as e:
+        # e.g. an adapter that cannot quote the underlying; the broker picks the strike instead
+        logger.warning(f"No spot quote for {underlying} ({str(e)}), selecting the ATM strike at the broker")
+        return None
+    if not spot:
+        return None
+
+    strike = calls.nearest(spot)
+    CE_symbol_name, PE_symbol_name = calls.symbol(strike), puts.symbol(strike)
+    if CE_symbol_name is None or PE_symbol_name is None:
+        return None
+    return CE_symbol_name, PE_symbol_name, strike
+
+
+def resolve_atm(tsl, underlying, expiry=0):
+    """
+    Drop-in for tsl.ATM_Strike_Selection(Underlying=underlying, Expiry=expiry)
+    The strike is picked from the strike ladders with one spot quote; the
+    broker's ATM_Strike_Selection is only called when the master cannot
+    answer. Answers younger than config.ATM_TTL_SECONDS are reused, and
+    concurrent misses for the same underlying share one lookup. If it
+    fails, an answer up to config.ATM_STALE_SECONDS old is served instead.
+    Returns: (CE_symbol_name, PE_symbol_name, strike_price)
+    """
+    key = (underlying, expiry)
+    with _lock:
+        entry = _atm.get(key)
+    if entry is not None and time.monotonic() - entry[0] <= config.ATM_TTL_SECONDS:
+        _count("hits")
+        return entry[1]
+
+    _count("misses")
+
+    def fetch():
+        result = from_ladder(tsl, underlying, expiry)
+        if result is not None:
+            _count("from_ladder")
+        else:
+            _count("from_broker")
+            result = tsl.ATM_Strike_Selection(Underlying=underlying, Expiry=expiry)
+        # Only cache well-formed answers; Tradehull returns None/0 on failure
+        if result and len(result) == 3 and result[0]:
+            with _lock:
+                _atm[key] = (time.monotonic(), result)
+        return result
+
+    try:
+        return _flight.do(key, fetch)[0]
+    except Exception as e:
+        _count("errors")
+        if entry is not None and time.monotonic() - entry[0] <= config.ATM_STALE_SECONDS:
+            _count("stale_served")
+            logger.warning(f"ATM selection for {underlying} failed ({str(e)}), using the previous answer")
+            return entry[1]
+        raise
+
+
+def metrics():
+    with _stats_lock:
+        counts = dict(stats)
+    return {**counts, **_flight.stats(), "ttl_seconds": config.ATM_TTL_SECONDS,
+            "stale_seconds": config.ATM_STALE_SECONDS}
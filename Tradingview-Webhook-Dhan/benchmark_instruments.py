@@ -0,0 +1,112 @@
+import argparse
+import json
+import random
+import time
+
+import pandas as pd
+
+import config
+import instrument_index
+
+# Compares instrument lookups by trading symbol: the old full-DataFrame
+# boolean scan (df[df['SEM_TRADING_SYMBOL'] == symbol]) against the hash
+# index in instrument_index. Run on the full master:
+#   python benchmark_instruments.py --lookups 2000
+# or, without the master file, on a synthetic one: --synthetic 250000
+
+
+def synthetic_master(rows, seed):
+    """Master-shaped frame of `rows` option contracts for offline runs"""
+    rng = random.Random(seed)
+    months = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+    records = []
+    for i in range(rows):
+        underlying = f"SYM{i // 400:04d}"
+        strike = 100 + (i // 2 % 200) * 5
+        option_type = 'CE' if i % 2 == 0 else 'PE'
+        month = months[rng.randrange(12)]
+        records.append({
+            'SEM_EXM_EXCH_ID': 'NSE', 'SEM_SEGMENT': 'D', 'SEM_SMST_SECURITY_ID': 100000 + i,
+            'SEM_INSTRUMENT_NAME': 'OPTSTK', 'SEM_TRADING_SYMBOL': f"{underlying}-{month.title()}2026-{strike}-{option_type}",
+            'SEM_CUSTOM_SYMBOL': f"{underlying} 29 {month} {strike} {'CALL' if option_type == 'CE' else 'PUT'}",
+            'SEM_EXCH_INSTRUMENT_TYPE': 'OP', 'SEM_EXPIRY_DATE': '2026-10-29 14:30:00',
+            'SEM_STRIKE_PRICE': float(strike), 'SEM_OPTION_TYPE': option_type, 'SEM_LOT_UNITS': 500.0,
+            'SEM_TICK_SIZE': 5.0
+        })
+    return pd.DataFrame(records)
+
+
+def scan_details(df, trading_symbol):
+    """The lookup get_instrument_details used to do on every call"""
+    instrument = df[df['SEM_TRADING_SYMBOL'] == trading_symbol]
+    if instrument.empty:
+        return None
+    instrument = instrument.iloc[0]
+    return {
+        'tradingsymbol': instrument['SEM_TRADING_SYMBOL'],
+        'exchange': instrument['SEM_EXM_EXCH_ID'],
+        'instrument_type': instrument['SEM_EXCH_INSTRUMENT_TYPE'],
+        'expiry': instrument['SEM_EXPIRY_DATE'],
+        'strike': instrument['SEM_STRIKE_PRICE'],
+        'option_type': instrument['SEM_OPTION_TYPE']
+    }
+
+
+def time_lookups(func, symbols):
+    timings = []
+    results = []
+    for symbol in symbols:
+        started = time.perf_counter()
+        results.append(func(symbol))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return results, {
+        "lookups": len(timings),
+        "avg_us": round(sum(timings) / len(timings) * 1e6, 3),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 3),
+        "p99_us": round(timings[min(len(timings) - 1, int(0.99 * len(timings)))] * 1e6, 3)
+    }
+
+
+def same(left, right):
+    """Compare detail dicts, treating NaN (DataFrame) and None (index) as equal"""
+    if left is None or right is None:
+        return left is right
+    return all(left[key] == right[key] or (pd.isna(left[key]) and right[key] is None) for key in left)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark instrument lookups: DataFrame scan vs hash index")
+    parser.add_argument('--master', default=config.INSTRUMENT_MASTER_PATH)
+    parser.add_argument('--synthetic', type=int, help="use a synthetic master of this many rows instead")
+    parser.add_argument('--lookups', type=int, default=1000, help="index lookups to time")
+    parser.add_argument('--scan-lookups', type=int, default=200, help="scan lookups to time (they are slow)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.synthetic:
+        df = synthetic_master(args.synthetic, args.seed)
+    else:
+        df = pd.read_csv(args.master, low_memory=False)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    index = instrument_index.build(df)
+    rng = random.Random(args.seed)
+    known = df['SEM_TRADING_SYMBOL'].dropna().tolist()
+    # One lookup in ten is for a symbol that is not listed
+    symbols = [rng.choice(known) if rng.random() < 0.9 else f"MISSING-{i}" for i in range(args.lookups)]
+
+    scanned, scan_stats = time_lookups(lambda symbol: scan_details(df, symbol), symbols[:args.scan_lookups])
+    indexed, index_stats = time_lookups(instrument_index.instrument_details, symbols)
+    mismatches = sum(1 for left, right in zip(scanned, indexed) if not same(left, right))
+
+    print(json.dumps({
+        "instruments": len(df),
+        "csv_load_ms": round(load_ms, 3),
+        "index": index.stats(),
+        "dataframe_scan": scan_stats,
+        "hash_index": index_stats,
+        "speedup": round(scan_stats["avg_us"] / index_stats["avg_us"], 1) if index_stats["avg_us"] else None,
+        "mismatches": mismatches
+    }, indent=2))
@@ -0,0 +1,268 @@
+import logging
+import uuid
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from broker_transport import ConnectionPool
+import contract_cache
+import instrument_index
+import strike_ladder
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tradehull exchange / product names -> Dhan API segment / product types
+EXCHANGE_SEGMENTS = {'NFO': 'NSE_FNO', 'NSE': 'NSE_EQ', 'BSE': 'BSE_EQ', 'BFO': 'BSE_FNO', 'MCX': 'MCX_COMM'}
+PRODUCT_TYPES = {'MIS': 'INTRADAY', 'INTRADAY': 'INTRADAY', 'CNC': 'CNC', 'MARGIN': 'MARGIN', 'NRML': 'MARGIN'}
+
+
+class BrokerHTTPError(Exception):
+    """The Dhan API answered with an HTTP error status"""
+
+    def __init__(self, method, path, status, data):
+        super().__init__(f"Dhan API {method} {path} failed with HTTP {status}: {data}")
+        self.status = status
+        self.data = data
+
+
+class PartialOrderError(Exception):
+    """
+    A sliced order failed part way: order_ids are the slices already placed
+    and error is the failure of the next one. The caller decides whether to
+    keep, complete or unwind the placed quantity.
+    """
+
+    def __init__(self, tradingsymbol, order_ids, error):
+        super().__init__(f"Order for {tradingsymbol} failed after {len(order_ids)} slices were placed "
+                         f"(order ids {order_ids}): {error}")
+        self.tradingsymbol = tradingsymbol
+        self.order_ids = order_ids
+        self.error = error
+
+
+class BrokerAdapter(ABC):
+    """
+    Interface the strategies use through broker_clients.get_client()
+    Method names and arguments follow Dhan_Tradehull.Tradehull so the
+    strategies work unchanged with any adapter.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def ATM_Strike_Selection(self, Underlying, Expiry=0):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_ltp_data(self, names):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_lot_size(self, tradingsymbol):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_option_price(self, Underlying, Strike, OptionType, Expiry=0):
+        raise NotImplementedError
+
+    @abstractmethod
+    def place_slice_order(self, tradingsymbol, exchange, transaction_type, quantity, order_type, trade_type,
+                          price=0, trigger_price=0, disclosed_quantity=0, after_market_order=False, validity='DAY',
+                          amo_time='OPEN'):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_positions(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_balance(self):
+        raise NotImplementedError
+
+    def transport_metrics(self):
+        """Connection-level timings, if the adapter manages its own connections"""
+        return None
+
+
+class TradehullAdapter(BrokerAdapter):
+    """Default adapter: every call goes through Dhan_Tradehull"""
+
+    name = 'tradehull'
+
+    def __init__(self, client_code, token_id):
+        from Dhan_Tradehull import Tradehull
+        self.tsl = Tradehull(client_code, token_id)
+
+    def ATM_Strike_Selection(self, Underlying, Expiry=0):
+        return self.tsl.ATM_Strike_Selection(Underlying=Underlying, Expiry=Expiry)
+
+    def get_ltp_data(self, names):
+        return self.tsl.get_ltp_data(names=names)
+
+    def get_lot_size(self, tradingsymbol):
+        return self.tsl.get_lot_size(tradingsymbol=tradingsymbol)
+
+    def get_option_price(self, Underlying, Strike, OptionType, Expiry=0):
+        return self.tsl.get_option_price(Underlying=Underlying, Strike=Strike, OptionType=OptionType, Expiry=Expiry)
+
+    def place_slice_order(self, tradingsymbol, exchange, transaction_type, quantity, order_type, trade_type,
+                          price=0, trigger_price=0, disclosed_quantity=0, after_market_order=False, validity='DAY',
+                          amo_time='OPEN'):
+        return self.tsl.place_slice_order(
+            tradingsymbol=tradingsymbol, exchange=exchange, transaction_type=transaction_type,
+            quantity=quantity, order_type=order_type, trade_type=trade_type, price=price,
+            trigger_price=trigger_price, disclosed_quantity=disclosed_quantity,
+            after_market_order=after_market_order, validity=validity, amo_time=amo_time
+        )
+
+    def get_positions(self):
+        return self.tsl.get_positions()
+
+    def get_balance(self):
+        return self.tsl.get_balance()
+
+    def __getattr__(self, name):
+        # Any other Tradehull method is passed straight through
+        if name == 'tsl':
+            raise AttributeError(name)
+        return getattr(self.tsl, name)
+
+
+class DhanDirectAdapter(TradehullAdapter):
+    """
+    Sends the latency-critical calls (quotes, orders, positions, funds)
+    straight to the Dhan REST API over a keep-alive connection pool and
+    leaves the rest (ATM selection, option prices, ...) to Tradehull
+    """
+
+    name = 'direct'
+
+    def __init__(self, client_code, token_id):
+        super().__init__(client_code, token_id)
+        self.client_code = client_code
+        self.pool = ConnectionPool(config.DHAN_API_HOST, size=config.BROKER_POOL_SIZE,
+                                   connect_timeout=config.BROKER_CONNECT_TIMEOUT_SECONDS,
+                                   read_timeout=config.BROKER_READ_TIMEOUT_SECONDS,
+                                   max_idle=config.BROKER_POOL_MAX_IDLE_SECONDS)
+        self.headers = {
+            'access-token': token_id,
+            'client-id': client_code,
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Connection': 'keep-alive'
+        }
+
+    def _call(self, method, path, body=None, idempotent=None):
+        status, data = self.pool.request(method, f"/v2{path}", body=body, headers=self.headers,
+                                         idempotent=idempotent)
+        if status >= 400:
+            raise BrokerHTTPError(method, path, status, data)
+        return data
+
+    def security_id(self, tradingsymbol):
+        """
+        (exchange segment, security id) of a Tradehull symbol: an option's
+        from its strike ladder, anything else (e.g. the underlying) from the
+        instrument index
+        """
+        found = strike_ladder.security_id(tradingsymbol)
+        if found is not None:
+            return found
+        record = instrument_index.by_custom_symbol(tradingsymbol)
+        if record is None:
+            if instrument_index.get_index() is None:
+                raise Exception("Instrument master not available for security id lookup")
+            raise Exception(f"Unknown trading symbol {tradingsymbol}")
+        return record.segment, record.security_id
+
+    def get_ltp_data(self, names):
+        by_segment = {}
+        lookup = {}
+        for name in names:
+            segment, security_id = self.security_id(name)
+            by_segment.setdefault(segment, []).append(int(security_id))
+            lookup[(segment, security_id)] = name
+        # A quote request is read-only, so it is safe to resend
+        data = self._call('POST', '/marketfeed/ltp', by_segment, idempotent=True) or {}
+        prices = {}
+        for segment, quotes in (data.get('data') or {}).items():
+            for security_id, quote in quotes.items():
+                name = lookup.get((segment, str(security_id)))
+                if name is not None:
+                    prices[name] = quote.get('last_price')
+        return prices
+
+    def place_slice_order(self, tradingsymbol, exchange, transaction_type, quantity, order_type, trade_type,
+                          price=0, trigger_price=0, disclosed_quantity=0, after_market_order=False, validity='DAY',
+                          amo_time='OPEN'):
+        """
+        Place the order, split into freeze-quantity slices when the limit is known
+        Raises PartialOrderError when a slice fails after others were placed.
+        """
+        segment, security_id = self.security_id(tradingsymbol)
+        meta = contract_cache.get(*contract_cache.symbol_key(tradingsymbol))
+        freeze_qty = meta.freeze_qty if meta and meta.freeze_qty else None
+        lot_size = meta.lot_size if meta and meta.lot_size else 1
+        # Largest multiple of the lot size below the freeze limit
+        slice_qty = (freeze_qty - 1) // lot_size * lot_size if freeze_qty else quantity
+        slice_qty = max(slice_qty, lot_size)
+
+        order_ids = []
+        remaining = int(quantity)
+        while remaining > 0:
+            qty = min(remaining, slice_qty)
+            try:
+                data = self._call('POST', '/orders', {
+                    'dhanClientId': self.client_code,
+                    'correlationId': uuid.uuid4().hex[:20],
+                    'transactionType': transaction_type,
+                    'exchangeSegment': EXCHANGE_SEGMENTS.get(exchange, segment),
+                    'productType': PRODUCT_TYPES.get(trade_type, trade_type),
+                    'orderType': order_type,
+                    'validity': validity,
+                    'securityId': security_id,
+                    'quantity': qty,
+                    'disclosedQuantity': min(int(disclosed_quantity or 0), qty),
+                    'price': price,
+                    'triggerPrice': trigger_price,
+                    'afterMarketOrder': after_market_order,
+                    'amoTime': amo_time
+                })
+            except Exception as e:
+                if not order_ids:
+                    raise
+                logger.error(f"Slice {len(order_ids) + 1} of {tradingsymbol} failed, placed so far: {order_ids}")
+                raise PartialOrderError(tradingsymbol, order_ids, e) from e
+            order_ids.append(str(data.get('orderId')))
+            remaining -= qty
+        return order_ids
+
+    def get_positions(self):
+        return pd.DataFrame(self._call('GET', '/positions') or [])
+
+    def get_balance(self):
+        data = self._call('GET', '/fundlimit') or {}
+        return data.get('availabelBalance', data.get('availableBalance', 0))
+
+    def transport_metrics(self):
+        return self.pool.metrics()
+
+
+def simulated_adapter(client_code, token_id):
+    """Offline stand-in for the broker (imported lazily, it is only used for load tests)"""
+    from broker_simulator import SimulatedBroker
+    return SimulatedBroker(client_code, token_id)
+
+
+ADAPTERS = {'tradehull': TradehullAdapter, 'direct': DhanDirectAdapter, 'simulated': simulated_adapter}
+
+
+def create_adapter(client_code, token_id, name=None):
+    """Build the adapter selected by config.BROKER_ADAPTER"""
+    name = name or config.BROKER_ADAPTER
+    if name not in ADAPTERS:
+        raise ValueError(f"Unknown broker adapter {name!r}, expected one of {sorted(ADAPTERS)}")
+    logger.info(f"Using the {name} broker adapter")
+    return ADAPTERS[name](client_code, token_id)
@@ -0,0 +1,262 @@
+import logging
+import threading
+import time
+
+from credentials import client_code, token_id
+
+from singleflight import SingleFlight
+from jobs import current_lane, set_order_sent
+import rate_limiter
+import resilience
+from broker_adapters import create_adapter
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Dhan error code meaning the access token is invalid or expired. Only the
+# code itself is matched: loose words or a bare '401' also turn up in order
+# ids, quantities and error bodies that have nothing to do with the token.
+AUTH_ERROR_CODE = 'DH-901'
+
+# Read-only Tradehull methods whose concurrent identical calls share one request
+COALESCED_METHODS = ('get_ltp_data', 'get_positions', 'get_lot_size', 'get_balance', 'get_holdings',
+                     'get_orderbook', 'get_trade_book', 'get_option_price')
+
+# Methods that change the account, and the reads whose answer they change:
+# a read made after an order on the same lane never shares a request that
+# was sent before that order
+ORDER_METHODS = ('place_slice_order', 'place_order', 'modify_order', 'cancel_order')
+ACCOUNT_READS = ('get_positions', 'get_balance', 'get_holdings', 'get_orderbook', 'get_trade_book')
+
+
+def call_key(name, args, kwargs):
+    """Hashable key of a method call, or None if an argument cannot be keyed"""
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(item) for item in value)
+        if isinstance(value, dict):
+            return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+        hash(value)
+        return value
+
+    try:
+        return name, freeze(args), freeze(kwargs)
+    except TypeError:
+        return None
+
+
+def is_auth_error(value):
+    """
+    True for an exception or a failure response caused by bad credentials:
+    an HTTP 401 from the Dhan API or Dhan's DH-901 error code
+    """
+    if isinstance(value, dict):
+        if value.get('status') != 'failure':
+            return False
+        text = str(value.get('remarks', '')) + str(value.get('data', ''))
+    elif isinstance(value, Exception):
+        # A PartialOrderError is judged by the slice failure it wraps
+        if isinstance(getattr(value, 'error', None), Exception):
+            return is_auth_error(value.error)
+        if getattr(value, 'status', None) == 401:
+            return True
+        text = str(value)
+    else:
+        return False
+    return AUTH_ERROR_CODE in text.upper()
+
+
+class ClientProvider:
+    """
+    Builds the broker adapter (Tradehull by default, see broker_adapters)
+    once per process and hands out a proxy to it
+    The client is rebuilt when a call fails with an authentication error.
+    Construction time, health checks and reuse counts are kept for /metrics.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.proxy = BrokerClient(self)
+        self.flight = SingleFlight()
+        self.saved_calls = {name: 0 for name in COALESCED_METHODS}
+        # lane (or thread outside jobs) -> monotonic time of its last order
+        self.last_order = {}
+        self._stats_lock = threading.Lock()
+        self.constructions = 0
+        self.rebuilds = 0
+        self.reuses = 0
+        self.last_construction_ms = None
+        self.total_construction_ms = 0.0
+        self.healthy = None
+        self.last_health_check = None
+
+    def _build(self):
+        started = time.perf_counter()
+        client = self._factory()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.constructions += 1
+        self.last_construction_ms = round(elapsed, 3)
+        self.total_construction_ms += elapsed
+        self._client = client
+        self._generation += 1
+        logger.info(f"Built broker client #{self.constructions} in {elapsed:.1f} ms")
+        self._check(client)
+
+    def _check(self, client):
+        try:
+            self.healthy = not is_auth_error(client.get_balance())
+        except Exception as e:
+            logger.error(f"Broker client health check failed: {str(e)}")
+            self.healthy = False
+        self.last_health_check = time.strftime("%Y-%m-%d %H:%M:%S")
+        if not self.healthy:
+            logger.warning("Broker client is not healthy; calls may fail until it is rebuilt")
+
+    def current(self):
+        """Return (client, generation), building the client on first use"""
+        with self._lock:
+            if self._client is None:
+                self._build()
+            return self._client, self._generation
+
+    def get(self):
+        """Shared proxy used by the strategies in place of Tradehull(client_code, token_id)"""
+        with self._lock:
+            if self._client is None:
+                self._build()
+            else:
+                self.reuses += 1
+        return self.proxy
+
+    def rebuild(self, generation):
+        """Replace the client that failed; a no-op if another thread already did"""
+        with self._lock:
+            if generation == self._generation:
+                logger.warning("Authentication failure from broker, rebuilding client")
+                self.rebuilds += 1
+                self._build()
+
+    def health_check(self):
+        client, _ = self.current()
+        self._check(client)
+        return self.healthy
+
+    def count_saved(self, name):
+        with self._stats_lock:
+            self.saved_calls[name] += 1
+
+    def coalescing_stats(self):
+        with self._stats_lock:
+            saved = dict(self.saved_calls)
+        return {"saved_calls": saved, "saved_calls_total": sum(saved.values())}
+
+    def record_order(self):
+        """Note that the current lane is sending an order"""
+        with self._stats_lock:
+            self.last_order[current_lane() or threading.get_ident()] = time.monotonic()
+
+    def order_time(self):
+        """Monotonic time of the current lane's last order, or None"""
+        with self._stats_lock:
+            return self.last_order.get(current_lane() or threading.get_ident())
+
+    def stats(self):
+        return {
+            "constructions": self.constructions,
+            "rebuilds": self.rebuilds,
+            "reuses": self.reuses,
+            "last_construction_ms": self.last_construction_ms,
+            "total_construction_ms": round(self.total_construction_ms, 3),
+            **self.coalescing_stats(),
+            "healthy": self.healthy,
+            "last_health_check": self.last_health_check,
+            "adapter": self._client.name if self._client is not None else None,
+            "transport": self._client.transport_metrics() if self._client is not None else None
+        }
+
+
+class BrokerClient:
+    """
+    Stand-in for a Tradehull instance that always talks to the provider's
+    current client and retries a call once on a fresh client after an
+    authentication failure. Orders are never re-sent: the client is rebuilt
+    and the failure goes back to the strategy, since the broker may have
+    accepted the first one. Concurrent identical calls to the read-only
+    methods in COALESCED_METHODS share one broker request, every request
+    waits for a token of its rate_limiter budget, and failures are retried
+    and tracked by the resilience circuit breakers.
+    """
+
+    def __init__(self, provider):
+        self._provider = provider
+
+    def __getattr__(self, name):
+        client, _ = self._provider.current()
+        attr = getattr(client, name)
+        if not callable(attr):
+            return attr
+
+        def once(args, kwargs):
+            client, generation = self._provider.current()
+            rate_limiter.acquire(name)
+            if name in ORDER_METHODS:
+                # From here the order may reach the exchange; the job's other legs must follow it
+                set_order_sent(True)
+            try:
+                result = getattr(client, name)(*args, **kwargs)
+            except Exception as e:
+                if not is_auth_error(e):
+                    raise
+                self._provider.rebuild(generation)
+                if name in ORDER_METHODS:
+                    raise
+                rate_limiter.acquire(name)
+                return getattr(self._provider.current()[0], name)(*args, **kwargs)
+            if is_auth_error(result):
+                self._provider.rebuild(generation)
+                if name in ORDER_METHODS:
+                    return result
+                rate_limiter.acquire(name)
+                return getattr(self._provider.current()[0], name)(*args, **kwargs)
+            return result
+
+        def invoke(*args, **kwargs):
+            return resilience.call(name, lambda: once(args, kwargs))
+
+        if name in ORDER_METHODS:
+            def call(*args, **kwargs):
+                self._provider.record_order()
+                return invoke(*args, **kwargs)
+        elif name not in COALESCED_METHODS:
+            call = invoke
+        else:
+            def call(*args, **kwargs):
+                key = call_key(name, args, kwargs)
+                if key is None:
+                    return invoke(*args, **kwargs)
+                # An account read must not be answered by a request sent before this lane's last order
+                not_before = self._provider.order_time() if name in ACCOUNT_READS else None
+                result, shared = self._provider.flight.do(key, lambda: invoke(*args, **kwargs), not_before)
+                if not shared:
+                    return result
+                # Callers that joined an in-flight request get their own copy
+                self._provider.count_saved(name)
+                return result.copy() if hasattr(result, 'copy') else result
+
+        call.__name__ = name
+        return call
+
+
+provider = ClientProvider(lambda: create_adapter(client_code, token_id))
+
+
+def get_client():
+    """Process-wide broker client (built on first call)"""
+    return provider.get()
+
+
+def client_stats():
+    return provider.stats()
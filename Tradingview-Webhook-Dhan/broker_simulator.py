@@ -0,0 +1,304 @@
+import calendar
+import datetime
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+
+import pandas as pd
+
+from broker_adapters import BrokerAdapter, BrokerHTTPError, PartialOrderError
+from broker_transport import LatencyStats
+from rate_limiter import METHOD_BUDGETS
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Underlying -> (starting spot, strike step, lot size). Strike steps match
+# STRIKE_STEP in the strategy modules.
+UNDERLYINGS = {
+    'NIFTY': (24000.0, 50, 75),
+    'BANKNIFTY': (52000.0, 100, 35),
+    'AXISBANK': (1150.0, 10, 625),
+    'BEL': (300.0, 5, 2850),
+    'BHARTIARTL': (1800.0, 20, 475),
+    'BHEL': (230.0, 5, 2625),
+    'CANBK': (100.0, 1, 6750),
+    'COALINDIA': (390.0, 5, 1350),
+    'HAL': (4500.0, 50, 150),
+    'HDFCBANK': (1900.0, 20, 550),
+    'HINDALCO': (650.0, 10, 1400),
+    'HINDUNILVR': (2300.0, 20, 300),
+    'ICICIBANK': (1400.0, 10, 700),
+    'INDUSINDBK': (800.0, 10, 700),
+    'INFY': (1500.0, 20, 400),
+    'KOTAKBANK': (2100.0, 10, 400),
+    'NTPC': (340.0, 5, 1500),
+    'PFC': (420.0, 10, 1300),
+    'RELIANCE': (1400.0, 10, 500),
+    'SBIN': (800.0, 10, 750),
+    'TATAMOTORS': (700.0, 10, 800),
+    'TATAPOWER': (390.0, 5, 1450),
+}
+
+# Orders above this many lots are split into slices, like the exchange freeze limit
+FREEZE_LOTS = 24
+TICK_SIZE = 0.05
+SLIPPAGE_TICKS = 2
+STARTING_BALANCE = 10000000.0
+
+MONTHS = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+
+def parse_latency(spec):
+    """'median,p99' in ms -> (mu, sigma) of the lognormal call latency in seconds"""
+    median, p99 = (float(part) for part in spec.split(','))
+    median = max(median, 0.001) / 1000
+    p99 = max(p99 / 1000, median)
+    # 2.326 is the 99th percentile of the standard normal
+    return math.log(median), math.log(p99 / median) / 2.326
+
+
+def monthly_expiries(today, count):
+    """Next `count` monthly expiries (last Thursday of the month) on or after today"""
+    expiries = []
+    year, month = today.year, today.month
+    while len(expiries) < count:
+        last_day = calendar.monthrange(year, month)[1]
+        expiry = datetime.date(year, month, last_day)
+        expiry -= datetime.timedelta(days=(expiry.weekday() - calendar.THURSDAY) % 7)
+        if expiry >= today:
+            expiries.append(expiry)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return expiries
+
+
+def expiry_label(expiry):
+    """Expiry date -> 'DD MMM', as it appears in Tradehull symbols"""
+    return f"{expiry.day:02d} {MONTHS[expiry.month - 1]}"
+
+
+def format_strike(strike):
+    return str(int(strike)) if float(strike).is_integer() else str(strike)
+
+
+def norm_cdf(x):
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def option_price(spot, strike, years, volatility, option_type):
+    """Black-Scholes premium (zero rates) rounded to the tick size"""
+    years = max(years, 1 / 365)
+    d1 = (math.log(spot / strike) + volatility ** 2 * years / 2) / (volatility * math.sqrt(years))
+    d2 = d1 - volatility * math.sqrt(years)
+    if option_type == 'CALL':
+        price = spot * norm_cdf(d1) - strike * norm_cdf(d2)
+    else:
+        price = strike * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return max(round(round(price / TICK_SIZE) * TICK_SIZE, 2), TICK_SIZE)
+
+
+class SimulatedBroker(BrokerAdapter):
+    """
+    In-process stand-in for the broker used for offline load and latency tests
+    Spot prices follow a random walk, option premiums come from a synthetic
+    monthly option chain, market orders fill immediately at the premium plus
+    slippage and update an in-memory positions book. Every call sleeps for a
+    lognormal latency drawn per budget (config.SIM_*_LATENCY_MS) and can fail
+    at config.SIM_ERROR_RATE, so retries, breakers and rate limits behave as
+    they would against Dhan.
+    """
+
+    name = 'simulated'
+
+    def __init__(self, client_code=None, token_id=None):
+        self.random = random.Random(config.SIM_SEED)
+        self.volatility = config.SIM_VOLATILITY
+        self.latency = {
+            'quotes': parse_latency(config.SIM_QUOTES_LATENCY_MS),
+            'orders': parse_latency(config.SIM_ORDERS_LATENCY_MS),
+            'portfolio': parse_latency(config.SIM_PORTFOLIO_LATENCY_MS),
+        }
+        self.spots = {name: spot for name, (spot, _, _) in UNDERLYINGS.items()}
+        self._spot_time = time.monotonic()
+        self.balance = STARTING_BALANCE
+        self.positions = {}
+        self._order_ids = itertools.count(1)
+        self.stats = {}
+        self.orders = 0
+        self.fills = 0
+        self.rejected = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        logger.info(f"Simulated broker ready with {len(UNDERLYINGS)} underlyings")
+
+    def _simulate_call(self, method):
+        """Sleep for the method's latency and fail at the configured error rate"""
+        budget = METHOD_BUDGETS.get(method)
+        with self._lock:
+            delay = self.random.lognormvariate(*self.latency[budget]) if budget else 0.0
+            failed = budget is not None and self.random.random() < config.SIM_ERROR_RATE
+        time.sleep(delay)
+        self.stats.setdefault(method, LatencyStats()).record(delay)
+        if failed:
+            with self._lock:
+                self.errors += 1
+            raise ConnectionError(f"Simulated broker error in {method}")
+
+    def _spot(self, underlying):
+        """Current spot, moving every spot price along its random walk first"""
+        if underlying not in UNDERLYINGS:
+            raise Exception(f"Underlying {underlying} not found")
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._spot_time
+            if elapsed > 0:
+                # Wall-clock seconds over a 6.25 hour session and 250 trading days
+                scale = self.volatility * math.sqrt(elapsed / (250 * 6.25 * 3600))
+                for name in self.spots:
+                    self.spots[name] *= math.exp(self.random.gauss(0, scale))
+                self._spot_time = now
+            return self.spots[underlying]
+
+    def _expiry(self, index=0):
+        return monthly_expiries(datetime.date.today(), index + 1)[index]
+
+    def _parse_symbol(self, symbol):
+        """'SBIN 29 MAY 800 CALL' -> (underlying, expiry date, strike, option type)"""
+        parts = str(symbol).split()
+        if len(parts) != 5 or parts[4] not in ('CALL', 'PUT') or parts[0] not in UNDERLYINGS:
+            raise Exception(f"Unknown trading symbol {symbol}")
+        for expiry in monthly_expiries(datetime.date.today(), 3):
+            if expiry_label(expiry) == f"{parts[1]} {parts[2]}":
+                return parts[0], expiry, float(parts[3]), parts[4]
+        raise Exception(f"No live expiry {parts[1]} {parts[2]} for {symbol}")
+
+    def _premium(self, underlying, expiry, strike, option_type):
+        years = (expiry - datetime.date.today()).days / 365
+        return option_price(self._spot(underlying), strike, years, self.volatility, option_type)
+
+    def ATM_Strike_Selection(self, Underlying, Expiry=0):
+        self._simulate_call('ATM_Strike_Selection')
+        step = UNDERLYINGS[Underlying][1] if Underlying in UNDERLYINGS else 1
+        strike = round(self._spot(Underlying) / step) * step
+        label = expiry_label(self._expiry(int(Expiry)))
+        strike_text = format_strike(strike)
+        return f"{Underlying} {label} {strike_text} CALL", f"{Underlying} {label} {strike_text} PUT", strike
+
+    def get_ltp_data(self, names):
+        self._simulate_call('get_ltp_data')
+        if isinstance(names, str):
+            names = [names]
+        prices = {}
+        for name in names:
+            try:
+                if name in UNDERLYINGS:
+                    prices[name] = round(self._spot(name), 2)
+                else:
+                    prices[name] = self._premium(*self._parse_symbol(name))
+            except Exception as e:
+                # Tradehull leaves unknown symbols out of the reply
+                logger.warning(f"No simulated quote for {name}: {str(e)}")
+        return prices
+
+    def get_option_price(self, Underlying, Strike, OptionType, Expiry=0):
+        self._simulate_call('get_option_price')
+        if isinstance(Strike, bool) or not isinstance(Strike, (int, float)):
+            raise Exception(f"Invalid strike {Strike!r} for {Underlying}")
+        option_type = 'CALL' if str(OptionType).upper() in ('CALL', 'CE') else 'PUT'
+        expiry = self._expiry(int(Expiry))
+        price = self._premium(Underlying, expiry, float(Strike), option_type)
+        return {'tradingSymbol': f"{Underlying} {expiry_label(expiry)} {format_strike(Strike)} {option_type}",
+                'lastTradedPrice': price}
+
+    def get_lot_size(self, tradingsymbol):
+        self._simulate_call('get_lot_size')
+        underlying = str(tradingsymbol).split()[0]
+        if underlying not in UNDERLYINGS:
+            raise Exception(f"Unknown trading symbol {tradingsymbol}")
+        return UNDERLYINGS[underlying][2]
+
+    def place_slice_order(self, tradingsymbol, exchange, transaction_type, quantity, order_type, trade_type,
+                          price=0, trigger_price=0, disclosed_quantity=0, after_market_order=False, validity='DAY',
+                          amo_time='OPEN'):
+        """Fill a market order immediately, one order id per freeze-limit slice"""
+        underlying, expiry, strike, option_type = self._parse_symbol(tradingsymbol)
+        lot_size = UNDERLYINGS[underlying][2]
+        quantity = int(quantity)
+        if quantity <= 0 or quantity % lot_size:
+            raise Exception(f"Quantity {quantity} is not a multiple of the lot size {lot_size}")
+        sign = 1 if transaction_type == 'BUY' else -1
+
+        order_ids = []
+        remaining = quantity
+        while remaining > 0:
+            qty = min(remaining, FREEZE_LOTS * lot_size)
+            try:
+                self._simulate_call('place_slice_order')
+                with self._lock:
+                    self.orders += 1
+                    rejected = self.random.random() < config.SIM_REJECT_RATE
+                    if rejected:
+                        self.rejected += 1
+                if rejected:
+                    raise BrokerHTTPError('POST', '/orders', 400,
+                                          f"Simulated rejection of {transaction_type} {qty} {tradingsymbol}")
+            except Exception as e:
+                if not order_ids:
+                    raise
+                raise PartialOrderError(tradingsymbol, order_ids, e) from e
+            fill = self._premium(underlying, expiry, strike, option_type) + sign * SLIPPAGE_TICKS * TICK_SIZE
+            self._book_fill(underlying, expiry, strike, option_type, trade_type, sign * qty, fill)
+            order_ids.append(str(next(self._order_ids)))
+            remaining -= qty
+        return order_ids
+
+    def _book_fill(self, underlying, expiry, strike, option_type, trade_type, qty, fill):
+        key = (underlying, expiry, strike, option_type, trade_type)
+        with self._lock:
+            self.fills += 1
+            self.balance -= qty * fill
+            position = self.positions.setdefault(key, {'buyQty': 0, 'sellQty': 0, 'buyValue': 0.0, 'sellValue': 0.0})
+            side = 'buy' if qty > 0 else 'sell'
+            position[f'{side}Qty'] += abs(qty)
+            position[f'{side}Value'] += abs(qty) * fill
+
+    def get_positions(self):
+        """Positions book in the column layout of Dhan's /positions"""
+        self._simulate_call('get_positions')
+        rows = []
+        with self._lock:
+            for (underlying, expiry, strike, option_type, trade_type), position in self.positions.items():
+                net_qty = position['buyQty'] - position['sellQty']
+                rows.append({
+                    'tradingSymbol': f"{underlying}-{expiry.strftime('%b%Y')}-{format_strike(strike)}-"
+                                     f"{'CE' if option_type == 'CALL' else 'PE'}",
+                    'positionType': 'LONG' if net_qty > 0 else 'SHORT' if net_qty < 0 else 'CLOSED',
+                    'exchangeSegment': 'NSE_FNO',
+                    'productType': trade_type,
+                    'buyAvg': round(position['buyValue'] / position['buyQty'], 2) if position['buyQty'] else 0.0,
+                    'buyQty': position['buyQty'],
+                    'sellAvg': round(position['sellValue'] / position['sellQty'], 2) if position['sellQty'] else 0.0,
+                    'sellQty': position['sellQty'],
+                    'netQty': net_qty,
+                    'drvExpiryDate': expiry.strftime('%Y-%m-%d'),
+                    'drvOptionType': option_type,
+                    'drvStrikePrice': strike
+                })
+        return pd.DataFrame(rows)
+
+    def get_balance(self):
+        self._simulate_call('get_balance')
+        with self._lock:
+            return round(self.balance, 2)
+
+    def transport_metrics(self):
+        with self._lock:
+            counts = {"orders": self.orders, "fills": self.fills, "rejected": self.rejected,
+                      "errors": self.errors, "open_positions": sum(
+                          1 for p in self.positions.values() if p['buyQty'] != p['sellQty'])}
+        return {"simulated": True, **counts,
+                "latency": {method: stats.to_dict() for method, stats in list(self.stats.items())}}
@@ -0,0 +1,193 @@
+import http.client
+import json
+import logging
+import queue
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Methods that can be resent when the response was lost: the server may
+# already have acted on the first copy
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS')
+
+
+class LatencyStats:
+    """Count, average and percentiles (ms) over the most recent samples"""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self._recent.append(seconds)
+
+    def to_dict(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total = self.count, self.total
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3)
+
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99)
+        }
+
+
+class TimedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that times the TCP connect and the TLS handshake separately"""
+
+    def __init__(self, host, stats, connect_timeout, **kwargs):
+        super().__init__(host, **kwargs)
+        self._stats = stats
+        self._connect_timeout = connect_timeout
+
+    def connect(self):
+        started = time.perf_counter()
+        sock = socket.create_connection((self.host, self.port), self._connect_timeout, self.source_address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected = time.perf_counter()
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+        self.sock.settimeout(self.timeout)
+        self._stats['connect'].record(connected - started)
+        self._stats['tls'].record(time.perf_counter() - connected)
+
+
+class ConnectionPool:
+    """
+    Pool of persistent keep-alive HTTPS connections to one host
+    Connections are reused across requests, so only the first request on
+    each pays for TCP connect and TLS. Connections idle for longer than
+    max_idle seconds are closed instead of reused, since the server (or a
+    load balancer in front of it) has most likely dropped them already.
+    """
+
+    def __init__(self, host, size=4, connect_timeout=3.0, read_timeout=10.0, max_idle=None):
+        self.host = host
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle = max_idle
+        self._context = ssl.create_default_context()
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.stats = {name: LatencyStats() for name in ('connect', 'tls', 'request')}
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def _new_connection(self):
+        self.created += 1
+        return TimedHTTPSConnection(self.host, self.stats, self.connect_timeout,
+                                    timeout=self.read_timeout, context=self._context)
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new_connection(), False
+            if self.max_idle is not None and time.monotonic() - idle_since > self.max_idle:
+                conn.close()
+                self.expired += 1
+                continue
+            self.reused += 1
+            return conn, True
+
+    def _checkin(self, conn):
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            conn.close()
+
+    def _reconnect(self, conn):
+        """Replace a connection the server has closed"""
+        conn.close()
+        self.dropped += 1
+        conn = self._new_connection()
+        conn.connect()
+        return conn
+
+    def request(self, method, path, body=None, headers=None, idempotent=None):
+        """
+        Send one request and return (status, decoded JSON body or text)
+        A request that fails while being sent on a reused connection (the
+        server closed it while idle) is resent once on a new connection.
+        If the server closes a reused connection without answering, the
+        request is resent only when it is idempotent: by default the
+        IDEMPOTENT_METHODS, or as the caller says for e.g. a read-only POST.
+        """
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = headers or {}
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        conn, reused = self._checkout()
+        try:
+            # Connect up front so connect/TLS time is not counted as request time
+            if conn.sock is None:
+                conn.connect()
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+            except (ConnectionError, http.client.HTTPException, OSError):
+                if not reused:
+                    raise
+                conn = self._reconnect(conn)
+                reused = False
+                started = time.perf_counter()
+                conn.request(method, path, body=payload, headers=headers)
+            try:
+                response = conn.getresponse()
+            except (http.client.BadStatusLine, ConnectionResetError):
+                # BadStatusLine includes RemoteDisconnected
+                if not reused or not idempotent:
+                    raise
+                conn = self._reconnect(conn)
+                started = time.perf_counter()
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+            data = response.read()
+        except Exception:
+            conn.close()
+            raise
+
+        self.stats['request'].record(time.perf_counter() - started)
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+
+        text = data.decode('utf-8', errors='replace')
+        try:
+            return response.status, json.loads(text) if text else None
+        except ValueError:
+            return response.status, text
+
+    def metrics(self):
+        return {
+            "host": self.host,
+            "pool_size": self.size,
+            "idle": self._idle.qsize(),
+            "connections_created": self.created,
+            "connections_reused": self.reused,
+            "stale_dropped": self.dropped,
+            "idle_expired": self.expired,
+            "connect": self.stats['connect'].to_dict(),
+            "tls": self.stats['tls'].to_dict(),
+            "request": self.stats['request'].to_dict()
+        }
@@ -0,0 +1,145 @@
+import os
+
+# Webhook execution settings (override with environment variables)
+
+# Run strategies in the background and answer /webhook with 202 + job id.
+# A single request can also opt in with ?async=1
+ASYNC_MODE = os.environ.get('WEBHOOK_ASYNC_MODE', '0') == '1'
+
+# Number of background worker threads executing strategies
+WORKER_THREADS = int(os.environ.get('WEBHOOK_WORKER_THREADS', '8'))
+
+# Number of finished jobs kept for /jobs/<id> lookups
+JOB_HISTORY_SIZE = int(os.environ.get('WEBHOOK_JOB_HISTORY_SIZE', '1000'))
+
+# Seconds a queued job waits before its lane is promoted one priority class
+# (EXIT-FULL > EXIT-HALF > ENTRY); protects entries from starvation
+PRIORITY_AGING_SECONDS = float(os.environ.get('WEBHOOK_PRIORITY_AGING_SECONDS', '5'))
+
+# Alerts repeated within this many seconds (same alert_id, or same payload when
+# no alert_id is sent) return the original job instead of trading again
+DEDUP_TTL_SECONDS = float(os.environ.get('WEBHOOK_DEDUP_TTL_SECONDS', '60'))
+DEDUP_MAX_ENTRIES = int(os.environ.get('WEBHOOK_DEDUP_MAX_ENTRIES', '10000'))
+
+# Maximum jobs waiting per priority class; further signals get 429 + Retry-After
+MAX_QUEUED_EXIT_FULL = int(os.environ.get('WEBHOOK_MAX_QUEUED_EXIT_FULL', '200'))
+MAX_QUEUED_EXIT_HALF = int(os.environ.get('WEBHOOK_MAX_QUEUED_EXIT_HALF', '200'))
+MAX_QUEUED_ENTRY = int(os.environ.get('WEBHOOK_MAX_QUEUED_ENTRY', '50'))
+RETRY_AFTER_SECONDS = int(os.environ.get('WEBHOOK_RETRY_AFTER_SECONDS', '2'))
+
+# Largest number of messages accepted by /webhook/batch
+MAX_BATCH_SIZE = int(os.environ.get('WEBHOOK_MAX_BATCH_SIZE', '50'))
+
+# How long quotes prefetched for a batch are reused by the strategies
+QUOTE_SNAPSHOT_TTL_SECONDS = float(os.environ.get('WEBHOOK_QUOTE_SNAPSHOT_TTL_SECONDS', '2'))
+
+# asyncio server (asgi_server.py): port and the thread pool used for its own
+# blocking broker calls such as batch quote prefetch
+ASGI_PORT = int(os.environ.get('WEBHOOK_ASGI_PORT', '8000'))
+ASGI_BROKER_THREADS = int(os.environ.get('WEBHOOK_ASGI_BROKER_THREADS', '4'))
+
+# Execution backend: 'threads' runs strategies on this process's lane executor,
+# 'shared' queues them in a SQLite file for the worker.py processes
+EXECUTION_BACKEND = os.environ.get('WEBHOOK_EXECUTION_BACKEND', 'threads')
+SHARED_QUEUE_PATH = os.environ.get('WEBHOOK_SHARED_QUEUE_PATH', 'webhook_jobs.db')
+
+# worker.py: number of processes, idle poll interval, how often the positions
+# book is republished after trades, and how long finished jobs are kept
+WORKER_PROCESSES = int(os.environ.get('WEBHOOK_WORKER_PROCESSES', '4'))
+WORKER_POLL_SECONDS = float(os.environ.get('WEBHOOK_WORKER_POLL_SECONDS', '0.05'))
+POSITIONS_PUBLISH_SECONDS = float(os.environ.get('WEBHOOK_POSITIONS_PUBLISH_SECONDS', '5'))
+SHARED_JOB_RETENTION_SECONDS = float(os.environ.get('WEBHOOK_SHARED_JOB_RETENTION_SECONDS', '86400'))
+
+# worker.py restarts a crashed worker after 1s, doubling the delay on each
+# crash in a row up to WORKER_RESTART_MAX_SECONDS; a worker that stayed up
+# that long restarts after 1s again
+WORKER_RESTART_MAX_SECONDS = float(os.environ.get('WEBHOOK_WORKER_RESTART_MAX_SECONDS', '60'))
+
+# Largest webhook body accepted (bytes); bigger requests get 413
+MAX_BODY_BYTES = int(os.environ.get('WEBHOOK_MAX_BODY_BYTES', '65536'))
+
+# Startup warm-up of every stocks.txt symbol: parallel threads, and how long
+# the server waits for it before it starts listening (/ready reports progress)
+WARMUP_THREADS = int(os.environ.get('WEBHOOK_WARMUP_THREADS', '8'))
+WARMUP_WAIT_SECONDS = float(os.environ.get('WEBHOOK_WARMUP_WAIT_SECONDS', '60'))
+
+# Dhan instrument master (scrip master CSV) used for contract metadata
+INSTRUMENT_MASTER_PATH = os.environ.get(
+    'WEBHOOK_INSTRUMENT_MASTER_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies', 'Dependencies', 'all_instrument 2025-05-15.csv')
+)
+
+# Folder of dated master files (e.g. 'all_instrument 2025-05-15.csv'): the
+# newest file matching the pattern is loaded at startup and picked up by a
+# background refresh every INSTRUMENT_REFRESH_SECONDS (0 disables it).
+# INSTRUMENT_MASTER_PATH is used when the folder has no matching file.
+INSTRUMENT_MASTER_DIR = os.environ.get('WEBHOOK_INSTRUMENT_MASTER_DIR', os.path.dirname(INSTRUMENT_MASTER_PATH))
+INSTRUMENT_MASTER_PATTERN = os.environ.get('WEBHOOK_INSTRUMENT_MASTER_PATTERN', 'all_instrument*.csv')
+INSTRUMENT_REFRESH_SECONDS = float(os.environ.get('WEBHOOK_INSTRUMENT_REFRESH_SECONDS', '300'))
+
+# Folder for the columnar snapshot of the instrument master, regenerated
+# whenever the CSV changes; empty to always parse the CSV. It is a cache,
+# so it lives next to the service rather than among the strategy files.
+INSTRUMENT_SNAPSHOT_DIR = os.environ.get(
+    'WEBHOOK_INSTRUMENT_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instrument_snapshots')
+)
+
+# ATM strike resolution: results are reused for ATM_TTL_SECONDS; when the
+# broker call fails a result up to ATM_STALE_SECONDS old is served instead
+ATM_TTL_SECONDS = float(os.environ.get('WEBHOOK_ATM_TTL_SECONDS', '0.25'))
+ATM_STALE_SECONDS = float(os.environ.get('WEBHOOK_ATM_STALE_SECONDS', '5'))
+
+# Broker rate limits shared by every strategy: refill rate (requests/second),
+# burst size and tokens only exit jobs may use (capped at burst - 2). The
+# defaults are Dhan's published per-second limits: 5 for data APIs, 25 for
+# order APIs and 20 for the other (non-trading) APIs. The buckets live in the
+# process; worker.py processes share theirs through the SHARED_QUEUE_PATH
+# file, so N workers still get one budget, not N. Signals block up to
+# RATE_LIMIT_MAX_WAIT_SECONDS for a token and then fail without calling the
+# broker, except for the later order legs of an entry that has placed its
+# first; the warm-up waits behind them for as long as it takes.
+RATE_QUOTES_PER_SECOND = float(os.environ.get('WEBHOOK_RATE_QUOTES_PER_SECOND', '5'))
+RATE_QUOTES_BURST = float(os.environ.get('WEBHOOK_RATE_QUOTES_BURST', '5'))
+RATE_QUOTES_EXIT_RESERVE = float(os.environ.get('WEBHOOK_RATE_QUOTES_EXIT_RESERVE', '1'))
+RATE_ORDERS_PER_SECOND = float(os.environ.get('WEBHOOK_RATE_ORDERS_PER_SECOND', '25'))
+RATE_ORDERS_BURST = float(os.environ.get('WEBHOOK_RATE_ORDERS_BURST', '25'))
+RATE_ORDERS_EXIT_RESERVE = float(os.environ.get('WEBHOOK_RATE_ORDERS_EXIT_RESERVE', '5'))
+RATE_PORTFOLIO_PER_SECOND = float(os.environ.get('WEBHOOK_RATE_PORTFOLIO_PER_SECOND', '20'))
+RATE_PORTFOLIO_BURST = float(os.environ.get('WEBHOOK_RATE_PORTFOLIO_BURST', '20'))
+RATE_PORTFOLIO_EXIT_RESERVE = float(os.environ.get('WEBHOOK_RATE_PORTFOLIO_EXIT_RESERVE', '2'))
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get('WEBHOOK_RATE_LIMIT_MAX_WAIT_SECONDS', '5'))
+
+# Retries of read-only broker calls (orders are never retried): attempts and
+# jittered exponential backoff bounds
+RETRY_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get('WEBHOOK_RETRY_BASE_DELAY_SECONDS', '0.2'))
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get('WEBHOOK_RETRY_MAX_DELAY_SECONDS', '2'))
+
+# Circuit breaker per broker budget: consecutive failures before failing fast,
+# and seconds to wait before letting a trial call through
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('WEBHOOK_BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get('WEBHOOK_BREAKER_COOLDOWN_SECONDS', '10'))
+
+# Broker adapter: 'tradehull' (default), 'direct', which sends quotes,
+# orders, positions and funds straight to the Dhan API over a keep-alive pool,
+# or 'simulated' (broker_simulator.py, no broker connection at all)
+BROKER_ADAPTER = os.environ.get('WEBHOOK_BROKER_ADAPTER', 'tradehull')
+DHAN_API_HOST = os.environ.get('WEBHOOK_DHAN_API_HOST', 'api.dhan.co')
+BROKER_POOL_SIZE = int(os.environ.get('WEBHOOK_BROKER_POOL_SIZE', '8'))
+BROKER_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_BROKER_CONNECT_TIMEOUT_SECONDS', '3'))
+BROKER_READ_TIMEOUT_SECONDS = float(os.environ.get('WEBHOOK_BROKER_READ_TIMEOUT_SECONDS', '10'))
+# Pooled connections idle longer than this are closed rather than reused
+BROKER_POOL_MAX_IDLE_SECONDS = float(os.environ.get('WEBHOOK_BROKER_POOL_MAX_IDLE_SECONDS', '50'))
+
+# Simulated broker (WEBHOOK_BROKER_ADAPTER=simulated) for offline load tests:
+# "median,p99" call latency in ms per budget, the share of calls that fail or
+# orders that are rejected, annualised volatility of the synthetic spot prices
+# and a random seed for repeatable runs
+SIM_QUOTES_LATENCY_MS = os.environ.get('WEBHOOK_SIM_QUOTES_LATENCY_MS', '40,150')
+SIM_ORDERS_LATENCY_MS = os.environ.get('WEBHOOK_SIM_ORDERS_LATENCY_MS', '60,250')
+SIM_PORTFOLIO_LATENCY_MS = os.environ.get('WEBHOOK_SIM_PORTFOLIO_LATENCY_MS', '50,200')
+SIM_ERROR_RATE = float(os.environ.get('WEBHOOK_SIM_ERROR_RATE', '0'))
+SIM_REJECT_RATE = float(os.environ.get('WEBHOOK_SIM_REJECT_RATE', '0'))
+SIM_VOLATILITY = float(os.environ.get('WEBHOOK_SIM_VOLATILITY', '0.2'))
+SIM_SEED = os.environ.get('WEBHOOK_SIM_SEED')
@@ -0,0 +1,148 @@
+import datetime
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+import instrument_master
+import instrument_state
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Contract metadata of one (underlying, expiry). Fields the source did not
+# provide are None; expiry_date is None for entries learned from the broker.
+ContractMetadata = namedtuple(
+    'ContractMetadata',
+    ['underlying', 'expiry', 'expiry_date', 'lot_size', 'strike_step', 'freeze_qty', 'tick_size']
+)
+
+# Entries built from the master live in the instrument snapshot
+# (instrument_state); lot sizes learned from the broker for expiries the
+# master lacks are kept here, across refreshes:
+# (underlying, expiry date) -> ContractMetadata
+_learned = {}
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "broker_lookups": 0, "invalidated": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    # Lookups run on many lane threads at once
+    with _stats_lock:
+        stats[name] += amount
+
+
+def symbol_key(symbol):
+    """(underlying, expiry date) of a Tradehull symbol such as 'SBIN 29 MAY 800 CALL'"""
+    parts = symbol.split(" ")
+    return parts[0], instrument_master.label_date(" ".join(parts[1:3]))
+
+
+def _first(group, column, cast):
+    if column not in group.columns:
+        return None
+    values = group[column].dropna()
+    return cast(values.iloc[0]) if not values.empty else None
+
+
+def build_entries(df):
+    """(underlying, expiry date) -> ContractMetadata for every option expiry in the master"""
+    entries = {}
+    for (underlying, expiry_date), group in instrument_master.option_contracts(df).groupby(['underlying', 'expiry_date']):
+        strikes = np.unique(group['SEM_STRIKE_PRICE'].astype(float))
+        steps = np.diff(strikes)
+        entries[(underlying, expiry_date)] = ContractMetadata(
+            underlying=underlying,
+            expiry=group['expiry'].iloc[0],
+            expiry_date=expiry_date,
+            lot_size=_first(group, 'SEM_LOT_UNITS', int),
+            strike_step=float(steps.min()) if len(steps) else None,
+            freeze_qty=_first(group, 'SEM_FREEZE_QTY', int),
+            tick_size=_first(group, 'SEM_TICK_SIZE', float)
+        )
+    return entries
+
+
+def install(entries):
+    """
+    Replace the master's entries with ones built by build_entries in one swap
+    Lot sizes learned from the broker are kept.
+    """
+    instrument_state.replace(contracts=entries)
+
+
+def load_from_master(df=None):
+    """
+    Fill the cache with every option expiry in the instrument master
+    Returns: number of (underlying, expiry) entries loaded
+    """
+    df = instrument_master.load() if df is None else df
+    if df is None:
+        return 0
+    entries = build_entries(df)
+    install(entries)
+    logger.info(f"Loaded contract metadata for {len(entries)} option expiries")
+    return len(entries)
+
+
+def invalidate_expired(today=None):
+    """Drop entries whose expiry has passed (expiry rollover)"""
+    today = today or datetime.date.today()
+    with _lock:
+        learned = [key for key in _learned if key[1] is not None and key[1] < today]
+        for key in learned:
+            del _learned[key]
+        contracts = instrument_state.current().contracts
+        expired = [key for key in contracts if key[1] is not None and key[1] < today]
+        if expired:
+            instrument_state.replace(contracts={key: meta for key, meta in contracts.items() if key not in expired})
+        expired += learned
+        _count("invalidated", len(expired))
+    if expired:
+        logger.info(f"Invalidated contract metadata of {len(expired)} expired contracts")
+    return len(expired)
+
+
+def get(underlying, expiry_date):
+    """ContractMetadata from the master, or with the lot size learned from the broker; None if neither has it"""
+    key = (underlying, expiry_date)
+    meta = instrument_state.current().contracts.get(key)
+    if meta is None or not meta.lot_size:
+        meta = _learned.get(key, meta)
+    return meta
+
+
+def contract_lot_size(tsl, symbol):
+    """
+    Drop-in for tsl.get_lot_size(tradingsymbol=symbol)
+    Served from the cache for the symbol's (underlying, expiry); on a miss
+    (e.g. an expiry the instrument master lacks) the broker is asked once and
+    the answer cached. Expired entries are dropped by the expiry calendar's
+    day rollover.
+    """
+    key = symbol_key(symbol)
+    meta = get(*key)
+    if meta is not None and meta.lot_size:
+        _count("hits")
+        return meta.lot_size
+
+    _count("misses")
+    lot_size = tsl.get_lot_size(tradingsymbol=symbol)
+    _count("broker_lookups")
+    if lot_size:
+        with _lock:
+            if meta is not None:
+                _learned[key] = meta._replace(lot_size=lot_size)
+            else:
+                _learned[key] = ContractMetadata(key[0], " ".join(symbol.split(" ")[1:3]), None, lot_size,
+                                                 None, None, None)
+    return lot_size
+
+
+def metrics():
+    with _stats_lock:
+        counts = dict(stats)
+    loaded = len(instrument_state.current().contracts)
+    return {**counts, "loaded": loaded, "contracts": loaded + len(_learned)}
@@ -0,0 +1,93 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def dedup_key(payload, alert_id=None):
+    """
+    Key used to recognise a re-sent alert
+    A client-supplied alert id wins; otherwise the SHA-256 of the payload,
+    which callers pass in normalized form (the upper-cased message) so a
+    /webhook alert and the same alert in a batch share a key.
+    """
+    if alert_id:
+        return f"id:{alert_id}"
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return f"sha256:{hashlib.sha256(payload).hexdigest()}"
+
+
+class DedupCache:
+    """
+    Bounded, TTL-evicting cache of recently seen alerts -> their Job
+    Entries expire in insertion order (the TTL is fixed), so expiry and the
+    size bound are both handled by popping from the front of an OrderedDict
+    and every lookup stays O(1).
+    """
+
+    def __init__(self, ttl_seconds=60.0, max_entries=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, job)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self, now):
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))[0]
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_submit(self, key, submit):
+        """
+        Return (job, duplicate)
+        For a key seen within the TTL the original job is returned and submit is
+        not called. Otherwise submit() is called to create the job; if it raises,
+        nothing is cached.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1], True
+
+            self.misses += 1
+            job = submit()
+            self._entries[key] = (now + self.ttl_seconds, job)
+            self._evict(now)
+            return job, False
+
+    def discard(self, key, job=None):
+        """
+        Forget key (only if it still maps to job, when given), so the next
+        alert with that key is submitted again
+        Returns: True if an entry was removed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (job is not None and entry[1] is not job):
+                return False
+            del self._entries[key]
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries": self.max_entries
+            }
@@ -0,0 +1,142 @@
+import bisect
+import datetime
+import logging
+import threading
+
+import pandas as pd
+
+import atm_resolver
+import contract_cache
+import instrument_master
+import instrument_state
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# The calendar itself (underlying -> sorted [(expiry date, expiry label)] of
+# its listed option expiries) lives in the instrument snapshot. Expiries of
+# the day and calendar they were worked out for: underlying -> (current, next, monthly)
+_today = {"date": None, "calendar": None, "expiries": {}}
+_lock = threading.Lock()
+stats = {"calendar_hits": 0, "broker_fallbacks": 0, "rollovers": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    # Lookups run on many lane threads at once
+    with _stats_lock:
+        stats[name] += amount
+
+
+def build(df):
+    """underlying -> sorted [(expiry date, expiry label)] from the option rows of the master"""
+    options = instrument_master.option_contracts(df)
+    pairs = pd.DataFrame({'underlying': options['underlying'], 'date': options['expiry_date'], 'label': options['expiry']})
+    pairs = pairs.dropna().drop_duplicates(['underlying', 'date'])
+
+    calendar = {}
+    for underlying, date, label in sorted(pairs.itertuples(index=False, name=None)):
+        calendar.setdefault(underlying, []).append((date, label))
+    return calendar
+
+
+def install(calendar):
+    """Replace the calendar with one built by build(); the next lookup re-rolls"""
+    instrument_state.replace(calendar=calendar)
+
+
+def load_from_master(df=None):
+    """
+    Build the calendar from every option expiry in the instrument master
+    Returns: number of underlyings with at least one expiry
+    """
+    df = instrument_master.load() if df is None else df
+    if df is None:
+        return 0
+    calendar = build(df)
+    install(calendar)
+    logger.info(f"Built expiry calendar for {len(calendar)} underlyings")
+    return len(calendar)
+
+
+def _roll(today, calendar):
+    """Work out every underlying's current, next and monthly expiry for `today`"""
+    expiries = {}
+    for underlying, dates in calendar.items():
+        index = bisect.bisect_left(dates, (today,))
+        upcoming = dates[index:]
+        if not upcoming:
+            continue
+        current = upcoming[0]
+        following = upcoming[1] if len(upcoming) > 1 else None
+        # Monthly expiry: the last listed expiry in the month of the current one
+        monthly = [entry for entry in upcoming if (entry[0].year, entry[0].month) == (current[0].year, current[0].month)]
+        expiries[underlying] = (current, following, monthly[-1])
+    if _today["date"] is not None and _today["date"] != today:
+        _count("rollovers")
+    # Metadata of contracts that have expired is dropped with each roll
+    contract_cache.invalidate_expired(today)
+    _today["date"] = today
+    _today["calendar"] = calendar
+    _today["expiries"] = expiries
+
+
+def expiries(underlying, today=None):
+    """
+    (current, next, monthly) expiries of an underlying as (date, label)
+    tuples, or None if the calendar has none. Rolls over to the next expiry
+    the day after an expiry or when a refresh publishes a new calendar;
+    lookups are dictionary reads otherwise.
+    """
+    today = today or datetime.date.today()
+    calendar = instrument_state.current().calendar
+    with _lock:
+        if _today["date"] != today or _today["calendar"] is not calendar:
+            _roll(today, calendar)
+        return _today["expiries"].get(underlying)
+
+
+def roll(today=None):
+    """Roll the calendar over to today if the date has changed since the last lookup"""
+    today = today or datetime.date.today()
+    calendar = instrument_state.current().calendar
+    with _lock:
+        if _today["date"] != today or _today["calendar"] is not calendar:
+            _roll(today, calendar)
+
+
+def current_expiry(underlying, today=None):
+    """Label of the nearest expiry, e.g. '29 MAY', or None"""
+    entry = expiries(underlying, today)
+    return entry[0][1] if entry else None
+
+
+def next_expiry(underlying, today=None):
+    entry = expiries(underlying, today)
+    return entry[1][1] if entry and entry[1] else None
+
+
+def monthly_expiry(underlying, today=None):
+    entry = expiries(underlying, today)
+    return entry[2][1] if entry else None
+
+
+def current_expiry_label(tsl, underlying):
+    """
+    Current expiry label for building option symbols
+    Served from the calendar; only when the master is unavailable is it
+    read from the broker's ATM symbol.
+    """
+    label = current_expiry(underlying)
+    if label is not None:
+        _count("calendar_hits")
+        return label
+    _count("broker_fallbacks")
+    CE_symbol_name, PE_symbol_name, strike_price = atm_resolver.resolve_atm(tsl, underlying)
+    return " ".join(CE_symbol_name.split(" ")[1:3])
+
+
+def metrics():
+    underlyings = len(instrument_state.current().calendar)
+    with _lock, _stats_lock:
+        return {**stats, "underlyings": underlyings, "as_of": str(_today["date"]) if _today["date"] else None}
@@ -0,0 +1,138 @@
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from signal_router import parse_signal
+import config
+
+# orjson is optional; it parses alert bodies several times faster than json
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_DECODER = 'orjson'
+except ImportError:
+    _loads = json.loads
+    JSON_DECODER = 'json'
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class BodyTooLarge(Exception):
+    """Raised when a request body exceeds config.MAX_BODY_BYTES"""
+
+    def __init__(self, size):
+        super().__init__(f"Request body of {size} bytes exceeds the limit of {config.MAX_BODY_BYTES} bytes")
+        self.size = size
+
+
+# One webhook alert as handed to the router: the normalised message, the
+# client-supplied alert id (if any), the parsed Signal (None when the message
+# is not a valid signal) and whether the body was 'json' or 'text'
+Alert = namedtuple('Alert', ['message', 'alert_id', 'signal', 'kind'])
+
+
+class ParseStats:
+    """Counts and timings of the ingestion (parse) stage"""
+
+    def __init__(self, window=1000):
+        self.counts = {'json': 0, 'text': 0, 'empty': 0, 'too_large': 0}
+        self.total = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, kind, elapsed):
+        with self._lock:
+            self.counts[kind] += 1
+            self.total += elapsed
+            self._recent.append(elapsed)
+
+    def to_dict(self):
+        with self._lock:
+            counts = dict(self.counts)
+            recent = sorted(self._recent)
+            total = self.total
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1e6, 1)
+
+        parsed = sum(counts.values())
+        return {
+            "decoder": JSON_DECODER,
+            "max_body_bytes": config.MAX_BODY_BYTES,
+            "bodies": counts,
+            "avg_parse_us": round(total / parsed * 1e6, 1) if parsed else 0.0,
+            "p50_parse_us": percentile(0.50),
+            "p99_parse_us": percentile(0.99)
+        }
+
+
+stats = ParseStats()
+
+
+def check_size(size):
+    """Raise BodyTooLarge if size (bytes) exceeds the configured cap"""
+    if size is not None and size > config.MAX_BODY_BYTES:
+        stats.record('too_large', 0.0)
+        raise BodyTooLarge(size)
+
+
+def decode_body(raw_body):
+    """
+    Decode a raw webhook body
+    JSON objects/arrays are parsed with the fast decoder; anything else,
+    including TradingView plain-text alerts, is returned as stripped text.
+    Returns: (data, kind) where kind is 'json', 'text' or 'empty'
+    """
+    check_size(len(raw_body))
+    body = raw_body.strip()
+    if not body:
+        return None, 'empty'
+    if body[:1] in (b'{', b'['):
+        try:
+            return _loads(body), 'json'
+        except ValueError:
+            pass
+    return body.decode('utf-8', errors='replace'), 'text'
+
+
+def read_alert(raw_body):
+    """
+    Turn a /webhook body into an Alert, or None for an empty body
+    Accepts {"message": "...", "alert_id": "..."} JSON or the bare message text.
+    """
+    started = time.perf_counter()
+    data, kind = decode_body(raw_body)
+    if kind == 'empty':
+        stats.record(kind, time.perf_counter() - started)
+        return None
+
+    alert_id = None
+    if isinstance(data, dict):
+        message = data.get('message', '')
+        alert_id = data.get('alert_id')
+    elif isinstance(data, str):
+        message = data
+    else:
+        message = ''
+    message = str(message).strip().upper()
+    alert = Alert(message, alert_id, parse_signal(message), kind)
+    stats.record(kind, time.perf_counter() - started)
+    return alert
+
+
+def read_batch(raw_body):
+    """
+    Decode a /webhook/batch body for service.parse_batch
+    Plain-text batches carry one message per line.
+    """
+    started = time.perf_counter()
+    data, kind = decode_body(raw_body)
+    if kind == 'text':
+        data = [line.strip() for line in data.splitlines() if line.strip()]
+    stats.record(kind, time.perf_counter() - started)
+    return data
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import instrument_master
+import instrument_state
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Master exchange id + segment -> Dhan API exchange segment
+SEGMENTS = {'NSE_D': 'NSE_FNO', 'NSE_E': 'NSE_EQ', 'BSE_D': 'BSE_FNO', 'BSE_E': 'BSE_EQ',
+            'NSE_I': 'IDX_I', 'BSE_I': 'IDX_I', 'MCX_M': 'MCX_COMM'}
+
+# One instrument master row with only the fields the strategies and adapters use
+InstrumentRecord = namedtuple(
+    'InstrumentRecord',
+    ['trading_symbol', 'custom_symbol', 'security_id', 'exchange', 'segment', 'instrument_type',
+     'expiry', 'strike', 'option_type', 'lot_size', 'tick_size']
+)
+
+
+def _column(df, name):
+    if name not in df.columns:
+        return [None] * len(df)
+    return df[name].astype(object).where(df[name].notna(), None).tolist()
+
+
+class InstrumentIndex:
+    """
+    Hash indexes over the instrument master: trading symbol, Tradehull
+    (custom) symbol and (exchange segment, security id) -> InstrumentRecord
+    """
+
+    def __init__(self, df):
+        started = time.perf_counter()
+        segments = (df['SEM_EXM_EXCH_ID'].astype(str) + '_' + df['SEM_SEGMENT'].astype(str)).map(SEGMENTS)
+        records = [
+            InstrumentRecord(*fields) for fields in zip(
+                _column(df, 'SEM_TRADING_SYMBOL'), _column(df, 'SEM_CUSTOM_SYMBOL'),
+                df['SEM_SMST_SECURITY_ID'].astype(str).tolist(), _column(df, 'SEM_EXM_EXCH_ID'),
+                segments.where(segments.notna(), None).tolist(), _column(df, 'SEM_EXCH_INSTRUMENT_TYPE'),
+                _column(df, 'SEM_EXPIRY_DATE'), _column(df, 'SEM_STRIKE_PRICE'), _column(df, 'SEM_OPTION_TYPE'),
+                _column(df, 'SEM_LOT_UNITS'), _column(df, 'SEM_TICK_SIZE')
+            )
+        ]
+        # The first row wins when a symbol is listed more than once, as with the old boolean scan
+        self.by_trading_symbol = {}
+        self.by_custom_symbol = {}
+        self.by_security_id = {}
+        for record in records:
+            self.by_trading_symbol.setdefault(record.trading_symbol, record)
+            self.by_custom_symbol.setdefault(record.custom_symbol, record)
+            self.by_security_id.setdefault((record.segment, record.security_id), record)
+        self.size = len(records)
+        self.build_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def stats(self):
+        return {"instruments": self.size, "trading_symbols": len(self.by_trading_symbol),
+                "custom_symbols": len(self.by_custom_symbol), "security_ids": len(self.by_security_id),
+                "build_ms": self.build_ms}
+
+
+# The index itself lives in the instrument snapshot (instrument_state)
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    # Lookups run on many lane threads at once
+    with _stats_lock:
+        stats[name] += amount
+
+
+def build(df=None):
+    """Build the process-wide index from the instrument master (loaded if not given)"""
+    df = instrument_master.load() if df is None else df
+    if df is None:
+        return None
+    index = InstrumentIndex(df)
+    install(index)
+    logger.info(f"Indexed {index.size} instruments in {index.build_ms:.0f} ms")
+    return index
+
+
+def install(index):
+    """Swap in an index built elsewhere; lookups see the old or the new one, never a partial one"""
+    instrument_state.replace(index=index)
+
+
+def get_index():
+    """Process-wide index, built on first use; None if the master is unavailable"""
+    index = instrument_state.current().index
+    if index is not None:
+        return index
+    with _lock:
+        index = instrument_state.current().index
+        return index if index is not None else build()
+
+
+def _lookup(table, key):
+    index = get_index()
+    record = getattr(index, table).get(key) if index is not None else None
+    _count("hits" if record is not None else "misses")
+    return record
+
+
+def by_trading_symbol(trading_symbol):
+    """Record of an exchange trading symbol such as 'SBIN-May2025-800-CE', or None"""
+    return _lookup('by_trading_symbol', trading_symbol)
+
+
+def by_custom_symbol(symbol):
+    """Record of a Tradehull symbol such as 'SBIN 29 MAY 800 CALL', or None"""
+    return _lookup('by_custom_symbol', symbol)
+
+
+def by_security_id(segment, security_id):
+    """Record of a Dhan exchange segment ('NSE_FNO', ...) and security id, or None"""
+    return _lookup('by_security_id', (segment, str(security_id)))
+
+
+def instrument_details(trading_symbol):
+    """The dict the strategies' get_instrument_details has always returned, or None"""
+    record = by_trading_symbol(trading_symbol)
+    if record is None:
+        return None
+    return {
+        'tradingsymbol': record.trading_symbol,
+        'exchange': record.exchange,
+        'instrument_type': record.instrument_type,
+        'expiry': record.expiry,
+        'strike': record.strike,
+        'option_type': record.option_type
+    }
+
+
+def metrics():
+    index = instrument_state.current().index
+    with _stats_lock:
+        counts = dict(stats)
+    return {**counts, **(index.stats() if index is not None else {"instruments": 0})}
@@ -0,0 +1,135 @@
+import datetime
+import glob
+import logging
+import os
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+import instrument_snapshot
+import instrument_state
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Instrument types of the option contracts the strategies trade
+OPTION_INSTRUMENTS = ('OPTIDX', 'OPTSTK')
+
+_lock = threading.Lock()
+# Load info reported before a master is loaded
+NO_MASTER = {"path": None, "version": None, "source": None, "rows": 0, "mapped_columns": 0, "memory_bytes": 0,
+             "load_ms": None}
+
+
+def memory_bytes(df):
+    """Resident size of a DataFrame, including the Python strings in object columns"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def file_version(path):
+    """(path, size, mtime) of a master file, used to notice a replaced file"""
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def latest_path():
+    """
+    Newest master file in config.INSTRUMENT_MASTER_DIR matching
+    config.INSTRUMENT_MASTER_PATTERN, else config.INSTRUMENT_MASTER_PATH
+    """
+    if config.INSTRUMENT_MASTER_DIR:
+        pattern = os.path.join(glob.escape(config.INSTRUMENT_MASTER_DIR), config.INSTRUMENT_MASTER_PATTERN)
+        files = [path for path in glob.glob(pattern) if os.path.isfile(path)]
+        if files:
+            return max(files, key=lambda path: (os.path.getmtime(path), path))
+    return config.INSTRUMENT_MASTER_PATH
+
+
+def read(path):
+    """
+    Read a master file without installing it
+    From the columnar snapshot of the CSV when it is current (see
+    instrument_snapshot), else parsed from the CSV.
+    Returns: (DataFrame, stats dict)
+    """
+    started = time.perf_counter()
+    version = file_version(path)
+    if config.INSTRUMENT_SNAPSHOT_DIR:
+        df, source = instrument_snapshot.load(path, config.INSTRUMENT_SNAPSHOT_DIR)
+    else:
+        df, source = instrument_snapshot.read_csv(path), 'csv'
+    return df, {"path": path, "version": version, "source": source, "rows": len(df),
+                "mapped_columns": df.attrs.get("mapped_columns", 0),
+                "memory_bytes": df.attrs.get("memory_bytes") or memory_bytes(df),
+                "load_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
+def install(df, info):
+    """Make df the shared master; callers holding the previous frame keep using it"""
+    instrument_state.replace(frame=df, info=info)
+
+
+def info():
+    """Load info of the current master (path, version, source, ...)"""
+    return {**NO_MASTER, **instrument_state.current().info}
+
+
+def load(path=None):
+    """
+    Load the instrument master once per process and cache it
+    This is the only copy: the strategies, caches and indexes all share it.
+    Returns: DataFrame, or None if the file could not be read
+    """
+    with _lock:
+        if instrument_state.current().frame is None:
+            path = path or latest_path()
+            try:
+                df, loaded = read(path)
+                install(df, loaded)
+                logger.info(f"Loaded {len(df)} instruments from {path} ({loaded['source']}) in {loaded['load_ms']:.0f} ms, "
+                            f"{loaded['memory_bytes'] / 2 ** 20:.1f} MB in memory (one copy shared by every strategy)")
+            except Exception as e:
+                logger.error(f"Error loading instrument master {path}: {str(e)}")
+                logger.error(traceback.format_exc())
+                return None
+        return instrument_state.current().frame
+
+
+def option_contracts(df):
+    """
+    Option rows of the master with their underlying, expiry label and expiry
+    date (e.g. 'SBIN', '29 MAY' and 2025-05-29, as in the Tradehull symbol
+    'SBIN 29 MAY 800 CALL'). The label has no year, so contracts are keyed
+    by the date.
+    """
+    options = df[df['SEM_INSTRUMENT_NAME'].isin(OPTION_INSTRUMENTS)]
+    parts = options['SEM_CUSTOM_SYMBOL'].astype(str).str.split(' ')
+    dates = pd.to_datetime(options['SEM_EXPIRY_DATE'], errors='coerce').dt.date
+    return options.assign(underlying=parts.str[0], expiry=parts.str[1] + ' ' + parts.str[2], expiry_date=dates)
+
+
+def label_date(label, today=None):
+    """
+    Expiry date a yearless label such as '29 MAY' refers to: its next
+    occurrence on or after today, as the broker reads a Tradehull symbol.
+    Returns None for a label that is not a day and month.
+    """
+    today = today or datetime.date.today()
+    for year in range(today.year, today.year + 5):
+        try:
+            date = datetime.datetime.strptime(f"{label} {year}", '%d %b %Y').date()
+        except ValueError:
+            # 29 FEB only exists in leap years
+            continue
+        if date >= today:
+            return date
+    return None
+
+
+def metrics():
+    current = info()
+    return {**{key: value for key, value in current.items() if key != "version"},
+            "memory_mb": round(current["memory_bytes"] / 2 ** 20, 3)}
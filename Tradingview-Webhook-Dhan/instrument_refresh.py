@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+import traceback
+
+import contract_cache
+import expiry_calendar
+import instrument_index
+import instrument_master
+import instrument_state
+import strike_ladder
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Contract symbols listed in a refresh report, per side of the diff
+DIFF_SAMPLE = 20
+
+_report = {"refreshes": 0, "failures": 0, "checked_at": None, "last": None, "last_error": None}
+# One refresh at a time; lookups never take this lock
+_refresh_lock = threading.Lock()
+_stop = threading.Event()
+_thread = None
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def contract_diff(old_index, new_index):
+    """
+    Contracts added and removed between two instrument indexes, keyed by
+    exchange segment and security id
+    """
+    old_ids = set(old_index.by_security_id) if old_index is not None else set()
+    new_ids = set(new_index.by_security_id)
+    added = sorted(new_ids - old_ids, key=str)
+    removed = sorted(old_ids - new_ids, key=str)
+
+    def sample(index, keys):
+        return [str(index.by_security_id[key].custom_symbol) for key in keys[:DIFF_SAMPLE]]
+
+    return {
+        "added": len(added),
+        "removed": len(removed),
+        "added_sample": sample(new_index, added),
+        "removed_sample": sample(old_index, removed) if old_index is not None else []
+    }
+
+
+def refresh(path):
+    """
+    Load the master file at path and swap it in with everything built from it
+    The frame, contract metadata, expiry calendar, index and strike ladders
+    are built into one new instrument snapshot (instrument_state) that is
+    published with a single assignment: requests read either the previous
+    version of all of them or the new one, never a mix.
+    Returns: report of the refresh
+    """
+    with _refresh_lock:
+        started = time.perf_counter()
+        df, info = instrument_master.read(path)
+        timings = {"read_ms": info["load_ms"]}
+
+        step = time.perf_counter()
+        entries = contract_cache.build_entries(df)
+        calendar = expiry_calendar.build(df)
+        index = instrument_index.InstrumentIndex(df)
+        ladders = strike_ladder.build_ladders(df)[0]
+        state = instrument_state.InstrumentState(frame=df, info=info, contracts=entries, calendar=calendar,
+                                                 index=index, ladders=ladders)
+        timings["build_ms"] = _elapsed_ms(step)
+
+        diff = contract_diff(instrument_state.current().index, index)
+
+        step = time.perf_counter()
+        instrument_state.publish(state)
+        timings["swap_ms"] = _elapsed_ms(step)
+        timings["total_ms"] = _elapsed_ms(started)
+
+        result = {"path": path, "source": info["source"], "instruments": len(df),
+                  "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"), **timings, **diff}
+        _report["refreshes"] += 1
+        _report["last"] = result
+
+    logger.info(f"Refreshed instrument master from {path} in {timings['total_ms']:.0f} ms: "
+                f"{len(df)} instruments, {diff['added']} contracts added, {diff['removed']} removed")
+    if diff["added_sample"]:
+        logger.info(f"  added:   {', '.join(diff['added_sample'])}")
+    if diff["removed_sample"]:
+        logger.info(f"  removed: {', '.join(diff['removed_sample'])}")
+    return result
+
+
+def check():
+    """
+    Refresh if the newest master file differs from the one loaded, and
+    roll the expiry calendar over if the date has changed
+    Returns: refresh report, or None if the master is unchanged
+    """
+    _report["checked_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    # Roll expiries over at the day boundary even when no signal arrives
+    expiry_calendar.roll()
+    path = instrument_master.latest_path()
+    if instrument_master.file_version(path) == instrument_master.info()["version"]:
+        return None
+    return refresh(path)
+
+
+def run(interval):
+    while not _stop.wait(interval):
+        try:
+            check()
+        except Exception as e:
+            # The previous master stays in place; the next check tries again
+            _report["failures"] += 1
+            _report["last_error"] = str(e)
+            logger.error(f"Error refreshing instrument master: {str(e)}")
+            logger.error(traceback.format_exc())
+
+
+def start(interval):
+    """Check for a new master file every `interval` seconds on a background thread"""
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _stop.clear()
+        _thread = threading.Thread(target=run, args=(interval,), name='instrument-refresh', daemon=True)
+        _thread.start()
+    return _thread
+
+
+def stop():
+    _stop.set()
+
+
+def metrics():
+    return {**_report, "running": _thread is not None and _thread.is_alive()}
@@ -0,0 +1,170 @@
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Instrument master columns the service uses and how they are stored:
+# 'category' columns as integer codes plus the category list, 'string'
+# columns as one UTF-8 blob, numeric columns as plain arrays
+COLUMNS = {
+    'SEM_EXM_EXCH_ID': 'category',
+    'SEM_SEGMENT': 'category',
+    'SEM_SMST_SECURITY_ID': 'int64',
+    'SEM_INSTRUMENT_NAME': 'category',
+    'SEM_EXCH_INSTRUMENT_TYPE': 'category',
+    'SEM_TRADING_SYMBOL': 'string',
+    'SEM_CUSTOM_SYMBOL': 'string',
+    'SEM_EXPIRY_DATE': 'category',
+    'SEM_STRIKE_PRICE': 'float64',
+    'SEM_OPTION_TYPE': 'category',
+    'SEM_LOT_UNITS': 'float32',
+    'SEM_TICK_SIZE': 'float64',
+    'SEM_FREEZE_QTY': 'float32',
+}
+
+# Stands in for a missing value inside a string blob
+_NULL = '\x00'
+
+
+def read_csv(path):
+    """Parse only the COLUMNS of the master CSV, with compact dtypes"""
+    dtypes = {name: ('category' if kind == 'category' else object if kind == 'string' else kind)
+              for name, kind in COLUMNS.items()}
+    return pd.read_csv(path, usecols=lambda name: name in COLUMNS, dtype=dtypes)
+
+
+def snapshot_path(source, directory):
+    """Snapshot folder of one version of the CSV (named by its size and mtime)"""
+    stat = os.stat(source)
+    return os.path.join(directory, f"{os.path.basename(source)}-{stat.st_size}-{stat.st_mtime_ns}")
+
+
+def write(df, path, source):
+    """
+    Write df as a snapshot folder: one .npy file per column plus meta.json
+    The folder is built under a temporary name and renamed into place, so
+    readers (other worker processes too) never see a partial snapshot.
+    """
+    temp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(temp, exist_ok=True)
+    # Measuring the deep size of the string columns is slow, so it is done once here
+    df.attrs["memory_bytes"] = int(df.memory_usage(deep=True).sum())
+    meta = {"version": SNAPSHOT_VERSION, "source": source, "rows": len(df), "memory_bytes": df.attrs["memory_bytes"],
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "columns": {}}
+    for index, name in enumerate(df.columns):
+        kind = COLUMNS[name]
+        filename = os.path.join(temp, f"{index}.npy")
+        column = {"kind": kind, "file": f"{index}.npy"}
+        if kind == 'category':
+            values = df[name].cat
+            np.save(filename, values.codes.to_numpy())
+            column["categories"] = [str(category) for category in values.categories]
+        elif kind == 'string':
+            nulls = df[name].isna()
+            text = '\n'.join(_NULL if null else str(value) for value, null in zip(df[name], nulls))
+            np.save(filename, np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+            column["nulls"] = bool(nulls.any())
+        else:
+            np.save(filename, df[name].to_numpy())
+        meta["columns"][name] = column
+    with open(os.path.join(temp, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    try:
+        os.rename(temp, path)
+    except OSError:
+        # Another process wrote the same snapshot first
+        shutil.rmtree(temp, ignore_errors=True)
+
+
+def _backing_array(series):
+    """The array holding a column's data: the codes for a categorical"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array.codes
+    return series.to_numpy()
+
+
+def read(path):
+    """
+    Load a snapshot folder into a DataFrame
+    Numeric and category code columns stay views of the memory-mapped .npy
+    files, so processes reading the same snapshot share its pages instead
+    of each holding a copy. df.attrs['memory_bytes'] holds the deep size the
+    frame had when it was parsed, df.attrs['mapped_columns'] the number of
+    columns still backed by the files.
+    """
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot {path} has version {meta.get('version')}, expected {SNAPSHOT_VERSION}")
+
+    rows = meta["rows"]
+    columns = {}
+    mapped = {}
+    for name, column in meta["columns"].items():
+        values = np.load(os.path.join(path, column["file"]), mmap_mode='r')
+        if column["kind"] == 'category':
+            columns[name] = pd.Categorical.from_codes(values, categories=column["categories"])
+            mapped[name] = values
+        elif column["kind"] == 'string':
+            strings = values.tobytes().decode('utf-8').split('\n') if rows else []
+            if column.get("nulls"):
+                strings = [None if value == _NULL else value for value in strings]
+            columns[name] = np.array(strings, dtype=object)
+        else:
+            columns[name] = values
+            mapped[name] = values
+    # copy=False keeps the mapped arrays as they are instead of consolidating them into new blocks
+    df = pd.DataFrame(columns, copy=False)
+    df.attrs["memory_bytes"] = meta["memory_bytes"]
+    df.attrs["mapped_columns"] = sum(1 for name, values in mapped.items()
+                                     if np.shares_memory(_backing_array(df[name]), values))
+    if df.attrs["mapped_columns"] < len(mapped):
+        logger.warning(f"Only {df.attrs['mapped_columns']} of {len(mapped)} snapshot columns of {path} "
+                       f"are memory-mapped; the rest were copied")
+    return df
+
+
+def _remove_stale(source, directory, keep):
+    """Drop snapshots of older versions of the same CSV"""
+    for path in glob.glob(os.path.join(glob.escape(directory), glob.escape(os.path.basename(source)) + '-*')):
+        if path != keep and '.tmp-' not in path:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load(source, directory):
+    """
+    Instrument master as a DataFrame, from the snapshot of the current CSV
+    if there is one, otherwise parsed from the CSV and snapshotted
+    Returns: (DataFrame, 'snapshot' or 'csv')
+    """
+    path = snapshot_path(source, directory)
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        try:
+            return read(path), 'snapshot'
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable instrument snapshot {path}: {str(e)}")
+            shutil.rmtree(path, ignore_errors=True)
+
+    df = read_csv(source)
+    try:
+        started = time.perf_counter()
+        os.makedirs(directory, exist_ok=True)
+        write(df, path, source)
+        _remove_stale(source, directory, path)
+        logger.info(f"Wrote instrument snapshot {path} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        # The CSV is loaded; the next start simply tries the snapshot again
+        logger.error(f"Error writing instrument snapshot {path}: {str(e)}")
+    return df, 'csv'
@@ -0,0 +1,40 @@
+import threading
+from collections import namedtuple
+
+# Everything built from one instrument master file: the frame and its load
+# info, contract metadata, expiry calendar, instrument index and strike
+# ladders. A refresh builds a whole new snapshot and publishes it with one
+# reference assignment, so a reader that takes the current snapshot once
+# sees a single version of all of them.
+InstrumentState = namedtuple('InstrumentState', ['frame', 'info', 'contracts', 'calendar', 'index', 'ladders'])
+
+# Before a master is loaded
+EMPTY = InstrumentState(frame=None, info={}, contracts={}, calendar={}, index=None, ladders={})
+
+_current = EMPTY
+# Serializes writers only; readers just take _current
+_lock = threading.Lock()
+
+
+def current():
+    """The published snapshot; take it once per lookup and read everything from it"""
+    return _current
+
+
+def publish(state):
+    """Make state the current snapshot"""
+    global _current
+    with _lock:
+        _current = state
+
+
+def replace(**parts):
+    """
+    Publish a copy of the current snapshot with some parts swapped, for the
+    start-up warm-up that builds them one at a time
+    Returns: the new snapshot
+    """
+    global _current
+    with _lock:
+        _current = _current._replace(**parts)
+        return _current
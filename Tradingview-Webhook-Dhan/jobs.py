@@ -0,0 +1,368 @@
+import logging
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ('EXIT-FULL', 'EXIT-HALF', 'ENTRY')
+
+# Priority of background broker work such as the warm-up: below every job
+# class, so it never takes rate-limit tokens a live signal is waiting for
+BACKGROUND_PRIORITY = len(PRIORITY_CLASSES)
+
+
+class QueueFull(Exception):
+    """Raised by LaneExecutor.submit when a priority class is at its depth limit"""
+
+    def __init__(self, priority, depth):
+        super().__init__(f"{PRIORITY_CLASSES[priority]} queue is full ({depth} jobs waiting)")
+        self.priority = priority
+        self.depth = depth
+
+
+class ExecutorClosed(Exception):
+    """Raised by LaneExecutor.submit after shutdown"""
+
+
+# Priority and lane of the job running on the current thread, read by the
+# rate limiter and the broker client
+_context = threading.local()
+
+
+def current_priority():
+    """Priority class index of the job running on this thread, or None outside jobs"""
+    return getattr(_context, 'priority', None)
+
+
+def set_current_priority(priority):
+    _context.priority = priority
+
+
+def current_lane():
+    """Underlying of the job running on this thread, or None outside jobs"""
+    return getattr(_context, 'lane', None)
+
+
+def set_current_lane(lane):
+    _context.lane = lane
+
+
+def order_sent():
+    """
+    Whether the job running on this thread has sent an order already; its
+    further legs are then completed rather than timed out or failed fast
+    """
+    return getattr(_context, 'order_sent', False)
+
+
+def set_order_sent(sent):
+    _context.order_sent = sent
+
+
+def signal_priority(signal):
+    """Priority class index for a signal: 0 = EXIT-FULL, 1 = EXIT-HALF, 2 = ENTRY"""
+    if signal.action == 'EXIT':
+        return 0 if signal.size == 'FULL' else 1
+    return 2
+
+
+class WaitStats:
+    """Queue wait statistics with percentiles over the most recent samples"""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, wait):
+        self.count += 1
+        self.total += wait
+        self.last = wait
+        if wait > self.max:
+            self.max = wait
+        self._recent.append(wait)
+
+    def to_dict(self):
+        recent = sorted(self._recent)
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3)
+
+        return {
+            "processed": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_wait_ms": percentile(0.50),
+            "p95_wait_ms": percentile(0.95),
+            "p99_wait_ms": percentile(0.99),
+            "max_wait_ms": round(self.max * 1000, 3),
+            "last_wait_ms": round(self.last * 1000, 3)
+        }
+
+
+class Job:
+    """A single strategy execution triggered by a webhook signal"""
+
+    def __init__(self, signal, func):
+        self.id = uuid.uuid4().hex
+        self.signal = signal
+        self.func = func
+        self.priority = signal_priority(signal)
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._callback_lock = threading.Lock()
+
+    def run(self):
+        """Execute the strategy and record its result"""
+        self.started_at = time.time()
+        self.status = 'running'
+        set_current_priority(self.priority)
+        set_current_lane(self.signal.underlying)
+        set_order_sent(False)
+        try:
+            self.result = self.func()
+            self.status = 'completed'
+        except Exception as e:
+            logger.error(f"Job {self.id} ({self.signal.message}) failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            self.error = str(e)
+            self.status = 'failed'
+        finally:
+            set_current_priority(None)
+            set_current_lane(None)
+            set_order_sent(False)
+            self.finished_at = time.time()
+            with self._callback_lock:
+                self._done.set()
+                callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                try:
+                    callback(self)
+                except Exception as e:
+                    logger.error(f"Error in done callback of job {self.id}: {str(e)}")
+
+    def add_done_callback(self, callback):
+        """Call callback(job) once the job has finished (immediately if it already has)"""
+        with self._callback_lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def to_dict(self):
+        """Job state in the shape returned by /jobs/<id>"""
+        return {
+            "job_id": self.id,
+            "signal": self.signal.message,
+            "priority": PRIORITY_CLASSES[self.priority],
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.submitted_at)),
+            "queue_wait_ms": round((self.started_at - self.submitted_at) * 1000, 3) if self.started_at else None,
+            "run_time_ms": round((self.finished_at - self.started_at) * 1000, 3) if self.finished_at else None
+        }
+
+
+class JobStore:
+    """Thread-safe store of recent jobs, bounded to the most recent max_jobs"""
+
+    def __init__(self, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+class Lane:
+    """Ordered queue of jobs for one underlying"""
+
+    def __init__(self, key):
+        self.key = key
+        self.queue = deque()
+        self.scheduled = False  # waiting in the ready list or running on a worker
+        self.running = False
+        self.class_counts = [0] * len(PRIORITY_CLASSES)
+        self.waits = WaitStats()
+
+    def append(self, job):
+        self.queue.append(job)
+        self.class_counts[job.priority] += 1
+
+    def popleft(self):
+        job = self.queue.popleft()
+        self.class_counts[job.priority] -= 1
+        return job
+
+    def effective_priority(self, now, aging_seconds):
+        """
+        Scheduling priority of this lane
+        The lane inherits the most urgent class queued on it, since an exit can
+        only run once the jobs ahead of it in the lane are done. The class is
+        promoted one step for every aging_seconds the head job has waited, so
+        entries are never starved by a steady stream of exits.
+        """
+        priority = next(p for p, count in enumerate(self.class_counts) if count)
+        if aging_seconds > 0:
+            priority -= int((now - self.queue[0].submitted_at) // aging_seconds)
+        return max(priority, 0)
+
+    def to_dict(self):
+        stats = self.waits.to_dict()
+        stats["depth"] = len(self.queue)
+        stats["running"] = self.running
+        return stats
+
+
+class LaneExecutor:
+    """
+    Run jobs with one ordered lane per underlying on a shared worker pool
+    Jobs for the same underlying run one at a time in arrival order, while
+    different underlyings proceed concurrently on the pool. When workers are
+    scarce, lanes holding EXIT-FULL work are served before EXIT-HALF, and
+    EXIT-HALF before ENTRY, with aging so no lane waits forever.
+    max_queued: optional per-class limit on waiting jobs, e.g. (200, 200, 50);
+    submit raises QueueFull instead of queueing past it.
+    """
+
+    def __init__(self, workers, store, lane_keys=(), aging_seconds=5.0, max_queued=None):
+        self.store = store
+        self.aging_seconds = aging_seconds
+        self.max_queued = tuple(max_queued) if max_queued else None
+        self._queued = [0] * len(PRIORITY_CLASSES)
+        self._rejected = [0] * len(PRIORITY_CLASSES)
+        self._lanes = {key: Lane(key) for key in lane_keys}
+        self._ready = []
+        self._class_waits = [WaitStats() for _ in PRIORITY_CLASSES]
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._shutdown = False
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"strategy-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, signal, func):
+        """
+        Queue a strategy on its underlying's lane; returns the Job
+        Raises QueueFull when the job's priority class is at its limit and
+        ExecutorClosed after shutdown.
+        """
+        job = Job(signal, func)
+        with self._cond:
+            if self._shutdown:
+                raise ExecutorClosed("Executor is shut down")
+            if self.max_queued and self._queued[job.priority] >= self.max_queued[job.priority]:
+                self._rejected[job.priority] += 1
+                raise QueueFull(job.priority, self._queued[job.priority])
+            self._queued[job.priority] += 1
+            self.store.add(job)
+            lane = self._lanes.get(signal.underlying)
+            if lane is None:
+                lane = self._lanes[signal.underlying] = Lane(signal.underlying)
+            lane.append(job)
+            if not lane.scheduled:
+                lane.scheduled = True
+                self._ready.append(lane)
+                self._cond.notify()
+        logger.info(f"Queued job {job.id} for {signal.message} ({PRIORITY_CLASSES[job.priority]})")
+        return job
+
+    def _next_lane(self):
+        """Remove and return the ready lane to serve next (caller holds the lock)"""
+        now = time.time()
+        best_index = 0
+        best_key = None
+        for index, lane in enumerate(self._ready):
+            key = (lane.effective_priority(now, self.aging_seconds), lane.queue[0].submitted_at)
+            if best_key is None or key < best_key:
+                best_index, best_key = index, key
+        return self._ready.pop(best_index)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._shutdown:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                lane = self._next_lane()
+                job = lane.popleft()
+                self._queued[job.priority] -= 1
+                lane.running = True
+                wait = time.time() - job.submitted_at
+                lane.waits.record(wait)
+                self._class_waits[job.priority].record(wait)
+                self._busy += 1
+
+            job.run()
+
+            with self._cond:
+                self._busy -= 1
+                lane.running = False
+                if lane.queue:
+                    self._ready.append(lane)
+                    self._cond.notify()
+                else:
+                    lane.scheduled = False
+
+    def metrics(self):
+        """Worker utilisation plus depth and wait time for every lane"""
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "busy_workers": self._busy,
+                "ready_lanes": len(self._ready),
+                "queued_jobs": sum(self._queued),
+                "priority_classes": {
+                    name: dict(
+                        self._class_waits[index].to_dict(),
+                        queued=self._queued[index],
+                        max_queued=self.max_queued[index] if self.max_queued else None,
+                        rejected=self._rejected[index]
+                    )
+                    for index, name in enumerate(PRIORITY_CLASSES)
+                },
+                "lanes": {key: lane.to_dict() for key, lane in sorted(self._lanes.items())}
+            }
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs; workers exit once the queued jobs are done"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Fires TradingView-style alerts at the webhook and reports throughput and
+# tail latency. Run the server against the simulated broker, e.g.
+#   WEBHOOK_BROKER_ADAPTER=simulated WEBHOOK_ASYNC_MODE=1 python webhook_server.py
+#   python load_test.py --url http://localhost:80 --signals 500 --concurrency 32
+# or let the script start the app itself with --in-process.
+
+FINISHED = ('completed', 'failed')
+
+
+class HttpClient:
+    """Talks to a running webhook server"""
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read() or b'null')
+            except ValueError:
+                return e.code, None
+
+
+class InProcessClient:
+    """Runs the Flask app in this process against the simulated broker"""
+
+    def __init__(self):
+        os.environ.setdefault('WEBHOOK_BROKER_ADAPTER', 'simulated')
+        import config
+        import webhook_server
+        webhook_server.service.warmup.wait(config.WARMUP_WAIT_SECONDS)
+        self.app = webhook_server.app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        # Flask test clients are not shared between threads
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        response = self._local.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+
+    def pick(p):
+        if not samples:
+            return 0.0
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+    return {"count": len(samples), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0}
+
+
+def build_messages(routes, count, exit_ratio, seed):
+    """Random mix of entry and exit alerts drawn from the server's /routes listing"""
+    rng = random.Random(seed)
+    entries = [message for message in routes if '-ENTRY-' in message]
+    exits = [message for message in routes if '-EXIT-' in message]
+    messages = []
+    for _ in range(count):
+        pool = exits if exits and (not entries or rng.random() < exit_ratio) else entries
+        messages.append(rng.choice(pool))
+    return messages
+
+
+def send_one(client, message, poll_interval, job_timeout):
+    """
+    Post one alert and follow its job to the end
+    Returns: (HTTP status, seconds to the webhook reply, seconds until the
+    strategy finished or None, final job status)
+    """
+    started = time.perf_counter()
+    status, body = client.request('POST', '/webhook', {"message": message, "alert_id": uuid.uuid4().hex})
+    accepted = time.perf_counter() - started
+    body = body or {}
+    if status == 202 and body.get('status_url'):
+        deadline = started + job_timeout
+        while time.perf_counter() < deadline:
+            _, job = client.request('GET', body['status_url'])
+            if job and job.get('status') in FINISHED:
+                return status, accepted, time.perf_counter() - started, job['status']
+            time.sleep(poll_interval)
+        return status, accepted, None, 'timeout'
+    if status == 200 and body.get('status') == 'success':
+        return status, accepted, accepted, 'completed'
+    return status, accepted, None, body.get('status', 'error')
+
+
+def run(client, messages, concurrency, rate, poll_interval, job_timeout):
+    """Send every message, open-loop at `rate` per second when set, else as fast as `concurrency` allows"""
+    results = []
+    lock = threading.Lock()
+
+    def task(message, send_at):
+        if send_at:
+            time.sleep(max(0.0, send_at - time.perf_counter()))
+        try:
+            result = send_one(client, message, poll_interval, job_timeout)
+        except Exception as e:
+            result = (None, 0.0, None, f"exception: {e}")
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index, message in enumerate(messages):
+            pool.submit(task, message, started + index / rate if rate else None)
+    return results, time.perf_counter() - started
+
+
+def report(results, elapsed, metrics):
+    statuses = {}
+    outcomes = {}
+    for status, _, _, outcome in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    finished = [done for _, _, done, _ in results if done is not None]
+    summary = {
+        "signals": len(results),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(finished) / elapsed, 3) if elapsed else 0.0,
+        "http_status": statuses,
+        "outcomes": outcomes,
+        "webhook_reply": percentiles([accepted for _, accepted, _, _ in results]),
+        "end_to_end": percentiles(finished),
+    }
+    if metrics:
+        summary["server"] = {key: metrics.get(key) for key in ('executor', 'rate_limits', 'resilience')}
+        summary["server"]["broker"] = (metrics.get('broker_client') or {}).get('transport')
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test the webhook and report throughput and tail latency")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:80', help="running webhook server")
+    target.add_argument('--in-process', action='store_true', help="start the app here on the simulated broker")
+    parser.add_argument('--signals', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=0, help="signals per second (open loop); 0 = closed loop")
+    parser.add_argument('--exit-ratio', type=float, default=0.2, help="share of alerts that are exits")
+    parser.add_argument('--underlyings', help="comma-separated underlyings, default every routed one")
+    parser.add_argument('--poll-interval', type=float, default=0.02)
+    parser.add_argument('--job-timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    client = InProcessClient() if args.in_process else HttpClient(args.url, args.job_timeout)
+    _, listing = client.request('GET', '/routes')
+    routes = (listing or {}).get('routes') or {}
+    if args.underlyings:
+        wanted = {name.strip().upper() for name in args.underlyings.split(',')}
+        routes = [message for message in routes if message.split('-')[0] in wanted]
+    if not routes:
+        raise SystemExit("No routes to test; is the server running?")
+
+    messages = build_messages(routes, args.signals, args.exit_ratio, args.seed)
+    results, elapsed = run(client, messages, args.concurrency, args.rate, args.poll_interval, args.job_timeout)
+    _, metrics = client.request('GET', '/metrics')
+    print(json.dumps(report(results, elapsed, metrics), indent=2))
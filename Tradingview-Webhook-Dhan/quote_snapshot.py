@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# symbol -> (fetched_at, price or None when the broker returned no quote)
+_quotes = {}
+_lock = threading.Lock()
+
+
+def prefetch(tsl, names):
+    """
+    Fetch LTPs for many symbols in one get_ltp_data call and keep them for
+    config.QUOTE_SNAPSHOT_TTL_SECONDS so strategies can reuse them
+    Returns: dict of symbol -> price for the symbols the broker quoted
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+    # Only the latest batches are kept: the snapshot never outgrows them
+    clear_expired()
+    price_data = tsl.get_ltp_data(names=names) or {}
+    fetched_at = time.monotonic()
+    with _lock:
+        for name in names:
+            _quotes[name] = (fetched_at, price_data.get(name))
+    logger.info(f"Prefetched {len(price_data)}/{len(names)} quotes in one batch")
+    return price_data
+
+
+def cached_ltp_data(tsl, names):
+    """
+    Drop-in for tsl.get_ltp_data(names=...)
+    Served from the snapshot when every name was prefetched within the TTL,
+    otherwise fetched from the broker as before.
+    """
+    now = time.monotonic()
+    ttl = config.QUOTE_SNAPSHOT_TTL_SECONDS
+    with _lock:
+        entries = [_quotes.get(name) for name in names]
+    if names and all(entry is not None and now - entry[0] <= ttl for entry in entries):
+        return {name: entry[1] for name, entry in zip(names, entries) if entry[1] is not None}
+    return tsl.get_ltp_data(names=names)
+
+
+def clear_expired():
+    """Drop snapshot entries older than the TTL"""
+    cutoff = time.monotonic() - config.QUOTE_SNAPSHOT_TTL_SECONDS
+    with _lock:
+        for name in [name for name, (fetched_at, _) in _quotes.items() if fetched_at < cutoff]:
+            del _quotes[name]
@@ -0,0 +1,181 @@
+import logging
+import threading
+import time
+
+from jobs import BACKGROUND_PRIORITY, current_priority, order_sent
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Tradehull methods -> the broker budget they draw from. Methods not listed
+# (e.g. get_lot_size, served from the local instrument file) are not limited.
+METHOD_BUDGETS = {
+    'get_ltp_data': 'quotes',
+    'get_option_price': 'quotes',
+    'ATM_Strike_Selection': 'quotes',
+    'place_slice_order': 'orders',
+    'place_order': 'orders',
+    'modify_order': 'orders',
+    'cancel_order': 'orders',
+    'get_positions': 'portfolio',
+    'get_holdings': 'portfolio',
+    'get_balance': 'portfolio',
+    'get_orderbook': 'portfolio',
+    'get_trade_book': 'portfolio',
+}
+
+
+class RateLimited(Exception):
+    """Raised when no token of a broker budget became available in time"""
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate tokens/second up to burst tokens
+    The last `reserved` tokens can only be taken by exit jobs, so a burst of
+    entries can never starve an exit; at least two tokens stay open to
+    entries, so they never need a full bucket. Background callers (warm-up) also
+    leave one token for entries and wait while a live caller is waiting.
+    The bucket belongs to one process unless share() moves its state into
+    the shared job queue, which the worker.py processes all draw from.
+    """
+
+    def __init__(self, name, rate, burst, reserved=0):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.reserved = max(min(float(reserved), self.burst - 2), 0.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._shared = None
+        self._live_waiting = 0
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def share(self, queue):
+        """Draw tokens from the bucket of the same name in a SharedJobQueue"""
+        with self._cond:
+            self._shared = queue
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, floor):
+        """Take a token if at least `floor` are available; returns whether one was taken"""
+        if self._shared is not None:
+            taken, self._tokens = self._shared.take_token(self.name, self.rate, self.burst, floor)
+            self._updated = time.monotonic()
+            return taken
+        self._refill(time.monotonic())
+        if self._tokens >= floor:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def acquire(self, exit_priority=False, timeout=None, background=False):
+        """
+        Take one token, blocking until one is available
+        Returns: seconds waited
+        Raises: RateLimited if no token was available within timeout
+        """
+        if exit_priority:
+            floor = 1.0
+        elif background:
+            floor = min(self.burst, 2.0 + self.reserved)
+        else:
+            floor = 1.0 + self.reserved
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+        with self._cond:
+            if not background:
+                self._live_waiting += 1
+            try:
+                while True:
+                    if (not background or not self._live_waiting) and self._take(floor):
+                        break
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        self.timeouts += 1
+                        raise RateLimited(f"No {self.name} token within {timeout}s")
+                    # Other processes draw from a shared bucket, so poll it
+                    wait = max((floor - self._tokens) / self.rate, 0.01)
+                    if self._shared is not None or background:
+                        wait = min(wait, 0.05)
+                    if deadline is not None:
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                if not background:
+                    self._live_waiting -= 1
+
+            waited = time.monotonic() - started
+            self.acquired += 1
+            if waited > 0.001:
+                self.waited += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+            return waited
+
+    def stats(self):
+        with self._cond:
+            if self._shared is None:
+                self._refill(time.monotonic())
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "reserved_for_exits": self.reserved,
+                "shared": self._shared is not None,
+                "tokens": round(self._tokens, 2),
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "avg_wait_ms": round(self.total_wait / self.waited * 1000, 3) if self.waited else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "timeouts": self.timeouts
+            }
+
+
+buckets = {
+    'quotes': TokenBucket('quotes', config.RATE_QUOTES_PER_SECOND, config.RATE_QUOTES_BURST,
+                          config.RATE_QUOTES_EXIT_RESERVE),
+    'orders': TokenBucket('orders', config.RATE_ORDERS_PER_SECOND, config.RATE_ORDERS_BURST,
+                          config.RATE_ORDERS_EXIT_RESERVE),
+    'portfolio': TokenBucket('portfolio', config.RATE_PORTFOLIO_PER_SECOND, config.RATE_PORTFOLIO_BURST,
+                             config.RATE_PORTFOLIO_EXIT_RESERVE),
+}
+
+
+def acquire(method):
+    """
+    Wait for a token of the budget the Tradehull method draws from
+    Exit jobs (EXIT-FULL / EXIT-HALF running on this thread) may use the
+    tokens reserved for them. Live callers give up with RateLimited after
+    RATE_LIMIT_MAX_WAIT_SECONDS; background work waits as long as it takes,
+    and so do the later legs of a job that has sent an order, since a leg
+    left unplaced would leave the position unhedged.
+    """
+    budget = METHOD_BUDGETS.get(method)
+    if budget is None:
+        return 0.0
+    priority = current_priority()
+    if priority == BACKGROUND_PRIORITY:
+        return buckets[budget].acquire(background=True)
+    if budget == 'orders' and order_sent():
+        return buckets[budget].acquire(exit_priority=True)
+    return buckets[budget].acquire(exit_priority=priority is not None and priority < 2,
+                                   timeout=config.RATE_LIMIT_MAX_WAIT_SECONDS)
+
+
+def share(queue):
+    """Share every bucket with the other processes using the SharedJobQueue"""
+    for bucket in buckets.values():
+        bucket.share(queue)
+
+
+def metrics():
+    return {name: bucket.stats() for name, bucket in buckets.items()}
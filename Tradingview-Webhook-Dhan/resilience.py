@@ -0,0 +1,192 @@
+import http.client
+import logging
+import random
+import threading
+import time
+
+from jobs import current_priority, order_sent
+from rate_limiter import METHOD_BUDGETS, RateLimited
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Attempts per Tradehull method. Order placement is never retried: a
+# timed-out order may still have reached the exchange.
+RETRY_ATTEMPTS = {
+    'get_ltp_data': config.RETRY_MAX_ATTEMPTS,
+    'get_option_price': config.RETRY_MAX_ATTEMPTS,
+    'ATM_Strike_Selection': config.RETRY_MAX_ATTEMPTS,
+    'get_lot_size': config.RETRY_MAX_ATTEMPTS,
+    'get_positions': config.RETRY_MAX_ATTEMPTS,
+    'get_holdings': config.RETRY_MAX_ATTEMPTS,
+    'get_balance': config.RETRY_MAX_ATTEMPTS,
+    'get_orderbook': config.RETRY_MAX_ATTEMPTS,
+    'get_trade_book': config.RETRY_MAX_ATTEMPTS,
+}
+
+
+# Exceptions meaning the broker could not be reached. An answer from the
+# broker (HTTP 4xx, an order rejection) or a bug in the call itself says
+# nothing about an outage, so it is neither retried nor held against the
+# circuit breaker.
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException)
+
+
+class BrokerUnavailable(Exception):
+    """Raised without calling the broker while a circuit breaker is open"""
+
+
+def is_failure_response(result):
+    return isinstance(result, dict) and result.get('status') == 'failure'
+
+
+def is_outage(error):
+    """Whether a broker call failed because of the broker: transport errors and HTTP 5xx"""
+    # A PartialOrderError is judged by the slice failure it wraps
+    if isinstance(getattr(error, 'error', None), Exception):
+        return is_outage(error.error)
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status >= 500
+    return isinstance(error, TRANSPORT_ERRORS)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(config.RETRY_MAX_DELAY_SECONDS, config.RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and fails calls fast for
+    `cooldown` seconds; then lets one trial call through (half-open) and
+    closes again if it succeeds. before_call() returns whether the caller
+    got the trial, which it hands back to record_*() so only the trial call
+    itself ends the trial.
+    """
+
+    def __init__(self, name, threshold, cooldown):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise BrokerUnavailable or let the call through; returns True for the half-open trial call"""
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    raise BrokerUnavailable(f"Broker {self.name} circuit is open, failing fast")
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self._trial_running:
+                    self.rejected += 1
+                    raise BrokerUnavailable(f"Broker {self.name} circuit is half-open, trial call in progress")
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self, trial=False):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"Broker {self.name} circuit closed")
+            self.state = 'closed'
+            self.failures = 0
+            if trial:
+                self._trial_running = False
+
+    def record_skipped(self, trial=False):
+        """The call says nothing about the broker's health; only ends the half-open trial if it was it"""
+        if trial:
+            with self._lock:
+                self._trial_running = False
+
+    def record_failure(self, trial=False):
+        with self._lock:
+            self.failures += 1
+            if trial:
+                self._trial_running = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.error(f"Broker {self.name} circuit opened after {self.failures} consecutive failures")
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures,
+                    "times_opened": self.times_opened, "rejected": self.rejected}
+
+
+breakers = {
+    name: CircuitBreaker(name, config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_COOLDOWN_SECONDS)
+    for name in ('quotes', 'orders', 'portfolio', 'other')
+}
+retries = {}
+failures = {}
+_stats_lock = threading.Lock()
+
+
+def _count(counter, method):
+    with _stats_lock:
+        counter[method] = counter.get(method, 0) + 1
+
+
+def call(method, func):
+    """
+    Run func() (one broker request for `method`) behind the method's circuit
+    breaker, retrying outages and failure responses with jittered
+    exponential backoff up to the method's attempt budget. RateLimited and
+    errors that are not outages are raised straight away. Exit jobs are
+    never failed fast: closing a position is always attempted. Neither are
+    the later order legs of a job that has sent an order, which would
+    otherwise leave its first leg unhedged.
+    """
+    budget = METHOD_BUDGETS.get(method, 'other')
+    breaker = breakers[budget]
+    attempts = RETRY_ATTEMPTS.get(method, 1)
+    priority = current_priority()
+    bypass = (priority is not None and priority < 2) or (budget == 'orders' and order_sent())
+    for attempt in range(1, attempts + 1):
+        trial = False if bypass else breaker.before_call()
+        try:
+            result = func()
+        except RateLimited:
+            # Waiting again for a token would only make the signal later
+            breaker.record_skipped(trial)
+            raise
+        except Exception as e:
+            if not is_outage(e):
+                breaker.record_skipped(trial)
+                raise
+            breaker.record_failure(trial)
+            _count(failures, method)
+            if attempt == attempts:
+                raise
+            logger.warning(f"{method} failed ({str(e)}), retry {attempt}/{attempts - 1}")
+        else:
+            if not is_failure_response(result):
+                breaker.record_success(trial)
+                return result
+            # A failure response is still an answer from the broker
+            breaker.record_skipped(trial)
+            _count(failures, method)
+            if attempt == attempts:
+                return result
+            logger.warning(f"{method} returned a failure response, retry {attempt}/{attempts - 1}")
+        _count(retries, method)
+        time.sleep(backoff_delay(attempt))
+
+
+def metrics():
+    with _stats_lock:
+        counts = {"retries": dict(retries), "failures": dict(failures)}
+    return {**counts, "breakers": {name: breaker.stats() for name, breaker in breakers.items()}}
@@ -0,0 +1,401 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from jobs import PRIORITY_CLASSES, ExecutorClosed, QueueFull, signal_priority
+from signal_router import parse_signal
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT UNIQUE NOT NULL,
+    underlying TEXT NOT NULL,
+    message TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    worker TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, underlying, seq);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    pid INTEGER,
+    heartbeat_at REAL,
+    jobs_done INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS shared_state (
+    name TEXT PRIMARY KEY,
+    value TEXT,
+    worker TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+'''
+
+# Head of each underlying's queue, skipping underlyings with a job running.
+# Lanes are ordered by the most urgent class queued on them, promoted one
+# class for every :aging seconds the head job has waited (as
+# Lane.effective_priority does for the in-process executor), then arrival.
+_CLAIM_SQL = '''
+SELECT j.seq, j.id, j.message FROM jobs j
+WHERE j.status = 'queued'
+  AND j.seq = (SELECT MIN(q.seq) FROM jobs q WHERE q.underlying = j.underlying AND q.status = 'queued')
+  AND NOT EXISTS (SELECT 1 FROM jobs r WHERE r.underlying = j.underlying AND r.status = 'running')
+ORDER BY MAX(
+    (SELECT MIN(q.priority) FROM jobs q WHERE q.underlying = j.underlying AND q.status = 'queued')
+    - CASE WHEN :aging > 0 THEN CAST((:now - j.submitted_at) / :aging AS INTEGER) ELSE 0 END,
+    0), j.seq
+LIMIT 1
+'''
+
+
+class SharedJobQueue:
+    """
+    SQLite-backed job queue shared by the webhook server and worker processes
+    Per-underlying ordering holds across processes: a worker may only claim
+    the oldest queued job of an underlying, and only while no other job of
+    that underlying is running. Lanes waiting longer than aging_seconds are
+    promoted one priority class per period, so entries are not starved.
+    """
+
+    def __init__(self, path, aging_seconds=0):
+        self.path = path
+        self.aging_seconds = aging_seconds
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, func):
+        """Run func(conn) inside an immediate (write-locked) transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func(self._conn)
+                self._conn.execute('COMMIT')
+                return result
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def enqueue(self, signal, max_queued=None):
+        """
+        Add a job for signal; returns its id
+        Raises QueueFull when the signal's priority class already has
+        max_queued[priority] jobs waiting.
+        """
+        job_id = uuid.uuid4().hex
+        priority = signal_priority(signal)
+
+        def insert(conn):
+            if max_queued:
+                depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND priority = ?",
+                                     (priority,)).fetchone()[0]
+                if depth >= max_queued[priority]:
+                    raise QueueFull(priority, depth)
+            conn.execute(
+                "INSERT INTO jobs (id, underlying, message, priority, status, submitted_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, signal.underlying, signal.message, priority, time.time())
+            )
+
+        self._write(insert)
+        return job_id
+
+    def claim(self, worker):
+        """Atomically take the next runnable job; returns (id, message) or None"""
+        def take(conn):
+            row = conn.execute(_CLAIM_SQL, {"now": time.time(), "aging": self.aging_seconds}).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE jobs SET status = 'running', worker = ?, started_at = ? WHERE seq = ?",
+                         (worker, time.time(), row['seq']))
+            return row['id'], row['message']
+
+        return self._write(take)
+
+    def complete(self, job_id, status, result=None, error=None):
+        """Record the outcome of a claimed job"""
+        def finish(conn):
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result, default=str), error, time.time(), job_id)
+            )
+            conn.execute("UPDATE workers SET jobs_done = jobs_done + 1 WHERE worker = "
+                         "(SELECT worker FROM jobs WHERE id = ?)", (job_id,))
+
+        self._write(finish)
+
+    def abandon(self, worker=None):
+        """
+        Mark jobs left running by a dead worker (every worker when None) as
+        failed so their lane is unblocked. They are not re-run, since orders
+        may already have been placed.
+        """
+        def fail(conn):
+            sql = ("UPDATE jobs SET status = 'failed', error = 'worker process exited while running the job', "
+                   "finished_at = ? WHERE status = 'running'")
+            params = (time.time(),)
+            if worker is not None:
+                sql += " AND worker = ?"
+                params += (worker,)
+            return conn.execute(sql, params).rowcount
+
+        failed = self._write(fail)
+        if failed:
+            logger.warning(f"Marked {failed} jobs abandoned by {worker or 'previous workers'} as failed")
+        return failed
+
+    def heartbeat(self, worker):
+        self._write(lambda conn: conn.execute(
+            "INSERT INTO workers (worker, pid, heartbeat_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(worker) DO UPDATE SET pid = excluded.pid, heartbeat_at = excluded.heartbeat_at",
+            (worker, os.getpid(), time.time())
+        ))
+
+    def publish(self, name, value, worker=None):
+        """Store a JSON-serialisable value (e.g. the positions book) as shared state"""
+        self._write(lambda conn: conn.execute(
+            "INSERT INTO shared_state (name, value, worker, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value, worker = excluded.worker, "
+            "updated_at = excluded.updated_at",
+            (name, json.dumps(value, default=str), worker, time.time())
+        ))
+
+    def read_state(self, name):
+        rows = self._read("SELECT value, worker, updated_at FROM shared_state WHERE name = ?", (name,))
+        if not rows:
+            return None
+        return {
+            "value": json.loads(rows[0]['value']),
+            "worker": rows[0]['worker'],
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(rows[0]['updated_at']))
+        }
+
+    def take_token(self, name, rate, burst, floor):
+        """
+        Take one token from the rate bucket `name` shared by every process
+        The bucket refills at rate tokens/second up to burst; a token is only
+        taken while at least `floor` are available.
+        Returns: (taken, tokens left)
+        """
+        def take(conn):
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated_at FROM rate_buckets WHERE name = ?', (name,)).fetchone()
+            tokens = burst if row is None else min(burst, row['tokens'] + max(0.0, now - row['updated_at']) * rate)
+            taken = tokens >= floor
+            if taken:
+                tokens -= 1.0
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                         (name, tokens, now))
+            return taken, tokens
+
+        return self._write(take)
+
+    def get(self, job_id):
+        rows = self._read("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def statuses(self, job_ids):
+        """Return {id: status} for the given ids"""
+        if not job_ids:
+            return {}
+        placeholders = ','.join('?' * len(job_ids))
+        rows = self._read(f"SELECT id, status FROM jobs WHERE id IN ({placeholders})", tuple(job_ids))
+        return {row['id']: row['status'] for row in rows}
+
+    def metrics(self, heartbeat_timeout=30):
+        now = time.time()
+        classes = {name: {"queued": 0, "running": 0} for name in PRIORITY_CLASSES}
+        for row in self._read("SELECT priority, status, COUNT(*) AS n FROM jobs "
+                              "WHERE status IN ('queued', 'running') GROUP BY priority, status"):
+            classes[PRIORITY_CLASSES[row['priority']]][row['status']] = row['n']
+        lanes = {row['underlying']: row['n'] for row in self._read(
+            "SELECT underlying, COUNT(*) AS n FROM jobs WHERE status = 'queued' GROUP BY underlying")}
+        workers = {
+            row['worker']: {
+                "pid": row['pid'],
+                "alive": now - row['heartbeat_at'] < heartbeat_timeout,
+                "jobs_done": row['jobs_done']
+            }
+            for row in self._read("SELECT worker, pid, heartbeat_at, jobs_done FROM workers")
+        }
+        return {"backend": "shared", "path": self.path, "priority_classes": classes,
+                "lane_depths": lanes, "workers": workers}
+
+    def purge(self, keep_seconds):
+        """Delete finished jobs older than keep_seconds"""
+        cutoff = time.time() - keep_seconds
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND finished_at < ?", (cutoff,)
+        ).rowcount)
+
+
+class SharedJob:
+    """Server-side handle for a job executed by a worker process"""
+
+    def __init__(self, job_id, signal, queue):
+        self.id = job_id
+        self.signal = signal
+        self._queue = queue
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._row = None
+
+    def _row_value(self, name):
+        row = self._row if self._done.is_set() else self._queue.get(self.id)
+        return row[name] if row else None
+
+    @property
+    def status(self):
+        return self._row_value('status')
+
+    @property
+    def result(self):
+        value = self._row_value('result')
+        return json.loads(value) if value else None
+
+    @property
+    def error(self):
+        return self._row_value('error')
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self):
+        row = self._queue.get(self.id)
+        with self._lock:
+            self._row = row
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"Error in done callback of job {self.id}: {str(e)}")
+
+    def to_dict(self):
+        return shared_job_dict(self._row if self._done.is_set() else self._queue.get(self.id))
+
+
+def shared_job_dict(row):
+    """Job row in the shape returned by /jobs/<id>"""
+    return {
+        "job_id": row['id'],
+        "signal": row['message'],
+        "priority": PRIORITY_CLASSES[row['priority']],
+        "status": row['status'],
+        "result": json.loads(row['result']) if row['result'] else None,
+        "error": row['error'],
+        "worker": row['worker'],
+        "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row['submitted_at'])),
+        "queue_wait_ms": round((row['started_at'] - row['submitted_at']) * 1000, 3) if row['started_at'] else None,
+        "run_time_ms": round((row['finished_at'] - row['started_at']) * 1000, 3)
+        if row['finished_at'] and row['started_at'] else None
+    }
+
+
+class SharedQueueExecutor:
+    """
+    Drop-in for LaneExecutor + JobStore that hands jobs to worker processes
+    (worker.py) through a SharedJobQueue. One poller thread watches pending
+    jobs and wakes waiters when workers publish results.
+    """
+
+    def __init__(self, queue, max_queued=None, poll_interval=0.05):
+        self.queue = queue
+        self.max_queued = tuple(max_queued) if max_queued else None
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._poller = threading.Thread(target=self._poll, name='shared-queue-poller', daemon=True)
+        self._poller.start()
+
+    def submit(self, signal, func=None):
+        """Queue signal for a worker process; func is resolved by the worker's own router"""
+        if self._shutdown:
+            raise ExecutorClosed("Executor is shut down")
+        job = SharedJob(self.queue.enqueue(signal, self.max_queued), signal, self.queue)
+        with self._lock:
+            self._pending[job.id] = job
+        logger.info(f"Queued shared job {job.id} for {signal.message} ({PRIORITY_CLASSES[signal_priority(signal)]})")
+        return job
+
+    def get(self, job_id):
+        """JobStore-compatible lookup, including jobs submitted by earlier server runs"""
+        with self._lock:
+            job = self._pending.get(job_id)
+        if job is not None:
+            return job
+        row = self.queue.get(job_id)
+        if row is None:
+            return None
+        job = SharedJob(job_id, parse_signal(row['message']), self.queue)
+        if row['status'] in ('completed', 'failed'):
+            job._finish()
+        return job
+
+    def _poll(self):
+        while not self._shutdown:
+            with self._lock:
+                ids = list(self._pending)
+            if ids:
+                try:
+                    statuses = self.queue.statuses(ids)
+                except sqlite3.Error as e:
+                    logger.error(f"Error polling shared queue: {str(e)}")
+                    statuses = {}
+                for job_id, status in statuses.items():
+                    if status in ('completed', 'failed'):
+                        with self._lock:
+                            job = self._pending.pop(job_id, None)
+                        if job is not None:
+                            job._finish()
+            time.sleep(self.poll_interval)
+
+    def metrics(self):
+        stats = self.queue.metrics()
+        with self._lock:
+            stats["awaiting_results"] = len(self._pending)
+        return stats
+
+    def shutdown(self, wait=True):
+        self._shutdown = True
+        if wait:
+            self._poller.join()
@@ -0,0 +1,127 @@
+import importlib
+import logging
+import os
+import re
+import sys
+from collections import namedtuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Folder holding the *_strategy.py modules
+STRATEGIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies')
+
+# One underlying per line
+STOCKS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stocks.txt')
+
+# Strategy function naming used by every strategy module
+_ENTRY_FUNCTION = re.compile(r'^execute_([a-z0-9]+)_ratio_backspread_(call|put)_(\d+)$')
+_EXIT_FUNCTION = re.compile(r'^close_([a-z0-9]+)_(half|all)_positions$')
+
+
+class Signal(namedtuple('Signal', ['underlying', 'action', 'side', 'size'])):
+    """
+    Parsed TradingView alert
+    underlying: e.g. 'SBIN'
+    action: 'ENTRY' or 'EXIT'
+    side: 'CALL' or 'PUT' for entries, None for exits
+    size: lot multiple for entries (e.g. '4'), 'FULL' or 'HALF' for exits
+    """
+    __slots__ = ()
+
+    @property
+    def message(self):
+        """Alert message this signal was parsed from, in canonical form"""
+        if self.action == 'EXIT':
+            return f"{self.underlying}-EXIT-{self.size}"
+        return f"{self.underlying}-ENTRY-{self.side}-{self.size}"
+
+
+def parse_signal(message):
+    """
+    Parse an alert message such as 'SBIN-ENTRY-CALL-4' or 'SBIN-EXIT-FULL'
+    Returns: Signal or None if the message is not in a known format
+    """
+    parts = message.strip().upper().split('-')
+    if len(parts) == 3 and parts[1] == 'EXIT' and parts[2] in ('FULL', 'HALF'):
+        return Signal(parts[0], 'EXIT', None, parts[2])
+    if len(parts) == 4 and parts[1] == 'ENTRY' and parts[2] in ('CALL', 'PUT') and parts[3].isdigit():
+        return Signal(parts[0], 'ENTRY', parts[2], parts[3])
+    return None
+
+
+def load_underlyings(path=STOCKS_FILE):
+    """Read the traded underlyings from stocks.txt, in file order without duplicates"""
+    underlyings = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                name = line.strip().upper()
+                if name and name not in underlyings:
+                    underlyings.append(name)
+    except OSError as e:
+        logger.error(f"Error reading {path}: {str(e)}")
+    return underlyings
+
+
+def load_strategy_modules(strategies_dir=STRATEGIES_DIR):
+    """Import every *_strategy.py module from the strategies folder"""
+    modules = []
+    for filename in sorted(os.listdir(strategies_dir)):
+        if filename.endswith('_strategy.py'):
+            modules.append(importlib.import_module(f"strategies.{filename[:-3]}"))
+    return modules
+
+
+def build_route_table(modules):
+    """
+    Build the Signal -> strategy function table from the strategy modules
+    Functions are matched by name, e.g. execute_sbin_ratio_backspread_call_4
+    or close_sbin_half_positions. Functions imported from other modules are skipped.
+    """
+    routes = {}
+    for module in modules:
+        for name, func in vars(module).items():
+            if not callable(func) or getattr(func, '__module__', None) != module.__name__:
+                continue
+
+            match = _ENTRY_FUNCTION.match(name)
+            if match:
+                key = Signal(match.group(1).upper(), 'ENTRY', match.group(2).upper(), match.group(3))
+            else:
+                match = _EXIT_FUNCTION.match(name)
+                if not match:
+                    continue
+                key = Signal(match.group(1).upper(), 'EXIT', None, 'FULL' if match.group(2) == 'all' else 'HALF')
+
+            if key in routes:
+                logger.warning(f"Duplicate route for {key.message}: {routes[key].__name__} replaced by {name}")
+            routes[key] = func
+    return routes
+
+
+class SignalRouter:
+    """Dispatch parsed signals to strategy functions with a single dictionary lookup"""
+
+    def __init__(self, routes):
+        self.routes = dict(routes)
+        self.underlyings = frozenset(signal.underlying for signal in self.routes)
+        self.modules = {signal.underlying: sys.modules[func.__module__] for signal, func in self.routes.items()}
+
+    @classmethod
+    def from_strategies(cls, strategies_dir=STRATEGIES_DIR):
+        """Build a router from every strategy module in the strategies folder"""
+        router = cls(build_route_table(load_strategy_modules(strategies_dir)))
+        logger.info(f"Loaded {len(router.routes)} routes for {len(router.underlyings)} underlyings")
+        return router
+
+    def resolve(self, signal):
+        """Return the strategy function for a signal, or None if there is no route"""
+        return self.routes.get(signal)
+
+    def listing(self):
+        """Return {message: 'module.function'} for every route, sorted by message"""
+        return {
+            signal.message: f"{func.__module__}.{func.__name__}"
+            for signal, func in sorted(self.routes.items(), key=lambda item: item[0].message)
+        }
@@ -0,0 +1,64 @@
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution
+    The first caller runs the function; callers arriving while it is in
+    flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func, not_before=None):
+        """
+        Return (result, shared) where shared is True for coalesced callers
+        not_before: monotonic time; an in-flight call started earlier is not
+        joined (its result may predate something the caller depends on), a
+        new call is started instead and later callers join that one.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and (not_before is None or call.started_at >= not_before):
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced}
@@ -1,74 +1,49 @@
-from Dhan_Tradehull import Tradehull
 import time
 import logging
 import traceback
-import pandas as pd
-import os
 
-# Import credentials
-from credentials import client_code, token_id
+# Shared broker client, built once per process
+from broker_clients import get_client
+
+# Quotes prefetched by batch webhooks
+from quote_snapshot import cached_ltp_data
+
+# Lot sizes cached per (underlying, expiry)
+from contract_cache import contract_lot_size
+
+# ATM strikes reused for a short TTL, concurrent lookups coalesced
+from atm_resolver import resolve_atm
+from expiry_calendar import current_expiry_label
+
+# Instrument master shared by every strategy, and lookups by symbol
+import instrument_master
+import instrument_index
+
+# Listed strikes per underlying, expiry and option type
+import strike_ladder
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Strike interval of the NTPC option chain
+STRIKE_STEP = 5
 
-# Global cache for instrument data
-_instrument_cache = None
 
 def load_instrument_data():
     """
-    Load instrument data from CSV and cache it
+    Instrument master shared by every strategy (one copy per process)
     """
-    global _instrument_cache
-    try:
-        if _instrument_cache is None:
-            csv_path = os.path.join(os.path.dirname(__file__), 'Dependencies', 'all_instrument 2025-05-15.csv')
-            _instrument_cache = pd.read_csv(csv_path, low_memory=False)  # Added low_memory=False to handle mixed types
-            logger.info(f"Loaded {len(_instrument_cache)} instruments from CSV")
-            logger.info(f"CSV columns: {_instrument_cache.columns.tolist()}")
-        return _instrument_cache
-    except Exception as e:
-        logger.error(f"Error loading instrument data: {str(e)}")
-        logger.error(traceback.format_exc())
-        return None
+    return instrument_master.load()
 
 def get_instrument_details(trading_symbol):
     """
-    Get instrument details from the cached CSV data
+    Get instrument details from the shared instrument index
     Returns: dict with instrument details or None if not found
     """
-    try:
-        # Load instrument data if not cached
-        df = load_instrument_data()
-        if df is None:
-            return None
-        
-        # Log the available columns for debugging
-        logger.info(f"Available columns in CSV: {df.columns.tolist()}")
-        
-        # Find the instrument using SEM_TRADING_SYMBOL
-        instrument = df[df['SEM_TRADING_SYMBOL'] == trading_symbol]
-        if instrument.empty:
-            logger.error(f"Instrument {trading_symbol} not found in CSV")
-            return None
-            
-        instrument = instrument.iloc[0]
-        
-        # Log the found instrument details
-        logger.info(f"Found instrument details: {instrument.to_dict()}")
-        
-        return {
-            'tradingsymbol': instrument['SEM_TRADING_SYMBOL'],
-            'exchange': instrument['SEM_EXM_EXCH_ID'],
-            'instrument_type': instrument['SEM_EXCH_INSTRUMENT_TYPE'],
-            'expiry': instrument['SEM_EXPIRY_DATE'],
-            'strike': instrument['SEM_STRIKE_PRICE'],
-            'option_type': instrument['SEM_OPTION_TYPE']
-        }
-    except Exception as e:
-        logger.error(f"Error getting instrument details: {str(e)}")
-        logger.error(traceback.format_exc())
-        return None
+    details = instrument_index.instrument_details(trading_symbol)
+    if details is None:
+        logger.error(f"Instrument {trading_symbol} not found in instrument master")
+    return details
 
 def execute_ratio_backspread(option_type, ratio):
     """
@@ -80,11 +55,11 @@ def execute_ratio_backspread(option_type, ratio):
         buy_ratio, sell_ratio = ratio
         logger.info(f"Executing NTPC ratio backspread strategy for {option_type} options ({buy_ratio}:{sell_ratio})")
         
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Get ATM strike
-        atm_strike = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        atm_strike = resolve_atm(tsl, 'NTPC')
         logger.info(f"Selected ATM strike: {atm_strike}")
         
         # Get ATM option price
@@ -99,19 +74,13 @@ def execute_ratio_backspread(option_type, ratio):
             logger.info(f"ATM {option_type} price: {atm_price}")
         except Exception as e:
             logger.error(f"Error getting ATM option price: {str(e)}")
-            atm_price = 1500  # Default price if API fails
+            # Abort rather than size the trade on a made-up price
+            raise
         
-        # Get lot size
-        try:
-
-            CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-            lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
-            logger.info(f"Lot size: {lot_size}")
-        except Exception as e:
-            logger.error(f"Error getting lot size: {str(e)}")
-            CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-            lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
-            logger.info(f"Lot size: {lot_size}")  # Use global constant if API fails
+        # Get lot size (the shared client already retries failed broker calls)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
+        logger.info(f"Lot size: {lot_size}")
         
         # Find best ITM strike
         best_itm_strike = None
@@ -279,26 +248,22 @@ def execute_ratio_backspread(option_type, ratio):
     logger.info("Starting NTPC ratio backspread strategy execution for PUT options (8:4)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, PE Symbol: {PE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[PE_symbol_name])
-            atm_price = atm_price_data.get(PE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[PE_symbol_name])
+        atm_price = atm_price_data.get(PE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {PE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         # Step 2: Find an ITM strike with a good premium
         found_itm_strike = False
@@ -307,151 +272,145 @@ def execute_ratio_backspread(option_type, ratio):
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = PE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='PUT',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 8x ATM cost
-            atm_cost_8x = 8 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike <= strike_price:  # Skip OTM strikes for PUTS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (4 * itm_price) - atm_cost_8x
-                
-                logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='PUT',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 8x ATM cost
+        atm_cost_8x = 8 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike <= strike_price:  # Skip OTM strikes for PUTS
+                continue
                 
-            logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
-            
-            # Calculate quantities
-            atm_quantity = 8 * lot_size
-            itm_quantity = 4 * lot_size
+            itm_price = data['price']
+            net_difference = (4 * itm_price) - atm_cost_8x
             
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 8 ATM PUTs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=PE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
-            
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
-            
-            logger.info("SECOND STEP: Placing SELL order for 4 ITM PUTs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
+            logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
             
-            logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (4 * best_itm_premium) - (8 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': PE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities
+        atm_quantity = 8 * lot_size
+        itm_quantity = 4 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 8 ATM PUTs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=PE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 4 ITM PUTs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (4 * best_itm_premium) - (8 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': PE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in PUT-8 strategy execution: {str(e)}")
-        return None
+        raise
 
 
     """Execute the NTPC ratio backspread strategy with CALL options (Buy 16 ATM, Sell 8 ITM)"""
     logger.info("Starting NTPC ratio backspread strategy execution for CALL options (16:8)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, CE Symbol: {CE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[CE_symbol_name])
-            atm_price = atm_price_data.get(CE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[CE_symbol_name])
+        atm_price = atm_price_data.get(CE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {CE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -461,139 +420,135 @@ def execute_ratio_backspread(option_type, ratio):
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = CE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='CALL',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 16x ATM cost
-            atm_cost_16x = 16 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike >= strike_price:  # Skip OTM strikes for CALLS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (8 * itm_price) - atm_cost_16x
-                
-                logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 16× ATM cost: {atm_cost_16x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='CALL',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 16x ATM cost
+        atm_cost_16x = 16 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike >= strike_price:  # Skip OTM strikes for CALLS
+                continue
                 
-            logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+            itm_price = data['price']
+            net_difference = (8 * itm_price) - atm_cost_16x
             
-            # Calculate quantities
-            atm_quantity = 16 * lot_size
-            itm_quantity = 8 * lot_size
+            logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 16× ATM cost: {atm_cost_16x}, net: {net_difference:.2f}")
             
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 16 ATM CALLs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=CE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
-            
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
-            
-            logger.info("SECOND STEP: Placing SELL order for 8 ITM CALLs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (8 * best_itm_premium) - (16 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price + (net_position / 16)  # For CALLS, breakeven is above strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - CALL (Buy 16 ATM, Sell 8 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': CE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities
+        atm_quantity = 16 * lot_size
+        itm_quantity = 8 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 16 ATM CALLs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=CE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 8 ITM CALLs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (8 * best_itm_premium) - (16 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price + (net_position / 16)  # For CALLS, breakeven is above strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - CALL (Buy 16 ATM, Sell 8 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': CE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in CALL-16 strategy execution: {str(e)}")
-        return None
+        raise
 
 def close_ntpc_all_positions():
     """Close all NTPC-related positions using market orders"""
     logger.info("Starting to close all NTPC positions...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
-        # Get current month expiry details
-        ce_name, pe_name, strike = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        expiry_parts = ce_name.split()  # Format: "NTPC DD MMM STRIKE CALL"
-        current_expiry_day = expiry_parts[1]
-        current_expiry_month = expiry_parts[2]
+        # Current expiry from the expiry calendar (no broker call)
+        current_expiry = current_expiry_label(tsl, 'NTPC')
+        current_expiry_day, current_expiry_month = current_expiry.split(" ")
         
         logger.info(f"Current expiry: {current_expiry_day} {current_expiry_month}")
         
@@ -630,6 +585,7 @@ def close_ntpc_all_positions():
             }
         
         closed_positions = []
+        failed_positions = []
         positions_closed = 0
         
         # Process each active NTPC position
@@ -659,6 +615,7 @@ def close_ntpc_all_positions():
                     logger.info(f"Formatted Trading Symbol: {trading_symbol}")
                 else:
                     logger.error(f"Missing required position data for {position['tradingSymbol']}")
+                    failed_positions.append({'symbol': position['tradingSymbol'], 'error': 'missing strike or option type'})
                     continue
                 
                 # Place market order to close position
@@ -691,9 +648,12 @@ def close_ntpc_all_positions():
                             'transaction_type': transaction_type
                         })
                         positions_closed += 1
+                    else:
+                        failed_positions.append({'symbol': trading_symbol, 'error': 'no order id returned'})
                 except Exception as e:
                     logger.error(f"Error placing order: {str(e)}")
                     logger.error(f"Order details - Symbol: {trading_symbol}, Quantity: {current_qty}")
+                    failed_positions.append({'symbol': trading_symbol, 'error': str(e), 'order_ids': getattr(e, 'order_ids', [])})
                     continue
             
                 # Add a small delay between orders
@@ -701,14 +661,18 @@ def close_ntpc_all_positions():
             
             except Exception as e:
                 logger.error(f"Error closing position for {position['tradingSymbol']}: {str(e)}", exc_info=True)
+                failed_positions.append({'symbol': position['tradingSymbol'], 'error': str(e)})
                 continue
         
         logger.info(f"Successfully closed {positions_closed} NTPC positions")
+        if failed_positions:
+            logger.error(f"Could not close {len(failed_positions)} positions: {failed_positions}")
         
         return {
-            "status": "success",
-            "message": f"Closed {positions_closed} NTPC positions",
+            "status": "error" if failed_positions else "success",
+            "message": f"Closed {positions_closed} NTPC positions" + (f", {len(failed_positions)} failed" if failed_positions else ""),
             "closed_positions": closed_positions,
+            "failed_positions": failed_positions,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -725,14 +689,12 @@ def close_ntpc_half_positions():
     logger.info("Starting to close half of all NTPC positions...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
-        # Get current month expiry details
-        ce_name, pe_name, strike = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        expiry_parts = ce_name.split()  # Format: "NTPC DD MMM STRIKE CALL"
-        current_expiry_day = expiry_parts[1]
-        current_expiry_month = expiry_parts[2]
+        # Current expiry from the expiry calendar (no broker call)
+        current_expiry = current_expiry_label(tsl, 'NTPC')
+        current_expiry_day, current_expiry_month = current_expiry.split(" ")
         
         logger.info(f"Current expiry: {current_expiry_day} {current_expiry_month}")
         
@@ -769,17 +731,23 @@ def close_ntpc_half_positions():
             }
         
         closed_positions = []
+        failed_positions = []
         positions_closed = 0
         
+        # Lot size of the current expiry, the same for every position. It is
+        # looked up inside the loop, so a failed lookup fails only that position
+        lot_size = None
+        
         # Process each active NTPC position
         for _, position in active_positions.iterrows():
             try:
                 # Get current quantity
                 current_qty = abs(float(position['netQty']))
                 
-                # Get lot size
-                CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-                lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+                if lot_size is None:
+                    lot_size = contract_lot_size(
+                        tsl, f"NTPC {current_expiry} {int(float(position['drvStrikePrice']))} {position['drvOptionType']}"
+                    )
                 
                 # Calculate how many lots we have
                 current_lots = current_qty // lot_size
@@ -816,6 +784,7 @@ def close_ntpc_half_positions():
                     logger.info(f"Formatted Trading Symbol: {trading_symbol}")
                 else:
                     logger.error(f"Missing required position data for {position['tradingSymbol']}")
+                    failed_positions.append({'symbol': position['tradingSymbol'], 'error': 'missing strike or option type'})
                     continue
                 
                 # Place market order to close half position
@@ -850,9 +819,12 @@ def close_ntpc_half_positions():
                             'remaining_quantity': current_qty - half_qty
                         })
                         positions_closed += 1
+                    else:
+                        failed_positions.append({'symbol': trading_symbol, 'error': 'no order id returned'})
                 except Exception as e:
                     logger.error(f"Error placing order: {str(e)}")
                     logger.error(f"Order details - Symbol: {trading_symbol}, Quantity: {half_qty}")
+                    failed_positions.append({'symbol': trading_symbol, 'error': str(e), 'order_ids': getattr(e, 'order_ids', [])})
                     continue
             
                 # Add a small delay between orders
@@ -860,14 +832,18 @@ def close_ntpc_half_positions():
             
             except Exception as e:
                 logger.error(f"Error closing half position for {position['tradingSymbol']}: {str(e)}", exc_info=True)
+                failed_positions.append({'symbol': position['tradingSymbol'], 'error': str(e)})
                 continue
         
         logger.info(f"Successfully closed half of {positions_closed} NTPC positions")
+        if failed_positions:
+            logger.error(f"Could not close {len(failed_positions)} positions: {failed_positions}")
         
         return {
-            "status": "success",
-            "message": f"Closed half of {positions_closed} NTPC positions",
+            "status": "error" if failed_positions else "success",
+            "message": f"Closed half of {positions_closed} NTPC positions" + (f", {len(failed_positions)} failed" if failed_positions else ""),
             "closed_positions": closed_positions,
+            "failed_positions": failed_positions,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
@@ -879,7 +855,28 @@ def close_ntpc_half_positions():
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
 
-def get_batch_strike_prices(tsl, base_strike, expiry_str, option_type, num_strikes=10, strike_step=5):
+def get_batch_strike_symbols(base_strike, expiry_str, option_type, num_strikes=10, strike_step=STRIKE_STEP):
+    """
+    Build the ITM strikes and option symbols checked by get_batch_strike_prices
+    Only strikes listed in the instrument master are returned; without the
+    master they are stepped out from the ATM strike by strike_step.
+    Returns: (strikes, symbols) lists in the same order
+    """
+    listed = strike_ladder.itm_strikes('NTPC', expiry_str, option_type, base_strike, num_strikes)
+    if listed is not None:
+        return listed
+    
+    if option_type == 'CALL':
+        # For calls, check strikes below ATM
+        strikes = [base_strike - (i * strike_step) for i in range(1, num_strikes + 1)]
+    else:
+        # For puts, check strikes above ATM
+        strikes = [base_strike + (i * strike_step) for i in range(1, num_strikes + 1)]
+    
+    symbols = [f"NTPC {expiry_str} {strike} {option_type}" for strike in strikes]
+    return strikes, symbols
+
+def get_batch_strike_prices(tsl, base_strike, expiry_str, option_type, num_strikes=10, strike_step=STRIKE_STEP):
     """
     Get prices for multiple strikes in one batch
     tsl: Tradehull instance
@@ -892,26 +889,15 @@ def get_batch_strike_prices(tsl, base_strike, expiry_str, option_type, num_strik
     try:
         strike_prices = {}
         
-        # Generate strike prices to check
-        if option_type == 'CALL':
-            # For calls, check strikes below ATM
-            strikes = [base_strike - (i * strike_step) for i in range(1, num_strikes + 1)]
-        else:
-            # For puts, check strikes above ATM
-            strikes = [base_strike + (i * strike_step) for i in range(1, num_strikes + 1)]
-        
-        # Create symbols for all strikes
-        symbols = []
-        for strike in strikes:
-            symbol = f"NTPC {expiry_str} {strike} {option_type}"
-            symbols.append(symbol)
+        # Generate the ITM strikes and symbols to check
+        strikes, symbols = get_batch_strike_symbols(base_strike, expiry_str, option_type, num_strikes, strike_step)
         
         # Get prices for all symbols in one batch
-        price_data = tsl.get_ltp_data(names=symbols)
+        price_data = cached_ltp_data(tsl, names=symbols)
         
         # Process the results
         for strike, symbol in zip(strikes, symbols):
-            if symbol in price_data:
+            if price_data.get(symbol):
                 strike_prices[strike] = {
                     'symbol': symbol,
                     'price': price_data[symbol]
@@ -929,7 +915,7 @@ def get_batch_strike_prices(tsl, base_strike, expiry_str, option_type, num_strik
         
     except Exception as e:
         logger.error(f"Error in get_batch_strike_prices: {str(e)}", exc_info=True)
-        return {}
+        raise
 
 
 
@@ -955,26 +941,22 @@ def execute_ntpc_ratio_backspread_call_4():
     logger.info("Starting NTPC ratio backspread strategy execution for CALL options (4:2)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, CE Symbol: {CE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[CE_symbol_name])
-            atm_price = atm_price_data.get(CE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[CE_symbol_name])
+        atm_price = atm_price_data.get(CE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {CE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -984,125 +966,123 @@ def execute_ntpc_ratio_backspread_call_4():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = CE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='CALL',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 4x ATM cost
-            atm_cost_4x = 4 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike >= strike_price:  # Skip OTM strikes for CALLS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (2 * itm_price) - atm_cost_4x
-                
-                logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='CALL',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 4x ATM cost
+        atm_cost_4x = 4 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike >= strike_price:  # Skip OTM strikes for CALLS
+                continue
                 
-            logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+            itm_price = data['price']
+            net_difference = (2 * itm_price) - atm_cost_4x
             
-            # Calculate quantities for 4:2 ratio
-            atm_quantity = 4 * lot_size
-            itm_quantity = 2 * lot_size
-            
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 4 ATM CALLs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=CE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
+            logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
             
-            logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
-            
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
-            
-            logger.info("SECOND STEP: Placing SELL order for 2 ITM CALLs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (2 * best_itm_premium) - (4 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price + (net_position / 4)  # For CALLS, breakeven is above strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - CALL (Buy 4 ATM, Sell 2 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': CE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities for 4:2 ratio
+        atm_quantity = 4 * lot_size
+        itm_quantity = 2 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 4 ATM CALLs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=CE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 2 ITM CALLs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (2 * best_itm_premium) - (4 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price + (net_position / 4)  # For CALLS, breakeven is above strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - CALL (Buy 4 ATM, Sell 2 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': CE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in CALL-4 strategy execution: {str(e)}")
-        return None
+        raise
 
 
 
@@ -1120,25 +1100,22 @@ def execute_ntpc_ratio_backspread_put_4():
     logger.info("Starting NTPC ratio backspread strategy execution for PUT options (4:2)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, PE Symbol: {PE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[PE_symbol_name])
-            atm_price = atm_price_data.get(PE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[PE_symbol_name])
+        atm_price = atm_price_data.get(PE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {PE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Using NTPC lot size: {lot_size}")
 
         
@@ -1149,151 +1126,144 @@ def execute_ntpc_ratio_backspread_put_4():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = PE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='PUT',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 4x ATM cost
-            atm_cost_4x = 4 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike <= strike_price:  # Skip OTM strikes for PUTS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (2 * itm_price) - atm_cost_4x
-                
-                logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='PUT',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 4x ATM cost
+        atm_cost_4x = 4 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike <= strike_price:  # Skip OTM strikes for PUTS
+                continue
                 
-            logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+            itm_price = data['price']
+            net_difference = (2 * itm_price) - atm_cost_4x
             
-            # Calculate quantities
-            atm_quantity = 4 * lot_size
-            itm_quantity = 2 * lot_size
+            logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
             
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 4 ATM PUTs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=PE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
-            
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
-            
-            logger.info("SECOND STEP: Placing SELL order for 2 ITM PUTs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (2 * best_itm_premium) - (4 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price - (net_position / 4)  # For PUTS, breakeven is below strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - PUT (Buy 4 ATM, Sell 2 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': PE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities
+        atm_quantity = 4 * lot_size
+        itm_quantity = 2 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 4 ATM PUTs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=PE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 2 ITM PUTs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (2 * best_itm_premium) - (4 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price - (net_position / 4)  # For PUTS, breakeven is below strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - PUT (Buy 4 ATM, Sell 2 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': PE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in PUT-8 strategy execution: {str(e)}")
-        return None
+        raise
 
     """Execute the NTPC ratio backspread strategy with PUT options (Buy 4 ATM, Sell  ITM)"""
     logger.info("Starting NTPC ratio backspread strategy execution for PUT options (4:2)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, PE Symbol: {PE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[PE_symbol_name])
-            atm_price = atm_price_data.get(PE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[PE_symbol_name])
+        atm_price = atm_price_data.get(PE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {PE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -1303,127 +1273,125 @@ def execute_ntpc_ratio_backspread_put_4():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = PE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='PUT',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 4x ATM cost
-            atm_cost_4x = 4 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike <= strike_price:  # Skip OTM strikes for PUTS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (2 * itm_price) - atm_cost_4x
-                
-                logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='PUT',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 4x ATM cost
+        atm_cost_4x = 4 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike <= strike_price:  # Skip OTM strikes for PUTS
+                continue
                 
-            logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+            itm_price = data['price']
+            net_difference = (2 * itm_price) - atm_cost_4x
             
-            # Calculate quantities for 4:2 ratio
-            atm_quantity = 4 * lot_size
-            itm_quantity = 2 * lot_size
+            logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 4× ATM cost: {atm_cost_4x}, net: {net_difference:.2f}")
             
-            # Place BUY orders for ATM options using place_slice_order
-            try:
-                atm_orders = tsl.place_slice_order(
-                    tradingsymbol=PE_symbol_name,
-                    exchange='NFO',
-                    transaction_type='BUY',
-                    quantity=atm_quantity,
-                    order_type='MARKET',
-                    trade_type='MARGIN',
-                    price=0,
-                    trigger_price=0,
-                    after_market_order=False,
-                    validity='DAY',
-                    amo_time='OPEN'
-                )
-                logger.info(f"Placed BUY orders for ATM PUT {PE_symbol_name}, Quantity: {atm_quantity}, Order IDs: {atm_orders}")
-            except Exception as e:
-                logger.error(f"Error placing ATM BUY orders: {str(e)}")
-                return None
-            
-            # Wait for ATM orders to execute
-            time.sleep(1)
-            
-            # Place SELL orders for ITM options using place_slice_order
-            try:
-                itm_orders = tsl.place_slice_order(
-                    tradingsymbol=best_itm_symbol,
-                    exchange='NFO',
-                    transaction_type='SELL',
-                    quantity=itm_quantity,
-                    order_type='MARKET',
-                    trade_type='MARGIN',
-                    price=0,
-                    trigger_price=0,
-                    after_market_order=False,
-                    validity='DAY',
-                    amo_time='OPEN'
-                )
-                logger.info(f"Placed SELL orders for ITM PUT {best_itm_symbol}, Quantity: {itm_quantity}, Order IDs: {itm_orders}")
-            except Exception as e:
-                logger.error(f"Error placing ITM SELL orders: {str(e)}")
-                return None
-            
-            # Calculate net position
-            net_position = (2 * best_itm_premium) - (4 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price - (net_position / 4)  # For PUTS, breakeven is below strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - PUT (Buy 4 ATM, Sell 2 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': PE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orders': atm_orders if isinstance(atm_orders, list) else [atm_orders],
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orders': itm_orders if isinstance(itm_orders, list) else [itm_orders],
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first (sliced), then SELL (sliced) with delays',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities for 4:2 ratio
+        atm_quantity = 4 * lot_size
+        itm_quantity = 2 * lot_size
+        
+        # Place BUY orders for ATM options using place_slice_order
+        try:
+            atm_orders = tsl.place_slice_order(
+                tradingsymbol=PE_symbol_name,
+                exchange='NFO',
+                transaction_type='BUY',
+                quantity=atm_quantity,
+                order_type='MARKET',
+                trade_type='MARGIN',
+                price=0,
+                trigger_price=0,
+                after_market_order=False,
+                validity='DAY',
+                amo_time='OPEN'
+            )
+            logger.info(f"Placed BUY orders for ATM PUT {PE_symbol_name}, Quantity: {atm_quantity}, Order IDs: {atm_orders}")
+        except Exception as e:
+            logger.error(f"Error placing ATM BUY orders: {str(e)}")
+            return None
+        
+        # Wait for ATM orders to execute
+        time.sleep(1)
+        
+        # Place SELL orders for ITM options using place_slice_order
+        try:
+            itm_orders = tsl.place_slice_order(
+                tradingsymbol=best_itm_symbol,
+                exchange='NFO',
+                transaction_type='SELL',
+                quantity=itm_quantity,
+                order_type='MARKET',
+                trade_type='MARGIN',
+                price=0,
+                trigger_price=0,
+                after_market_order=False,
+                validity='DAY',
+                amo_time='OPEN'
+            )
+            logger.info(f"Placed SELL orders for ITM PUT {best_itm_symbol}, Quantity: {itm_quantity}, Order IDs: {itm_orders}")
+        except Exception as e:
+            logger.error(f"Error placing ITM SELL orders: {str(e)}")
+            return None
+        
+        # Calculate net position
+        net_position = (2 * best_itm_premium) - (4 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price - (net_position / 4)  # For PUTS, breakeven is below strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - PUT (Buy 4 ATM, Sell 2 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': PE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orders': atm_orders if isinstance(atm_orders, list) else [atm_orders],
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orders': itm_orders if isinstance(itm_orders, list) else [itm_orders],
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first (sliced), then SELL (sliced) with delays',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in PUT-4 strategy execution: {str(e)}")
-        return None
+        raise
 
 
 
@@ -1448,26 +1416,22 @@ def execute_ntpc_ratio_backspread_call_8():
     logger.info("Starting NTPC ratio backspread strategy execution for CALL options (8:4)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, CE Symbol: {CE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[CE_symbol_name])
-            atm_price = atm_price_data.get(CE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[CE_symbol_name])
+        atm_price = atm_price_data.get(CE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {CE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -1477,151 +1441,145 @@ def execute_ntpc_ratio_backspread_call_8():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = CE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='CALL',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 8x ATM cost
-            atm_cost_8x = 8 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike >= strike_price:  # Skip OTM strikes for CALLS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (4 * itm_price) - atm_cost_8x
-                
-                logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='CALL',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 8x ATM cost
+        atm_cost_8x = 8 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike >= strike_price:  # Skip OTM strikes for CALLS
+                continue
                 
-            logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
-            
-            # Calculate quantities
-            atm_quantity = 8 * lot_size
-            itm_quantity = 4 * lot_size
-            
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 8 ATM CALLs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=CE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
-            
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
+            itm_price = data['price']
+            net_difference = (4 * itm_price) - atm_cost_8x
             
-            logger.info("SECOND STEP: Placing SELL order for 4 ITM CALLs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
+            logger.info(f"Checking ITM CALL strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
             
-            logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (4 * best_itm_premium) - (8 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price + (net_position / 8)  # For CALLS, breakeven is above strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - CALL (Buy 8 ATM, Sell 4 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': CE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM CALL strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities
+        atm_quantity = 8 * lot_size
+        itm_quantity = 4 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 8 ATM CALLs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=CE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM CALL {CE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 4 ITM CALLs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM CALL {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (4 * best_itm_premium) - (8 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price + (net_position / 8)  # For CALLS, breakeven is above strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - CALL (Buy 8 ATM, Sell 4 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': CE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in CALL-8 strategy execution: {str(e)}")
-        return None
+        raise
 
 def execute_ntpc_ratio_backspread_put_8():
     """Execute the NTPC ratio backspread strategy with PUT options (Buy 8 ATM, Sell 4 ITM)"""
     logger.info("Starting NTPC ratio backspread strategy execution for PUT options (8:4)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, PE Symbol: {PE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[PE_symbol_name])
-            atm_price = atm_price_data.get(PE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[PE_symbol_name])
+        atm_price = atm_price_data.get(PE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {PE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -1631,150 +1589,144 @@ def execute_ntpc_ratio_backspread_put_8():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = PE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='PUT',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 8x ATM cost
-            atm_cost_8x = 8 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike <= strike_price:  # Skip OTM strikes for PUTS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (4 * itm_price) - atm_cost_8x
-                
-                logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='PUT',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 8x ATM cost
+        atm_cost_8x = 8 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike <= strike_price:  # Skip OTM strikes for PUTS
+                continue
                 
-            logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
-            
-            # Calculate quantities
-            atm_quantity = 8 * lot_size
-            itm_quantity = 4 * lot_size
-            
-            # Place orders
-            logger.info("FIRST STEP: Placing BUY orders for 8 ATM PUTs")
-            atm_order = tsl.place_slice_order(
-                tradingsymbol=PE_symbol_name,
-                exchange='NFO', 
-                quantity=atm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='BUY', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
+            itm_price = data['price']
+            net_difference = (4 * itm_price) - atm_cost_8x
             
-            # Pause for 0.5 second
-            logger.info("Pausing for 0.5 second...")
-            time.sleep(0.5)
+            logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
             
-            logger.info("SECOND STEP: Placing SELL order for 4 ITM PUTs")
-            itm_order = tsl.place_slice_order(
-                tradingsymbol=best_itm_symbol,
-                exchange='NFO', 
-                quantity=itm_quantity,
-                price=0,  # Market order
-                trigger_price=0, 
-                order_type='MARKET', 
-                transaction_type='SELL', 
-                trade_type='MARGIN',
-                disclosed_quantity=0,
-                after_market_order=False,
-                validity='DAY',
-                amo_time='OPEN'
-            )
-            
-            logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
-            
-            # Calculate net position
-            net_position = (4 * best_itm_premium) - (8 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': PE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orderid': atm_order,
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orderid': itm_order,
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantities
+        atm_quantity = 8 * lot_size
+        itm_quantity = 4 * lot_size
+        
+        # Place orders
+        logger.info("FIRST STEP: Placing BUY orders for 8 ATM PUTs")
+        atm_order = tsl.place_slice_order(
+            tradingsymbol=PE_symbol_name,
+            exchange='NFO', 
+            quantity=atm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='BUY', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"BUY order placed for ATM PUT {PE_symbol_name}, Order ID: {atm_order}")
+        
+        # Pause for 0.5 second
+        logger.info("Pausing for 0.5 second...")
+        time.sleep(0.5)
+        
+        logger.info("SECOND STEP: Placing SELL order for 4 ITM PUTs")
+        itm_order = tsl.place_slice_order(
+            tradingsymbol=best_itm_symbol,
+            exchange='NFO', 
+            quantity=itm_quantity,
+            price=0,  # Market order
+            trigger_price=0, 
+            order_type='MARKET', 
+            transaction_type='SELL', 
+            trade_type='MARGIN',
+            disclosed_quantity=0,
+            after_market_order=False,
+            validity='DAY',
+            amo_time='OPEN'
+        )
+        
+        logger.info(f"SELL order placed for ITM PUT {best_itm_symbol}, Order ID: {itm_order}")
+        
+        # Calculate net position
+        net_position = (4 * best_itm_premium) - (8 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': PE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orderid': atm_order,
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orderid': itm_order,
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first, then SELL (with 0.5-second pause)',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in PUT-8 strategy execution: {str(e)}")
-        return None
+        raise
 
     """Execute the NTPC ratio backspread strategy with PUT options (Buy 8 ATM, Sell 4 ITM)"""
     logger.info("Starting NTPC ratio backspread strategy execution for PUT options (8:4)...")
     
     try:
-        # Initialize Tradehull
-        tsl = Tradehull(client_code, token_id)
+        # Get the shared broker client
+        tsl = get_client()
         
         # Step 1: Get the ATM strike for NTPC
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
+        CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, 'NTPC')
         logger.info(f"ATM Strike identified: {strike_price}, PE Symbol: {PE_symbol_name}")
         
-        # Get ATM option price
-        try:
-            atm_price_data = tsl.get_ltp_data(names=[PE_symbol_name])
-            atm_price = atm_price_data.get(PE_symbol_name, 0)
-            logger.info(f"ATM option price: {atm_price}")
-        except Exception as e:
-            logger.error(f"Error getting ATM price: {str(e)}")
-            logger.info("Continuing with default strategy...")
-            atm_price = None
+        # Get ATM option price; the trade is never sized on a missing quote
+        atm_price_data = cached_ltp_data(tsl, names=[PE_symbol_name])
+        atm_price = atm_price_data.get(PE_symbol_name)
+        if not atm_price:
+            raise Exception(f"No ATM option price for {PE_symbol_name}")
+        logger.info(f"ATM option price: {atm_price}")
         
-        # Use constant lot size
-        CE_symbol_name, PE_symbol_name, strike_price = tsl.ATM_Strike_Selection(Underlying='NTPC', Expiry=0)
-        lot_size = tsl.get_lot_size(tradingsymbol=CE_symbol_name)
+        # Lot size of the ATM contract priced above
+        lot_size = contract_lot_size(tsl, CE_symbol_name)
         logger.info(f"Lot size: {lot_size}")
         
         # Step 2: Find an ITM strike with a good premium
@@ -1784,127 +1736,125 @@ def execute_ntpc_ratio_backspread_put_8():
         best_itm_premium = 0
         smallest_net_difference = float('inf')
         
-        # Extract expiry date from the ATM symbol
-        expiry_components = PE_symbol_name.split(" ")
-        if len(expiry_components) >= 3:
-            expiry_str = " ".join(expiry_components[1:3])
-            
-            # Get all ITM strike prices in one batch
-            strike_prices = get_batch_strike_prices(
-                tsl=tsl,
-                base_strike=strike_price,
-                expiry_str=expiry_str,
-                option_type='PUT',
-                num_strikes=10,  # Check 10 strikes
-                strike_step=5   # 10 point steps
-            )
-            
-            # Calculate 8x ATM cost
-            atm_cost_8x = 8 * atm_price
-            
-            # Check each ITM strike
-            for strike, data in strike_prices.items():
-                if strike <= strike_price:  # Skip OTM strikes for PUTS
-                    continue
-                    
-                itm_price = data['price']
-                net_difference = (4 * itm_price) - atm_cost_8x
-                
-                logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
-                
-                # Update best strike if this one is better (closer to zero)
-                if abs(net_difference) < abs(smallest_net_difference):
-                    smallest_net_difference = net_difference
-                    best_itm_strike = strike
-                    best_itm_symbol = data['symbol']
-                    best_itm_premium = itm_price
-                    found_itm_strike = True
-            
-            if not found_itm_strike:
-                logger.error("No suitable ITM strike found")
-                return None
+        # Current expiry from the expiry calendar, the same one the exits use
+        expiry_str = current_expiry_label(tsl, 'NTPC')
+        
+        # Get all ITM strike prices in one batch
+        strike_prices = get_batch_strike_prices(
+            tsl=tsl,
+            base_strike=strike_price,
+            expiry_str=expiry_str,
+            option_type='PUT',
+            num_strikes=10,  # Check 10 strikes
+            strike_step=STRIKE_STEP
+        )
+        
+        # Calculate 8x ATM cost
+        atm_cost_8x = 8 * atm_price
+        
+        # Check each ITM strike
+        for strike, data in strike_prices.items():
+            if strike <= strike_price:  # Skip OTM strikes for PUTS
+                continue
                 
-            logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+            itm_price = data['price']
+            net_difference = (4 * itm_price) - atm_cost_8x
             
-            # Calculate quantitie
-            atm_quantity = 8 * lot_size
-            itm_quantity = 4 * lot_size
+            logger.info(f"Checking ITM PUT strike {strike}, price: {itm_price}, vs 8× ATM cost: {atm_cost_8x}, net: {net_difference:.2f}")
             
-            # Place BUY orders for ATM options using place_slice_order
-            try:
-                atm_orders = tsl.place_slice_order(
-                    tradingsymbol=PE_symbol_name,
-                    exchange='NFO',
-                    transaction_type='BUY',
-                    quantity=atm_quantity,
-                    order_type='MARKET',
-                    trade_type='MARGIN',
-                    price=0,
-                    trigger_price=0,
-                    after_market_order=False,
-                    validity='DAY',
-                    amo_time='OPEN'
-                )
-                logger.info(f"Placed BUY orders for ATM PUT {PE_symbol_name}, Quantity: {atm_quantity}, Order IDs: {atm_orders}")
-            except Exception as e:
-                logger.error(f"Error placing ATM BUY orders: {str(e)}")
-                return None
-            
-            # Wait for ATM orders to execute
-            time.sleep(1)
-            
-            # Place SELL orders for ITM options using place_slice_order
-            try:
-                itm_orders = tsl.place_slice_order(
-                    tradingsymbol=best_itm_symbol,
-                    exchange='NFO',
-                    transaction_type='SELL',
-                    quantity=itm_quantity,
-                    order_type='MARKET',
-                    trade_type='MARGIN',
-                    price=0,
-                    trigger_price=0,
-                    after_market_order=False,
-                    validity='DAY',
-                    amo_time='OPEN'
-                )
-                logger.info(f"Placed SELL orders for ITM PUT {best_itm_symbol}, Quantity: {itm_quantity}, Order IDs: {itm_orders}")
-            except Exception as e:
-                logger.error(f"Error placing ITM SELL orders: {str(e)}")
-                return None
-            
-            # Calculate net position
-            net_position = (4 * best_itm_premium) - (8 * atm_price)
-            
-            # Calculate risk profile
-            max_risk = net_position * lot_size
-            breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+            # Update best strike if this one is better (closer to zero)
+            if abs(net_difference) < abs(smallest_net_difference):
+                smallest_net_difference = net_difference
+                best_itm_strike = strike
+                best_itm_symbol = data['symbol']
+                best_itm_premium = itm_price
+                found_itm_strike = True
+        
+        if not found_itm_strike:
+            logger.error("No suitable ITM strike found")
+            return None
             
-            return {
-                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
-                'atm_strike': strike_price,
-                'atm_symbol': PE_symbol_name,
-                'atm_price': atm_price,
-                'atm_buy_orders': atm_orders if isinstance(atm_orders, list) else [atm_orders],
-                'atm_quantity': atm_quantity,
-                'itm_strike': best_itm_strike,
-                'itm_symbol': best_itm_symbol,
-                'itm_price': best_itm_premium,
-                'itm_sell_orders': itm_orders if isinstance(itm_orders, list) else [itm_orders],
-                'itm_quantity': itm_quantity,
-                'net_position': net_position,
-                'order_sequence': 'BUY first (sliced), then SELL (sliced) with delays',
-                'risk_profile': {
-                    'max_risk': max_risk,
-                    'unlimited_profit': True,
-                    'breakeven_point': breakeven_point
-                }
+        logger.info(f"Selected ITM PUT strike to sell: {best_itm_strike}, Symbol: {best_itm_symbol}")
+        
+        # Calculate quantitie
+        atm_quantity = 8 * lot_size
+        itm_quantity = 4 * lot_size
+        
+        # Place BUY orders for ATM options using place_slice_order
+        try:
+            atm_orders = tsl.place_slice_order(
+                tradingsymbol=PE_symbol_name,
+                exchange='NFO',
+                transaction_type='BUY',
+                quantity=atm_quantity,
+                order_type='MARKET',
+                trade_type='MARGIN',
+                price=0,
+                trigger_price=0,
+                after_market_order=False,
+                validity='DAY',
+                amo_time='OPEN'
+            )
+            logger.info(f"Placed BUY orders for ATM PUT {PE_symbol_name}, Quantity: {atm_quantity}, Order IDs: {atm_orders}")
+        except Exception as e:
+            logger.error(f"Error placing ATM BUY orders: {str(e)}")
+            return None
+        
+        # Wait for ATM orders to execute
+        time.sleep(1)
+        
+        # Place SELL orders for ITM options using place_slice_order
+        try:
+            itm_orders = tsl.place_slice_order(
+                tradingsymbol=best_itm_symbol,
+                exchange='NFO',
+                transaction_type='SELL',
+                quantity=itm_quantity,
+                order_type='MARKET',
+                trade_type='MARGIN',
+                price=0,
+                trigger_price=0,
+                after_market_order=False,
+                validity='DAY',
+                amo_time='OPEN'
+            )
+            logger.info(f"Placed SELL orders for ITM PUT {best_itm_symbol}, Quantity: {itm_quantity}, Order IDs: {itm_orders}")
+        except Exception as e:
+            logger.error(f"Error placing ITM SELL orders: {str(e)}")
+            return None
+        
+        # Calculate net position
+        net_position = (4 * best_itm_premium) - (8 * atm_price)
+        
+        # Calculate risk profile
+        max_risk = net_position * lot_size
+        breakeven_point = strike_price - (net_position / 8)  # For PUTS, breakeven is below strike
+        
+        return {
+            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'strategy_type': 'Ratio Backspread - PUT (Buy 8 ATM, Sell 4 ITM)',
+            'atm_strike': strike_price,
+            'atm_symbol': PE_symbol_name,
+            'atm_price': atm_price,
+            'atm_buy_orders': atm_orders if isinstance(atm_orders, list) else [atm_orders],
+            'atm_quantity': atm_quantity,
+            'itm_strike': best_itm_strike,
+            'itm_symbol': best_itm_symbol,
+            'itm_price': best_itm_premium,
+            'itm_sell_orders': itm_orders if isinstance(itm_orders, list) else [itm_orders],
+            'itm_quantity': itm_quantity,
+            'net_position': net_position,
+            'order_sequence': 'BUY first (sliced), then SELL (sliced) with delays',
+            'risk_profile': {
+                'max_risk': max_risk,
+                'unlimited_profit': True,
+                'breakeven_point': breakeven_point
             }
-            
+        }
+        
     except Exception as e:
         logger.error(f"Error in NTPC-PUT-8 strategy execution: {str(e)}")
-        return None
+        raise
 
 # For testing the strategy independently
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+import instrument_index
+import instrument_master
+import instrument_state
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _number(strike):
+    """Strike as the strategies write it: 800 rather than 800.0"""
+    strike = float(strike)
+    return int(strike) if strike.is_integer() else strike
+
+
+class StrikeLadder:
+    """
+    Listed strikes of one (underlying, expiry, option type), sorted, with
+    the matching Tradehull symbols and security ids, and the Dhan exchange
+    segment they trade on (None if unknown)
+    """
+
+    def __init__(self, strikes, symbols, security_ids, segment=None):
+        order = np.argsort(strikes, kind='stable')
+        self.strikes = np.asarray(strikes, dtype=np.float64)[order]
+        self.symbols = np.asarray(symbols, dtype=object)[order]
+        self.security_ids = np.asarray(security_ids, dtype=object)[order]
+        self.segment = segment
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def nearest(self, price):
+        """Listed strike closest to price (the ATM strike for the spot price)"""
+        index = int(np.searchsorted(self.strikes, price))
+        candidates = [i for i in (index - 1, index) if 0 <= i < len(self.strikes)]
+        if not candidates:
+            return None
+        return _number(self.strikes[min(candidates, key=lambda i: abs(self.strikes[i] - price))])
+
+    def _position(self, strike):
+        """Index of the contract listed at exactly this strike, or None"""
+        index = int(np.searchsorted(self.strikes, strike))
+        if index < len(self.strikes) and self.strikes[index] == strike:
+            return index
+        return None
+
+    def symbol(self, strike):
+        """Symbol of the contract listed at exactly this strike, or None"""
+        index = self._position(strike)
+        return self.symbols[index] if index is not None else None
+
+    def security_id(self, strike):
+        """Security id of the contract listed at exactly this strike, or None"""
+        index = self._position(strike)
+        return self.security_ids[index] if index is not None else None
+
+    def itm(self, option_type, base_strike, count):
+        """
+        The `count` listed strikes nearest to base_strike on the in-the-money
+        side (below it for calls, above it for puts), nearest first
+        Returns: (strikes, symbols) lists in the same order
+        """
+        if option_type == 'CALL':
+            end = int(np.searchsorted(self.strikes, base_strike, side='left'))
+            selected = range(end - 1, max(end - count, 0) - 1, -1)
+        else:
+            start = int(np.searchsorted(self.strikes, base_strike, side='right'))
+            selected = range(start, min(start + count, len(self.strikes)))
+        return [_number(self.strikes[i]) for i in selected], [self.symbols[i] for i in selected]
+
+
+# The ladders, (underlying, expiry date, 'CALL' / 'PUT') -> StrikeLadder,
+# live in the instrument snapshot (instrument_state)
+stats = {"build_ms": None, "hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, amount=1):
+    # Lookups run on many lane threads at once
+    with _stats_lock:
+        stats[name] += amount
+
+
+def build_ladders(df):
+    """
+    A ladder for every (underlying, expiry, option type) in the master
+    Returns: (ladders dict, number of option contracts)
+    """
+    options = instrument_master.option_contracts(df)
+    sides = options['SEM_CUSTOM_SYMBOL'].astype(str).str.rsplit(' ', n=1).str[-1]
+    options = options.assign(side=sides)[sides.isin(('CALL', 'PUT'))]
+    ladders = {}
+    segments = (options['SEM_EXM_EXCH_ID'].astype(str) + '_' + options['SEM_SEGMENT'].astype(str)).map(
+        instrument_index.SEGMENTS)
+    options = options.assign(dhan_segment=segments)
+    for key, group in options.groupby(['underlying', 'expiry_date', 'side'], sort=False):
+        # A ladder listed on more than one segment leaves the lookup to the instrument index
+        listed = group['dhan_segment'].dropna().unique()
+        ladders[key] = StrikeLadder(group['SEM_STRIKE_PRICE'].to_numpy(dtype=np.float64),
+                                    group['SEM_CUSTOM_SYMBOL'].to_numpy(dtype=object),
+                                    group['SEM_SMST_SECURITY_ID'].astype(str).to_numpy(dtype=object),
+                                    listed[0] if len(listed) == 1 else None)
+    return ladders, len(options)
+
+
+def install(ladders, build_ms=None):
+    """Swap the whole table in at once; readers see the old or the new one"""
+    instrument_state.replace(ladders=ladders)
+    with _stats_lock:
+        stats["build_ms"] = build_ms
+
+
+def build(df=None):
+    """
+    Build a ladder for every (underlying, expiry, option type) in the master
+    Returns: number of ladders
+    """
+    df = instrument_master.load() if df is None else df
+    if df is None:
+        return 0
+
+    started = time.perf_counter()
+    ladders, contracts = build_ladders(df)
+    install(ladders, round((time.perf_counter() - started) * 1000, 3))
+    logger.info(f"Built {len(ladders)} strike ladders over {contracts} option contracts "
+                f"in {stats['build_ms']:.0f} ms")
+    return len(ladders)
+
+
+def _key(underlying, expiry, option_type):
+    """Ladder key; expiry is a date or a yearless label such as '29 MAY'"""
+    if isinstance(expiry, str):
+        expiry = instrument_master.label_date(expiry)
+    return underlying, expiry, option_type
+
+
+def get(underlying, expiry, option_type, state=None):
+    """Ladder of a contract, from `state` if given (to read several from one snapshot), or None"""
+    state = state or instrument_state.current()
+    return state.ladders.get(_key(underlying, expiry, option_type))
+
+
+def security_id(symbol):
+    """
+    (exchange segment, security id) of an option's Tradehull symbol such as
+    'SBIN 29 MAY 800 CALL', read from its ladder; None if the master has no
+    ladder listing it
+    """
+    parts = symbol.split(" ")
+    if len(parts) != 5:
+        return None
+    try:
+        strike = float(parts[3])
+    except ValueError:
+        return None
+    ladder = get(parts[0], " ".join(parts[1:3]), parts[4])
+    if ladder is None or ladder.segment is None:
+        return None
+    if ladder.symbol(strike) != symbol:
+        return None
+    return ladder.segment, ladder.security_id(strike)
+
+
+def itm_strikes(underlying, expiry, option_type, base_strike, count):
+    """
+    (strikes, symbols) of the `count` listed ITM strikes nearest to
+    base_strike, or None when the master has no ladder for the contract
+    """
+    ladder = get(underlying, expiry, option_type)
+    if ladder is None:
+        _count("misses")
+        return None
+    _count("hits")
+    return ladder.itm(option_type, base_strike, count)
+
+
+def metrics():
+    ladders = instrument_state.current().ladders
+    with _stats_lock:
+        counts = dict(stats)
+    return {"ladders": len(ladders), "contracts": sum(len(ladder) for ladder in ladders.values()), **counts}
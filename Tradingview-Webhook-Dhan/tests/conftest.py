@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+# The service modules live at the top of the project, next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read at import time. Tests that import the webhook service run
+# it against the simulated broker, without background refreshes or snapshots.
+os.environ.setdefault('WEBHOOK_BROKER_ADAPTER', 'simulated')
+os.environ.setdefault('WEBHOOK_SIM_QUOTES_LATENCY_MS', '0,0')
+os.environ.setdefault('WEBHOOK_SIM_ORDERS_LATENCY_MS', '0,0')
+os.environ.setdefault('WEBHOOK_SIM_PORTFOLIO_LATENCY_MS', '0,0')
+os.environ.setdefault('WEBHOOK_RATE_QUOTES_PER_SECOND', '1000')
+os.environ.setdefault('WEBHOOK_RATE_QUOTES_BURST', '1000')
+os.environ.setdefault('WEBHOOK_INSTRUMENT_REFRESH_SECONDS', '0')
+os.environ.setdefault('WEBHOOK_INSTRUMENT_SNAPSHOT_DIR', '')
+
+import contract_cache
+import expiry_calendar
+import instrument_state
+import jobs
+import strike_ladder
+
+MASTER_HEADER = ('SEM_EXM_EXCH_ID,SEM_SEGMENT,SEM_SMST_SECURITY_ID,SEM_INSTRUMENT_NAME,SEM_TRADING_SYMBOL,'
+                 'SEM_LOT_UNITS,SEM_CUSTOM_SYMBOL,SEM_EXPIRY_DATE,SEM_STRIKE_PRICE,SEM_OPTION_TYPE,SEM_TICK_SIZE')
+
+
+@pytest.fixture(autouse=True)
+def job_context():
+    """Broker calls made by a test run outside any job, whatever an earlier test left behind"""
+    yield
+    jobs.set_current_priority(None)
+    jobs.set_current_lane(None)
+    jobs.set_order_sent(False)
+
+
+@pytest.fixture
+def isolated_master(monkeypatch):
+    """Start from an empty instrument master and every structure built from it; restored afterwards"""
+    monkeypatch.setattr(instrument_state, '_current', instrument_state.EMPTY)
+    monkeypatch.setattr(contract_cache, '_learned', {})
+    monkeypatch.setattr(expiry_calendar, '_today', {"date": None, "calendar": None, "expiries": {}})
+    monkeypatch.setattr(strike_ladder, 'stats', dict(strike_ladder.stats))
+
+
+@pytest.fixture
+def write_master(tmp_path):
+    """
+    write_master(contracts, name) writes a master CSV of option contracts
+    given as (underlying, expiry date, strike) and returns its path; every
+    contract is listed as a CALL and a PUT
+    """
+    def write(contracts, name='all_instrument.csv'):
+        lines = [MASTER_HEADER]
+        for index, (underlying, expiry, strike) in enumerate(contracts):
+            label = expiry.strftime('%d %b').upper()
+            for offset, (side, code) in enumerate((('CALL', 'CE'), ('PUT', 'PE'))):
+                lines.append(f"NSE,D,{1000 + 2 * index + offset},OPTSTK,{underlying}-{expiry}-{strike}-{code},750,"
+                             f"{underlying} {label} {strike} {side},{expiry} 14:30:00,{strike}.0,{code},0.05")
+        path = tmp_path / name
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return str(path)
+
+    return write
@@ -0,0 +1,86 @@
+import pytest
+
+from broker_adapters import BrokerHTTPError, PartialOrderError
+from broker_clients import ClientProvider, is_auth_error
+from resilience import CircuitBreaker
+import resilience
+
+
+class FakeAdapter:
+    """Broker adapter whose calls fail with `error` while the token is stale"""
+
+    name = 'fake'
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = []
+
+    def get_balance(self):
+        return 100000
+
+    def transport_metrics(self):
+        return None
+
+    def get_ltp_data(self, names):
+        self.calls.append('get_ltp_data')
+        if self.error:
+            raise self.error
+        return {name: 800.0 for name in names}
+
+    def place_slice_order(self, **kwargs):
+        self.calls.append('place_slice_order')
+        if self.error:
+            raise self.error
+        return ['1']
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Provider whose first client fails with the given error and whose rebuilt clients work"""
+    for name in resilience.breakers:
+        monkeypatch.setitem(resilience.breakers, name, CircuitBreaker(name, threshold=5, cooldown=60))
+    built = []
+
+    def make(error):
+        def factory():
+            built.append(FakeAdapter(error if not built else None))
+            return built[-1]
+        return ClientProvider(factory).get(), built
+
+    return make
+
+
+def test_only_dhan_auth_failures_are_auth_errors():
+    assert is_auth_error(BrokerHTTPError('GET', '/positions', 401, None))
+    assert is_auth_error(Exception("DH-901: Client ID or user generated access token is invalid or expired"))
+    assert is_auth_error({'status': 'failure', 'remarks': {'error_code': 'DH-901'}, 'data': ''})
+    partial = PartialOrderError('SBIN 29 OCT 800 CALL', ['7'], BrokerHTTPError('POST', '/orders', 401, None))
+    assert is_auth_error(partial)
+
+
+def test_numbers_containing_401_are_not_auth_errors():
+    assert not is_auth_error(BrokerHTTPError('POST', '/orders', 500, {'errorMessage': 'quantity 1401 rejected'}))
+    assert not is_auth_error(Exception("Order 4010023 failed: unauthorized segment"))
+    assert not is_auth_error({'status': 'failure', 'remarks': 'order 401 rejected', 'data': ''})
+
+
+def test_reads_are_retried_on_a_rebuilt_client(clients):
+    client, built = clients(BrokerHTTPError('POST', '/marketfeed/ltp', 401, None))
+    assert client.get_ltp_data(names=['SBIN']) == {'SBIN': 800.0}
+    assert len(built) == 2 and built[1].calls == ['get_ltp_data']
+
+
+def test_orders_are_never_resent(clients):
+    client, built = clients(BrokerHTTPError('POST', '/orders', 401, None))
+    with pytest.raises(BrokerHTTPError):
+        client.place_slice_order(tradingsymbol='SBIN 29 OCT 800 CALL', quantity=750)
+    # The client is rebuilt for the next call, but the order went out once
+    assert len(built) == 2
+    assert built[0].calls == ['place_slice_order'] and built[1].calls == []
+
+
+def test_server_error_mentioning_401_keeps_the_client(clients):
+    client, built = clients(BrokerHTTPError('POST', '/orders', 500, {'errorMessage': 'quantity 1401'}))
+    with pytest.raises(BrokerHTTPError):
+        client.place_slice_order(tradingsymbol='SBIN 29 OCT 800 CALL', quantity=1401)
+    assert len(built) == 1
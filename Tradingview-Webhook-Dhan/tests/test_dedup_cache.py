@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from dedup_cache import DedupCache, dedup_key
+
+
+class Submitter:
+    """Counts submits and hands out numbered stand-in jobs"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return f"job-{self.calls}"
+
+
+def test_key_prefers_alert_id():
+    assert dedup_key(b'SBIN-EXIT-FULL', 'alert-1') == 'id:alert-1'
+    assert dedup_key(b'SBIN-EXIT-FULL') == dedup_key('SBIN-EXIT-FULL')
+    assert dedup_key(b'SBIN-EXIT-FULL') != dedup_key(b'SBIN-EXIT-HALF')
+
+
+def test_repeat_within_ttl_returns_original_job():
+    cache = DedupCache(ttl_seconds=60)
+    submit = Submitter()
+    assert cache.get_or_submit('a', submit) == ('job-1', False)
+    assert cache.get_or_submit('a', submit) == ('job-1', True)
+    assert cache.get_or_submit('b', submit) == ('job-2', False)
+    assert submit.calls == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = DedupCache(ttl_seconds=0.05)
+    submit = Submitter()
+    cache.get_or_submit('a', submit)
+    time.sleep(0.1)
+    assert cache.get_or_submit('a', submit) == ('job-2', False)
+    assert cache.stats()["size"] == 1
+
+
+def test_size_bound_evicts_oldest():
+    cache = DedupCache(ttl_seconds=60, max_entries=2)
+    submit = Submitter()
+    for key in ('a', 'b', 'c'):
+        cache.get_or_submit(key, submit)
+    assert cache.stats()["size"] == 2
+    assert cache.get_or_submit('c', submit) == ('job-3', True)
+    assert cache.get_or_submit('a', submit) == ('job-4', False)
+
+
+def test_failed_submit_is_not_cached():
+    cache = DedupCache(ttl_seconds=60)
+
+    def reject():
+        raise RuntimeError("queue full")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_submit('a', reject)
+    assert cache.get_or_submit('a', Submitter()) == ('job-1', False)
+
+
+def test_discard_only_removes_the_entry_of_that_job():
+    cache = DedupCache(ttl_seconds=60)
+    submit = Submitter()
+    job, _ = cache.get_or_submit('a', submit)
+    assert not cache.discard('a', 'job-other')
+    assert cache.discard('a', job)
+    assert not cache.discard('a')
+    assert cache.get_or_submit('a', submit) == ('job-2', False)
@@ -0,0 +1,88 @@
+import datetime
+import os
+
+import pytest
+
+import contract_cache
+import expiry_calendar
+import instrument_index
+import instrument_master
+import instrument_refresh
+import instrument_state
+import strike_ladder
+
+
+@pytest.fixture
+def expiry():
+    return datetime.date.today() + datetime.timedelta(days=5)
+
+
+def test_refresh_swaps_in_everything_built_from_the_new_master(isolated_master, write_master, expiry):
+    label = expiry.strftime('%d %b').upper()
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800)], 'old.csv'))
+    assert strike_ladder.get('SBIN', expiry, 'CALL').nearest(900) == 800
+
+    report = instrument_refresh.refresh(write_master([('SBIN', expiry, 800), ('SBIN', expiry, 810),
+                                                      ('HAL', expiry, 4000)], 'new.csv'))
+    assert report["instruments"] == 6 and report["added"] == 4 and report["removed"] == 0
+    assert sorted(report["added_sample"]) == sorted([f"SBIN {label} 810 CALL", f"SBIN {label} 810 PUT",
+                                                     f"HAL {label} 4000 CALL", f"HAL {label} 4000 PUT"])
+    assert strike_ladder.get('SBIN', expiry, 'CALL').nearest(900) == 810
+    assert contract_cache.get('HAL', expiry).lot_size == 750
+    assert expiry_calendar.current_expiry('HAL') == label
+    assert instrument_index.by_custom_symbol(f"HAL {label} 4000 PUT") is not None
+    assert instrument_master.info()["path"].endswith('new.csv')
+
+
+def test_failed_refresh_keeps_the_previous_master(isolated_master, write_master, expiry, tmp_path):
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800)]))
+    before = instrument_state.current()
+    broken = tmp_path / 'broken.csv'
+    broken.write_text('not,a\nmaster,file\n', encoding='utf-8')
+    with pytest.raises(Exception):
+        instrument_refresh.refresh(str(broken))
+    assert instrument_state.current() is before
+
+
+def test_check_refreshes_only_when_the_file_changed(isolated_master, write_master, expiry, monkeypatch):
+    path = write_master([('SBIN', expiry, 800)])
+    monkeypatch.setattr(instrument_master, 'latest_path', lambda: path)
+    assert instrument_refresh.check() is not None
+    assert instrument_refresh.check() is None
+    write_master([('SBIN', expiry, 800), ('SBIN', expiry, 810)])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert instrument_refresh.check()["added"] == 2
+
+
+def test_refresh_publishes_one_snapshot_and_old_readers_keep_theirs(isolated_master, write_master, expiry):
+    label = expiry.strftime('%d %b').upper()
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800)], 'old.csv'))
+    old = instrument_state.current()
+
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800), ('HAL', expiry, 4000)], 'new.csv'))
+    new = instrument_state.current()
+    assert new is not old
+    assert ('HAL', expiry) in new.contracts and 'HAL' in new.calendar
+    assert new.index.by_custom_symbol.get(f"HAL {label} 4000 CALL") is not None
+    assert strike_ladder.get('HAL', expiry, 'CALL', new) is not None
+    # A lookup that took the previous snapshot reads the previous master whole
+    assert ('HAL', expiry) not in old.contracts and 'HAL' not in old.calendar
+    assert old.index.by_custom_symbol.get(f"HAL {label} 4000 CALL") is None
+    assert strike_ladder.get('HAL', expiry, 'CALL', old) is None
+
+
+def test_lot_sizes_learned_from_the_broker_survive_a_refresh(isolated_master, write_master, expiry):
+    class Broker:
+        calls = 0
+
+        def get_lot_size(self, tradingsymbol):
+            Broker.calls += 1
+            return 125
+
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800)], 'old.csv'))
+    symbol = f"HAL {expiry.strftime('%d %b').upper()} 4000 CALL"
+    assert contract_cache.contract_lot_size(Broker(), symbol) == 125
+    instrument_refresh.refresh(write_master([('SBIN', expiry, 800), ('SBIN', expiry, 810)], 'new.csv'))
+    assert contract_cache.contract_lot_size(Broker(), symbol) == 125
+    assert Broker.calls == 1
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from jobs import Job, JobStore, Lane, LaneExecutor, QueueFull
+from signal_router import parse_signal
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make(**kwargs):
+        executor = LaneExecutor(store=JobStore(), **kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make
+    for executor in executors:
+        executor.shutdown()
+
+
+def occupy(executor, underlying='GATE'):
+    """Keep a worker busy until the returned event is set"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    executor.submit(parse_signal(f'{underlying}-ENTRY-CALL-4'), hold)
+    assert started.wait(5)
+    return release
+
+
+def test_same_underlying_runs_in_arrival_order(make_executor):
+    executor = make_executor(workers=4)
+    order = []
+
+    def record(index):
+        def run():
+            time.sleep(0.001)
+            order.append(index)
+        return run
+
+    jobs = [executor.submit(parse_signal('SBIN-ENTRY-CALL-4'), record(index)) for index in range(20)]
+    for job in jobs:
+        assert job.wait(5)
+    assert order == list(range(20))
+    assert all(job.status == 'completed' for job in jobs)
+
+
+def test_underlyings_run_concurrently(make_executor):
+    executor = make_executor(workers=2)
+    # Each job only finishes once the other underlying's job is running too
+    barrier = threading.Barrier(2, timeout=5)
+    jobs = [executor.submit(parse_signal(f'{underlying}-ENTRY-CALL-4'), barrier.wait)
+            for underlying in ('SBIN', 'HAL')]
+    for job in jobs:
+        assert job.wait(5)
+    assert [job.status for job in jobs] == ['completed', 'completed']
+
+
+def test_failed_job_does_not_block_its_lane(make_executor):
+    executor = make_executor(workers=1)
+
+    def fail():
+        raise ValueError("broker said no")
+
+    failed = executor.submit(parse_signal('SBIN-ENTRY-CALL-4'), fail)
+    after = executor.submit(parse_signal('SBIN-EXIT-FULL'), lambda: 'closed')
+    assert after.wait(5)
+    assert failed.status == 'failed' and failed.error == "broker said no"
+    assert after.result == 'closed'
+
+
+def test_exits_preempt_queued_entries(make_executor):
+    executor = make_executor(workers=1, aging_seconds=0)
+    release = occupy(executor)
+    order = []
+    jobs = [executor.submit(parse_signal(message), lambda message=message: order.append(message))
+            for message in ('SBIN-ENTRY-CALL-4', 'HAL-EXIT-HALF', 'BEL-EXIT-FULL')]
+    release.set()
+    for job in jobs:
+        assert job.wait(5)
+    assert order == ['BEL-EXIT-FULL', 'HAL-EXIT-HALF', 'SBIN-ENTRY-CALL-4']
+
+
+def test_lane_inherits_most_urgent_queued_class():
+    lane = Lane('SBIN')
+    lane.append(Job(parse_signal('SBIN-ENTRY-CALL-4'), None))
+    assert lane.effective_priority(time.time(), 0) == 2
+    lane.append(Job(parse_signal('SBIN-EXIT-FULL'), None))
+    assert lane.effective_priority(time.time(), 0) == 0
+
+
+def test_waiting_lane_is_promoted_one_class_per_aging_period():
+    lane = Lane('SBIN')
+    lane.append(Job(parse_signal('SBIN-ENTRY-CALL-4'), None))
+    submitted = lane.queue[0].submitted_at
+    assert lane.effective_priority(submitted + 4.9, 5) == 2
+    assert lane.effective_priority(submitted + 5.1, 5) == 1
+    assert lane.effective_priority(submitted + 60, 5) == 0
+
+
+def test_aged_entry_runs_before_newer_exit(make_executor):
+    executor = make_executor(workers=1, aging_seconds=0.05)
+    release = occupy(executor)
+    order = []
+    entry = executor.submit(parse_signal('SBIN-ENTRY-CALL-4'), lambda: order.append('entry'))
+    time.sleep(0.15)
+    exit_job = executor.submit(parse_signal('HAL-EXIT-FULL'), lambda: order.append('exit'))
+    release.set()
+    assert entry.wait(5) and exit_job.wait(5)
+    assert order == ['entry', 'exit']
+
+
+def test_submit_past_class_limit_raises_queue_full(make_executor):
+    executor = make_executor(workers=1, max_queued=(1, 1, 1))
+    release = occupy(executor)
+    executor.submit(parse_signal('SBIN-ENTRY-CALL-4'), lambda: None)
+    with pytest.raises(QueueFull) as error:
+        executor.submit(parse_signal('HAL-ENTRY-CALL-4'), lambda: None)
+    assert error.value.priority == 2 and error.value.depth == 1
+    # Other classes have room of their own
+    exit_job = executor.submit(parse_signal('HAL-EXIT-FULL'), lambda: None)
+    release.set()
+    assert exit_job.wait(5)
+    stats = executor.metrics()["priority_classes"]
+    assert stats["ENTRY"]["rejected"] == 1 and stats["EXIT-FULL"]["rejected"] == 0
+    # Once the queue drains the class takes jobs again
+    assert executor.submit(parse_signal('HAL-ENTRY-CALL-4'), lambda: None).wait(5)
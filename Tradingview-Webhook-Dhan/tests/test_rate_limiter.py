@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from jobs import BACKGROUND_PRIORITY, set_current_priority, set_order_sent
+from rate_limiter import RateLimited, TokenBucket
+from shared_queue import SharedJobQueue
+import rate_limiter
+
+
+def test_burst_is_served_without_waiting():
+    bucket = TokenBucket('quotes', rate=1, burst=3)
+    for _ in range(3):
+        assert bucket.acquire(timeout=0) < 0.01
+    with pytest.raises(RateLimited):
+        bucket.acquire(timeout=0.05)
+    assert bucket.stats()["timeouts"] == 1
+
+
+def test_tokens_refill_at_rate():
+    bucket = TokenBucket('quotes', rate=20, burst=1)
+    bucket.acquire(timeout=0)
+    waited = bucket.acquire(timeout=1)
+    assert 0.02 < waited < 0.2
+
+
+def test_reserved_tokens_are_left_for_exits():
+    bucket = TokenBucket('orders', rate=0.1, burst=3, reserved=1)
+    bucket.acquire(timeout=0)
+    bucket.acquire(timeout=0)
+    with pytest.raises(RateLimited):
+        bucket.acquire(timeout=0.05)
+    bucket.acquire(exit_priority=True, timeout=0)
+
+
+def test_reserve_never_makes_entries_wait_for_a_full_bucket():
+    bucket = TokenBucket('quotes', rate=0.1, burst=2, reserved=1)
+    assert bucket.reserved == 0
+    bucket.acquire(timeout=0)
+    bucket.acquire(timeout=0)
+
+
+def test_background_waits_behind_live_callers():
+    bucket = TokenBucket('quotes', rate=20, burst=2)
+    bucket.acquire(exit_priority=True, timeout=0)
+    bucket.acquire(exit_priority=True, timeout=0)
+    order = []
+    background = threading.Thread(target=lambda: order.append(('background', bucket.acquire(background=True))))
+    background.start()
+    time.sleep(0.01)
+    order.append(('live', bucket.acquire(timeout=1)))
+    background.join(2)
+    assert [name for name, _ in order] == ['live', 'background']
+
+
+def test_shared_bucket_is_one_budget_across_processes(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    first, second = TokenBucket('quotes', rate=0.1, burst=2), TokenBucket('quotes', rate=0.1, burst=2)
+    first.share(SharedJobQueue(path))
+    second.share(SharedJobQueue(path))
+    first.acquire(timeout=0)
+    second.acquire(timeout=0)
+    with pytest.raises(RateLimited):
+        first.acquire(timeout=0.1)
+    assert first.stats()["shared"]
+
+
+def test_acquire_picks_the_bucket_and_floor_from_the_job(monkeypatch):
+    bucket = TokenBucket('quotes', rate=0.1, burst=3, reserved=1)
+    monkeypatch.setitem(rate_limiter.buckets, 'quotes', bucket)
+    monkeypatch.setattr(rate_limiter.config, 'RATE_LIMIT_MAX_WAIT_SECONDS', 0.05)
+    # Methods without a budget are never limited
+    assert rate_limiter.acquire('get_lot_size') == 0.0
+    rate_limiter.acquire('get_ltp_data')
+    rate_limiter.acquire('get_ltp_data')
+    with pytest.raises(RateLimited):
+        rate_limiter.acquire('get_ltp_data')
+    set_current_priority(0)
+    try:
+        rate_limiter.acquire('get_ltp_data')
+    finally:
+        set_current_priority(None)
+    assert bucket.acquired == 3
+
+
+def test_later_order_legs_wait_instead_of_failing(monkeypatch):
+    bucket = TokenBucket('orders', rate=20, burst=3, reserved=1)
+    monkeypatch.setitem(rate_limiter.buckets, 'orders', bucket)
+    monkeypatch.setattr(rate_limiter.config, 'RATE_LIMIT_MAX_WAIT_SECONDS', 0)
+    set_current_priority(2)
+    try:
+        rate_limiter.acquire('place_slice_order')
+        rate_limiter.acquire('place_slice_order')
+        with pytest.raises(RateLimited):
+            rate_limiter.acquire('place_slice_order')
+        # Once the first leg is out, the second waits for a token (and may use the reserve)
+        set_order_sent(True)
+        rate_limiter.acquire('place_slice_order')
+        assert rate_limiter.acquire('place_slice_order') > 0.02
+    finally:
+        set_current_priority(None)
+        set_order_sent(False)
+
+
+def test_background_priority_never_times_out(monkeypatch):
+    bucket = TokenBucket('quotes', rate=20, burst=1)
+    bucket.acquire(timeout=0)
+    monkeypatch.setitem(rate_limiter.buckets, 'quotes', bucket)
+    monkeypatch.setattr(rate_limiter.config, 'RATE_LIMIT_MAX_WAIT_SECONDS', 0)
+    set_current_priority(BACKGROUND_PRIORITY)
+    try:
+        assert rate_limiter.acquire('get_ltp_data') > 0.02
+    finally:
+        set_current_priority(None)
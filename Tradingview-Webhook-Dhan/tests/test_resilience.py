@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from broker_adapters import BrokerHTTPError, PartialOrderError
+from jobs import set_current_priority, set_order_sent
+from resilience import BrokerUnavailable, CircuitBreaker, is_outage
+import resilience
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """A fresh quotes breaker that opens after 3 failures, with no backoff between retries"""
+    breaker = CircuitBreaker('quotes', threshold=3, cooldown=60)
+    monkeypatch.setitem(resilience.breakers, 'quotes', breaker)
+    monkeypatch.setattr(resilience, 'backoff_delay', lambda attempt: 0)
+    monkeypatch.setitem(resilience.RETRY_ATTEMPTS, 'get_ltp_data', 3)
+    return breaker
+
+
+class Broker:
+    """Raises the queued errors in turn, then answers"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'SBIN': 800.0}
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    breaker = CircuitBreaker('quotes', threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(BrokerUnavailable):
+        breaker.before_call()
+    time.sleep(0.1)
+    # One trial call at a time while half-open
+    assert breaker.before_call()
+    with pytest.raises(BrokerUnavailable):
+        breaker.before_call()
+    breaker.record_success(trial=True)
+    assert breaker.stats()["state"] == 'closed'
+    assert breaker.stats()["times_opened"] == 1 and breaker.stats()["rejected"] == 2
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker('quotes', threshold=5, cooldown=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.1)
+    trial = breaker.before_call()
+    breaker.record_failure(trial)
+    assert breaker.stats()["state"] == 'open'
+
+
+def test_only_the_trial_call_ends_the_trial():
+    breaker = CircuitBreaker('quotes', threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    trial = breaker.before_call()
+    # An exit skips before_call, so its answer must not let a second trial start
+    breaker.record_skipped()
+    with pytest.raises(BrokerUnavailable):
+        breaker.before_call()
+    breaker.record_skipped(trial)
+    assert breaker.before_call()
+
+
+def test_outages_are_told_apart_from_broker_answers():
+    assert is_outage(ConnectionError("reset"))
+    assert is_outage(TimeoutError())
+    assert is_outage(BrokerHTTPError('GET', '/positions', 503, None))
+    assert not is_outage(BrokerHTTPError('POST', '/orders', 400, None))
+    assert not is_outage(TypeError("bad argument"))
+    assert is_outage(PartialOrderError('SBIN 29 OCT 800 CALL', ['1'], ConnectionError("reset")))
+
+
+def test_outage_is_retried(breaker):
+    broker = Broker(ConnectionError("reset"), ConnectionError("reset"))
+    assert resilience.call('get_ltp_data', broker) == {'SBIN': 800.0}
+    assert broker.calls == 3
+    assert breaker.stats()["state"] == 'closed' and breaker.stats()["consecutive_failures"] == 0
+
+
+def test_broker_answer_is_neither_retried_nor_counted(breaker):
+    broker = Broker(BrokerHTTPError('POST', '/marketfeed/ltp', 400, None))
+    with pytest.raises(BrokerHTTPError):
+        resilience.call('get_ltp_data', broker)
+    assert broker.calls == 1
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_outages_open_the_breaker(breaker):
+    broker = Broker(*[ConnectionError("reset")] * 3)
+    with pytest.raises(ConnectionError):
+        resilience.call('get_ltp_data', broker)
+    assert breaker.stats()["state"] == 'open'
+    with pytest.raises(BrokerUnavailable):
+        resilience.call('get_ltp_data', Broker())
+
+
+def test_exits_bypass_an_open_breaker(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    set_current_priority(0)
+    try:
+        assert resilience.call('get_ltp_data', Broker()) == {'SBIN': 800.0}
+    finally:
+        set_current_priority(None)
+    assert breaker.stats()["state"] == 'closed'
+
+
+def test_second_order_leg_bypasses_an_open_breaker(monkeypatch):
+    breaker = CircuitBreaker('orders', threshold=1, cooldown=60)
+    monkeypatch.setitem(resilience.breakers, 'orders', breaker)
+    breaker.record_failure()
+    set_current_priority(2)
+    with pytest.raises(BrokerUnavailable):
+        resilience.call('place_slice_order', lambda: ['1'])
+    set_order_sent(True)
+    assert resilience.call('place_slice_order', lambda: ['2']) == ['2']
+    # Quote calls of the same job are still failed fast
+    quotes = CircuitBreaker('quotes', threshold=1, cooldown=60)
+    quotes.record_failure()
+    monkeypatch.setitem(resilience.breakers, 'quotes', quotes)
+    with pytest.raises(BrokerUnavailable):
+        resilience.call('get_ltp_data', Broker())
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from jobs import QueueFull
+from shared_queue import SharedJobQueue
+from signal_router import parse_signal
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SharedJobQueue(str(tmp_path / 'jobs.db'))
+
+
+def enqueue(queue, *messages, **kwargs):
+    return [queue.enqueue(parse_signal(message), **kwargs) for message in messages]
+
+
+def test_claim_takes_each_underlying_in_arrival_order(queue):
+    first, second = enqueue(queue, 'SBIN-ENTRY-CALL-4', 'SBIN-EXIT-FULL')
+    assert queue.claim('w1') == (first, 'SBIN-ENTRY-CALL-4')
+    # The exit waits for the entry ahead of it on the same underlying
+    assert queue.claim('w2') is None
+    queue.complete(first, 'completed', result={"status": "success"})
+    assert queue.claim('w2') == (second, 'SBIN-EXIT-FULL')
+    assert queue.get(first)['worker'] == 'w1'
+
+
+def test_claim_serves_exits_before_entries(queue):
+    enqueue(queue, 'SBIN-ENTRY-CALL-4', 'HAL-EXIT-HALF', 'BEL-EXIT-FULL')
+    assert [queue.claim('w')[1] for _ in range(3)] == ['BEL-EXIT-FULL', 'HAL-EXIT-HALF', 'SBIN-ENTRY-CALL-4']
+
+
+def test_claim_promotes_lanes_that_waited(tmp_path):
+    queue = SharedJobQueue(str(tmp_path / 'jobs.db'), aging_seconds=0.05)
+    enqueue(queue, 'SBIN-ENTRY-CALL-4')
+    time.sleep(0.15)
+    enqueue(queue, 'HAL-EXIT-FULL')
+    assert queue.claim('w')[1] == 'SBIN-ENTRY-CALL-4'
+
+
+def test_claim_is_shared_between_connections(queue):
+    other = SharedJobQueue(queue.path)
+    enqueue(queue, 'SBIN-ENTRY-CALL-4', 'HAL-ENTRY-CALL-4')
+    claimed = {queue.claim('w1')[1], other.claim('w2')[1]}
+    assert claimed == {'SBIN-ENTRY-CALL-4', 'HAL-ENTRY-CALL-4'}
+    assert queue.claim('w1') is None and other.claim('w2') is None
+
+
+def test_enqueue_past_class_limit_raises_queue_full(queue):
+    enqueue(queue, 'SBIN-ENTRY-CALL-4', max_queued=(1, 1, 1))
+    with pytest.raises(QueueFull):
+        enqueue(queue, 'HAL-ENTRY-CALL-4', max_queued=(1, 1, 1))
+    enqueue(queue, 'HAL-EXIT-FULL', max_queued=(1, 1, 1))
+
+
+def test_abandoned_jobs_fail_and_unblock_their_lane(queue):
+    first, second = enqueue(queue, 'SBIN-ENTRY-CALL-4', 'SBIN-EXIT-FULL')
+    queue.claim('w1')
+    assert queue.abandon('w1') == 1
+    assert queue.get(first)['status'] == 'failed'
+    assert queue.claim('w2') == (second, 'SBIN-EXIT-FULL')
@@ -0,0 +1,88 @@
+import sys
+import types
+
+from signal_router import Signal, SignalRouter, build_route_table, parse_signal
+
+
+def make_module(name, **functions):
+    """Stand-in strategy module holding the given functions"""
+    module = types.ModuleType(name)
+    for function_name, func in functions.items():
+        func.__name__ = function_name
+        func.__module__ = name
+        setattr(module, function_name, func)
+    return module
+
+
+def test_parse_entry_and_exit_messages():
+    assert parse_signal('SBIN-ENTRY-CALL-4') == Signal('SBIN', 'ENTRY', 'CALL', '4')
+    assert parse_signal(' sbin-entry-put-8\n') == Signal('SBIN', 'ENTRY', 'PUT', '8')
+    assert parse_signal('SBIN-EXIT-FULL') == Signal('SBIN', 'EXIT', None, 'FULL')
+    assert parse_signal('SBIN-EXIT-HALF') == Signal('SBIN', 'EXIT', None, 'HALF')
+
+
+def test_parse_rejects_unknown_formats():
+    for message in ('', 'SBIN', 'SBIN-ENTRY-CALL', 'SBIN-ENTRY-CALL-X', 'SBIN-ENTRY-STRADDLE-4',
+                    'SBIN-EXIT-SOME', 'SBIN-EXIT-FULL-4'):
+        assert parse_signal(message) is None
+
+
+def test_message_round_trips():
+    for message in ('SBIN-ENTRY-CALL-4', 'NIFTY-ENTRY-PUT-12', 'HAL-EXIT-FULL', 'HAL-EXIT-HALF'):
+        assert parse_signal(message).message == message
+
+
+def test_route_table_is_built_from_function_names():
+    def entry():
+        return 'entry'
+
+    def close_all():
+        return 'close all'
+
+    def close_half():
+        return 'close half'
+
+    def helper():
+        return 'helper'
+
+    module = make_module('sbin_strategy', execute_sbin_ratio_backspread_call_4=entry,
+                         close_sbin_all_positions=close_all, close_sbin_half_positions=close_half,
+                         get_batch_strike_prices=helper)
+    routes = build_route_table([module])
+    assert routes == {
+        Signal('SBIN', 'ENTRY', 'CALL', '4'): entry,
+        Signal('SBIN', 'EXIT', None, 'FULL'): close_all,
+        Signal('SBIN', 'EXIT', None, 'HALF'): close_half,
+    }
+
+
+def test_imported_functions_are_not_routed():
+    def close_all():
+        return 'close all'
+
+    owner = make_module('sbin_strategy', close_sbin_all_positions=close_all)
+    importer = types.ModuleType('hal_strategy')
+    importer.close_sbin_all_positions = owner.close_sbin_all_positions
+    assert build_route_table([importer]) == {}
+
+
+def test_router_resolves_signals(monkeypatch):
+    def entry():
+        return 'entry'
+
+    module = make_module('sbin_strategy', execute_sbin_ratio_backspread_put_8=entry)
+    monkeypatch.setitem(sys.modules, 'sbin_strategy', module)
+    router = SignalRouter(build_route_table([module]))
+    assert router.resolve(parse_signal('SBIN-ENTRY-PUT-8')) is entry
+    assert router.resolve(parse_signal('SBIN-ENTRY-CALL-8')) is None
+    assert router.underlyings == {'SBIN'}
+    assert router.modules == {'SBIN': module}
+    assert router.listing() == {'SBIN-ENTRY-PUT-8': 'sbin_strategy.execute_sbin_ratio_backspread_put_8'}
+
+
+def test_every_strategy_module_has_both_exits():
+    router = SignalRouter.from_strategies()
+    assert router.underlyings
+    for underlying in router.underlyings:
+        for size in ('FULL', 'HALF'):
+            assert router.resolve(Signal(underlying, 'EXIT', None, size)) is not None
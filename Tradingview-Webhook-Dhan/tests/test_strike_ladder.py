@@ -0,0 +1,137 @@
+import datetime
+
+import pytest
+
+from broker_adapters import DhanDirectAdapter
+from strike_ladder import StrikeLadder
+import atm_resolver
+import expiry_calendar
+import instrument_snapshot
+import strike_ladder
+
+
+def upcoming_expiry(days=5):
+    """A date `days` ahead with the same day and month next year too (never 29 FEB)"""
+    expiry = datetime.date.today() + datetime.timedelta(days=days)
+    if (expiry.month, expiry.day) == (2, 29):
+        expiry += datetime.timedelta(days=1)
+    return expiry
+
+
+def label(expiry):
+    return expiry.strftime('%d %b').upper()
+
+
+@pytest.fixture
+def ladder():
+    # Built from unsorted rows, as the master lists them
+    return StrikeLadder([800, 780, 810, 790], ['S 800', 'S 780', 'S 810', 'S 790'], ['8', '7', '81', '79'], 'NSE_FNO')
+
+
+def test_nearest_is_the_closest_listed_strike(ladder):
+    assert ladder.nearest(803) == 800
+    assert ladder.nearest(806) == 810
+    assert ladder.nearest(500) == 780
+    assert ladder.nearest(900) == 810
+    assert StrikeLadder([], [], []).nearest(800) is None
+
+
+def test_symbol_needs_an_exact_listed_strike(ladder):
+    assert ladder.symbol(790) == 'S 790'
+    assert ladder.symbol(795) is None
+    assert ladder.symbol(900) is None
+    assert ladder.security_id(790) == '79'
+    assert ladder.security_id(795) is None
+
+
+def test_itm_strikes_are_nearest_first(ladder):
+    assert ladder.itm('CALL', 800, 2) == ([790, 780], ['S 790', 'S 780'])
+    assert ladder.itm('PUT', 800, 5) == ([810], ['S 810'])
+    assert ladder.itm('CALL', 780, 3) == ([], [])
+
+
+def test_ladders_are_keyed_by_expiry_date(write_master):
+    expiry = upcoming_expiry()
+    next_year = expiry.replace(year=expiry.year + 1)
+    df = instrument_snapshot.read_csv(write_master([('SBIN', expiry, 800), ('SBIN', expiry, 810),
+                                                    ('SBIN', next_year, 900)]))
+    ladders, contracts = strike_ladder.build_ladders(df)
+    assert contracts == 6
+    assert len(ladders[('SBIN', expiry, 'CALL')]) == 2
+    assert len(ladders[('SBIN', next_year, 'PUT')]) == 1
+
+
+def test_labels_resolve_to_the_next_expiry_with_that_date(isolated_master, write_master):
+    expiry = upcoming_expiry()
+    next_year = expiry.replace(year=expiry.year + 1)
+    df = instrument_snapshot.read_csv(write_master([('SBIN', expiry, 800), ('SBIN', next_year, 900)]))
+    strike_ladder.install(strike_ladder.build_ladders(df)[0])
+    assert strike_ladder.itm_strikes('SBIN', label(expiry), 'PUT', 790, 3) == ([800], [f"SBIN {label(expiry)} 800 PUT"])
+    assert strike_ladder.itm_strikes('HAL', label(expiry), 'PUT', 790, 3) is None
+
+
+class QuoteOnlyBroker:
+    """Answers spot quotes; fails the test if the broker's ATM selection is used"""
+
+    def __init__(self, spot):
+        self.spot = spot
+        self.atm_calls = 0
+
+    def get_ltp_data(self, names):
+        return {name: self.spot for name in names if name == 'SBIN'}
+
+    def ATM_Strike_Selection(self, Underlying, Expiry=0):
+        self.atm_calls += 1
+        return f"{Underlying} 01 JAN 1 CALL", f"{Underlying} 01 JAN 1 PUT", 1
+
+
+@pytest.fixture
+def installed(isolated_master, write_master, monkeypatch):
+    monkeypatch.setattr(atm_resolver, '_atm', {})
+    expiry = upcoming_expiry()
+    df = instrument_snapshot.read_csv(write_master([('SBIN', expiry, strike) for strike in (780, 790, 800, 810)]))
+    strike_ladder.install(strike_ladder.build_ladders(df)[0])
+    expiry_calendar.install(expiry_calendar.build(df))
+    return expiry
+
+
+def test_atm_strike_comes_from_the_ladder(installed):
+    broker = QuoteOnlyBroker(806.5)
+    assert atm_resolver.resolve_atm(broker, 'SBIN') == (
+        f"SBIN {label(installed)} 810 CALL", f"SBIN {label(installed)} 810 PUT", 810)
+    assert broker.atm_calls == 0
+
+
+def test_broker_selects_the_strike_without_a_ladder_or_quote(installed):
+    broker = QuoteOnlyBroker(806.5)
+    assert atm_resolver.resolve_atm(broker, 'HAL')[2] == 1
+    assert atm_resolver.from_ladder(QuoteOnlyBroker(None), 'SBIN') is None
+    assert broker.atm_calls == 1
+
+
+def test_security_ids_come_from_the_ladder(installed):
+    symbol = f"SBIN {label(installed)} 800 PUT"
+    assert strike_ladder.security_id(symbol) == ('NSE_FNO', '1005')
+    assert strike_ladder.security_id(f"SBIN {label(installed)} 805 PUT") is None
+    assert strike_ladder.security_id('SBIN') is None
+
+
+def test_direct_adapter_quotes_and_orders_by_ladder_security_id(installed, monkeypatch):
+    symbol = f"SBIN {label(installed)} 810 CALL"
+    # The instrument index is not consulted for option symbols
+    monkeypatch.setattr('instrument_index.by_custom_symbol', lambda name: pytest.fail(f"index lookup of {name}"))
+    adapter = object.__new__(DhanDirectAdapter)
+    adapter.client_code = 'client'
+    requests = []
+
+    def call(method, path, body=None, idempotent=None):
+        requests.append((path, body))
+        if path == '/marketfeed/ltp':
+            return {'data': {'NSE_FNO': {'1006': {'last_price': 12.5}}}}
+        return {'orderId': '1', 'orderStatus': 'PENDING'}
+
+    adapter._call = call
+    assert adapter.get_ltp_data([symbol]) == {symbol: 12.5}
+    assert requests[0][1] == {'NSE_FNO': [1006]}
+    adapter.place_slice_order(symbol, 'NFO', 'BUY', 750, 'MARKET', 'MIS')
+    assert requests[1][1]['securityId'] == '1006' and requests[1][1]['exchangeSegment'] == 'NSE_FNO'
@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    # Importing the server opens its log file in the working directory
+    monkeypatch.chdir(tmp_path)
+    import webhook_server
+    monkeypatch.setattr(config, 'MAX_BODY_BYTES', 100)
+    return webhook_server.app.test_client()
+
+
+def post_chunked(client, path, body):
+    """POST without a Content-Length, as a chunked request arrives"""
+    return client.post(path, input_stream=io.BytesIO(body), headers={'Transfer-Encoding': 'chunked'},
+                       environ_overrides={'wsgi.input_terminated': True})
+
+
+@pytest.mark.parametrize('path', ['/webhook', '/webhook/batch'])
+def test_chunked_body_over_the_limit_is_rejected(client, path):
+    response = post_chunked(client, path, b'SBIN-EXIT-FULL\n' * 20)
+    assert response.status_code == 413
+    assert response.get_json()["status"] == "error"
+
+
+def test_body_with_content_length_over_the_limit_is_rejected(client):
+    assert client.post('/webhook', data=b'x' * 500).status_code == 413
@@ -0,0 +1,100 @@
+import pytest
+
+from dedup_cache import DedupCache
+from jobs import JobStore, LaneExecutor
+import config
+import ingest
+
+
+@pytest.fixture
+def service(monkeypatch):
+    import webhook_service
+    monkeypatch.setattr(webhook_service, 'dedup_cache', DedupCache(ttl_seconds=60))
+    return webhook_service
+
+
+def test_full_queue_answers_429_with_retry_after(service, monkeypatch):
+    executor = LaneExecutor(workers=1, store=JobStore(), max_queued=(0, 0, 0))
+    monkeypatch.setattr(service, 'executor', executor)
+    try:
+        raw_body = b'SBIN-ENTRY-CALL-4'
+        job, duplicate, reply = service.submit_alert(ingest.read_alert(raw_body))
+        assert job is None
+        body, status, headers = reply
+        assert status == 429 and body["status"] == "rejected"
+        assert headers == {'Retry-After': str(config.RETRY_AFTER_SECONDS)}
+        # A rejected alert is not remembered, so TradingView's retry is queued
+        assert service.dedup_cache.stats()["size"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_shut_down_executor_answers_503(service, monkeypatch):
+    executor = LaneExecutor(workers=1, store=JobStore())
+    executor.shutdown()
+    monkeypatch.setattr(service, 'executor', executor)
+    raw_body = b'SBIN-EXIT-FULL'
+    job, duplicate, (body, status, headers) = service.submit_alert(ingest.read_alert(raw_body))
+    assert job is None and status == 503
+
+
+
+class StubJob:
+    """Stand-in job that finishes when the test says so"""
+
+    def __init__(self, signal):
+        self.id = f"job-{signal.message}"
+        self.signal = signal
+        self.status = 'queued'
+        self.callbacks = []
+
+    def add_done_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def finish(self, status):
+        self.status = status
+        for callback in self.callbacks:
+            callback(self)
+
+
+class StubExecutor:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, signal, strategy):
+        self.jobs.append(StubJob(signal))
+        return self.jobs[-1]
+
+
+def test_batch_message_is_a_duplicate_of_the_same_webhook_alert(service, monkeypatch):
+    executor = StubExecutor()
+    monkeypatch.setattr(service, 'executor', executor)
+    job, duplicate, reply = service.submit_alert(ingest.read_alert(b'{"message": " sbin-exit-full"}'))
+    assert reply is None and not duplicate
+
+    results, routed, error = service.parse_batch({'messages': ['SBIN-EXIT-FULL', {'message': 'SBIN-EXIT-HALF'}]})
+    submitted = service.submit_batch(results, routed)
+    assert [(index, duplicate) for index, _, duplicate in submitted] == [(0, True), (1, False)]
+    assert submitted[0][1] is job and len(executor.jobs) == 2
+
+
+def test_alert_ids_key_across_webhook_and_batch(service, monkeypatch):
+    monkeypatch.setattr(service, 'executor', StubExecutor())
+    job, _, _ = service.submit_alert(ingest.read_alert(b'{"message": "SBIN-EXIT-FULL", "alert_id": "a-1"}'))
+    results, routed, error = service.parse_batch([{'message': 'SBIN-EXIT-HALF', 'alert_id': 'a-1'}])
+    assert service.submit_batch(results, routed)[0][1:] == (job, True)
+
+
+def test_failed_job_is_forgotten_so_a_retry_runs(service, monkeypatch):
+    executor = StubExecutor()
+    monkeypatch.setattr(service, 'executor', executor)
+    alert = ingest.read_alert(b'SBIN-EXIT-FULL')
+
+    first, _, _ = service.submit_alert(alert)
+    first.finish('failed')
+    retry, duplicate, _ = service.submit_alert(alert)
+    assert retry is not first and not duplicate
+
+    retry.finish('completed')
+    again, duplicate, _ = service.submit_alert(alert)
+    assert again is retry and duplicate
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from signal_router import load_underlyings
+from contract_cache import contract_lot_size
+from atm_resolver import resolve_atm
+from jobs import BACKGROUND_PRIORITY, set_current_priority
+import contract_cache
+import expiry_calendar
+import instrument_index
+import instrument_master
+import strike_ladder
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# underlying -> contract details resolved during warm-up
+contracts = {}
+
+_report = {"status": "pending", "started_at": None, "finished_at": None, "total_ms": None,
+           "instrument_master": None, "symbols": {}}
+_ready = threading.Event()
+_lock = threading.Lock()
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def warm_instrument_master():
+    """
+    Load the shared instrument master once and build the contract metadata
+    cache, expiry calendar, instrument index and strike ladders from it
+    """
+    started = time.perf_counter()
+    df = instrument_master.load()
+    if df is None:
+        return {"loaded": False, "instruments": 0, "ms": _elapsed_ms(started)}
+    contract_cache.load_from_master(df)
+    expiry_calendar.load_from_master(df)
+    instrument_index.build(df)
+    strike_ladder.build(df)
+    return {"loaded": True, "instruments": len(df), "memory_mb": instrument_master.metrics()["memory_mb"],
+            "ms": _elapsed_ms(started)}
+
+
+def warm_symbol(tsl, underlying, module):
+    """Resolve the current expiry, ATM strike, lot size and option-chain symbols of one underlying"""
+    timings = {}
+    started = time.perf_counter()
+    step = time.perf_counter()
+    CE_symbol_name, PE_symbol_name, strike_price = resolve_atm(tsl, underlying)
+    timings["atm_ms"] = _elapsed_ms(step)
+
+    step = time.perf_counter()
+    lot_size = contract_lot_size(tsl, CE_symbol_name)
+    timings["lot_size_ms"] = _elapsed_ms(step)
+
+    step = time.perf_counter()
+    expiry_str = expiry_calendar.current_expiry_label(tsl, underlying)
+    chain = {side: module.get_batch_strike_symbols(strike_price, expiry_str, side)[1] for side in ('CALL', 'PUT')}
+    timings["chain_ms"] = _elapsed_ms(step)
+
+    contracts[underlying] = {
+        "expiry": expiry_str,
+        "atm_strike": strike_price,
+        "ce_symbol": CE_symbol_name,
+        "pe_symbol": PE_symbol_name,
+        "lot_size": lot_size,
+        "strike_step": module.STRIKE_STEP,
+        "chain": chain
+    }
+    timings["total_ms"] = _elapsed_ms(started)
+    return {"status": "ok", "expiry": expiry_str, "atm_strike": strike_price, "lot_size": lot_size,
+            "timings": timings}
+
+
+def run(tsl, modules, threads=8):
+    """
+    Warm every underlying in stocks.txt in parallel
+    modules maps underlying -> strategy module (SignalRouter.modules).
+    Failures are recorded in the report; they never stop the server.
+    """
+    started = time.perf_counter()
+    with _lock:
+        _report.update(status="running", started_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    try:
+        master = warm_instrument_master()
+    except Exception as e:
+        logger.error(f"Error warming instrument master: {str(e)}")
+        master = {"loaded": False, "error": str(e)}
+    with _lock:
+        _report["instrument_master"] = master
+
+    def warm(underlying):
+        module = modules.get(underlying)
+        if module is None:
+            return underlying, {"status": "skipped", "error": "no strategy module"}
+        set_current_priority(BACKGROUND_PRIORITY)
+        try:
+            return underlying, warm_symbol(tsl, underlying, module)
+        except Exception as e:
+            logger.error(f"Error warming {underlying}: {str(e)}")
+            logger.error(traceback.format_exc())
+            return underlying, {"status": "failed", "error": str(e)}
+        finally:
+            set_current_priority(None)
+
+    underlyings = load_underlyings()
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(underlyings)))) as pool:
+        for underlying, result in pool.map(warm, underlyings):
+            with _lock:
+                _report["symbols"][underlying] = result
+
+    with _lock:
+        _report.update(status="ready", finished_at=time.strftime("%Y-%m-%d %H:%M:%S"),
+                       total_ms=_elapsed_ms(started))
+        symbols = dict(_report["symbols"])
+    _ready.set()
+
+    warmed = sum(1 for result in symbols.values() if result["status"] == "ok")
+    logger.info(f"Warm-up finished in {_report['total_ms']:.0f} ms: {warmed}/{len(symbols)} symbols warmed")
+    for underlying, result in symbols.items():
+        if result["status"] == "ok":
+            logger.info(f"  {underlying:<12} {result['timings']['total_ms']:>9.1f} ms  "
+                        f"expiry {result['expiry']}, ATM {result['atm_strike']}, lot {result['lot_size']}")
+        else:
+            logger.warning(f"  {underlying:<12} {result['status']}: {result['error']}")
+    return report()
+
+
+def start(tsl, modules, threads=8):
+    """Run the warm-up on a background thread; returns the thread"""
+    thread = threading.Thread(target=run, args=(tsl, modules, threads), name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def skip(reason):
+    """Mark the warm-up as not needed in this process"""
+    with _lock:
+        _report.update(status="skipped", reason=reason, finished_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    _ready.set()
+    logger.info(f"Warm-up skipped: {reason}")
+
+
+def wait(timeout=None):
+    return _ready.wait(timeout)
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def report():
+    with _lock:
+        result = dict(_report)
+        result["symbols"] = dict(_report["symbols"])
+    return result
@@ -0,0 +1,358 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from signal_router import SignalRouter, load_underlyings, parse_signal
+from jobs import ExecutorClosed, JobStore, LaneExecutor, QueueFull
+from dedup_cache import DedupCache, dedup_key
+from broker_clients import client_stats, get_client
+import atm_resolver
+import quote_snapshot
+import ingest
+import warmup
+import contract_cache
+import expiry_calendar
+import instrument_index
+import instrument_master
+import instrument_refresh
+import strike_ladder
+import rate_limiter
+import resilience
+import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Build and health-check the shared Dhan client before taking traffic. With
+# the shared backend the worker processes make every broker call instead.
+tsl = get_client() if config.EXECUTION_BACKEND != 'shared' else None
+
+# Build the signal -> strategy routing table once at startup
+router = SignalRouter.from_strategies()
+
+if config.EXECUTION_BACKEND == 'shared':
+    # Jobs go to a SQLite queue drained by the worker.py processes;
+    # the executor also serves /jobs/<id> lookups from the shared table
+    from shared_queue import SharedJobQueue, SharedQueueExecutor
+
+    shared_queue = SharedJobQueue(config.SHARED_QUEUE_PATH, aging_seconds=config.PRIORITY_AGING_SECONDS)
+    executor = SharedQueueExecutor(
+        shared_queue,
+        max_queued=(config.MAX_QUEUED_EXIT_FULL, config.MAX_QUEUED_EXIT_HALF, config.MAX_QUEUED_ENTRY),
+        poll_interval=config.WORKER_POLL_SECONDS
+    )
+    job_store = executor
+else:
+    # Shared worker pool with one ordered lane per underlying in stocks.txt
+    shared_queue = None
+    job_store = JobStore(max_jobs=config.JOB_HISTORY_SIZE)
+    executor = LaneExecutor(
+        workers=config.WORKER_THREADS,
+        store=job_store,
+        lane_keys=load_underlyings(),
+        aging_seconds=config.PRIORITY_AGING_SECONDS,
+        max_queued=(config.MAX_QUEUED_EXIT_FULL, config.MAX_QUEUED_EXIT_HALF, config.MAX_QUEUED_ENTRY)
+    )
+
+if shared_queue is None:
+    # Pre-resolve expiry, ATM strike, lot size and option chain of every symbol
+    # in the background; /ready answers 503 until it has finished
+    warmup.start(tsl, router.modules, threads=config.WARMUP_THREADS)
+
+    # Pick up new instrument master files (new contracts and weekly expiries)
+    # without a restart
+    if config.INSTRUMENT_REFRESH_SECONDS > 0:
+        instrument_refresh.start(config.INSTRUMENT_REFRESH_SECONDS)
+else:
+    # Each worker process warms up and refreshes its own caches
+    warmup.skip("strategies run in the worker processes, which warm up themselves")
+
+# Re-sent alerts map back to the job they already started
+dedup_cache = DedupCache(ttl_seconds=config.DEDUP_TTL_SECONDS, max_entries=config.DEDUP_MAX_ENTRIES)
+
+# Threads resolving the ATM strikes of a batch's underlyings in parallel,
+# shared by every batch request
+prefetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='prefetch')
+
+# Handlers below are shared by the Flask server (webhook_server.py) and the
+# asyncio server (asgi_server.py). They return (body, status, headers) and
+# leave waiting for jobs to the caller.
+
+
+def too_large_reply(error):
+    return {"status": "error", "message": str(error)}, 413, {}
+
+
+def error_reply(message, status=500):
+    return {
+        "status": "error",
+        "message": message,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+    }, status, {}
+
+
+def routes_reply():
+    """List every signal the webhook accepts and the strategy it runs"""
+    listing = router.listing()
+    return {
+        "status": "success",
+        "count": len(listing),
+        "underlyings": sorted(router.underlyings),
+        "routes": listing
+    }, 200, {}
+
+
+def ready_reply():
+    """
+    200 once the startup warm-up has finished, 503 before; both with the timing report
+    With the shared backend: 200 once a worker process is up (workers only
+    start their heartbeat after their own warm-up).
+    """
+    if shared_queue is not None:
+        workers = shared_queue.metrics()["workers"]
+        if not any(worker["alive"] for worker in workers.values()):
+            return {"ready": False, "workers": workers}, 503, {'Retry-After': str(config.RETRY_AFTER_SECONDS)}
+        return {"ready": True, "workers": workers}, 200, {}
+
+    report = warmup.report()
+    if not warmup.is_ready():
+        return {"ready": False, **report}, 503, {'Retry-After': str(config.RETRY_AFTER_SECONDS)}
+    return {"ready": True, **report}, 200, {}
+
+
+def job_reply(job_id):
+    """Report the state and strategy result of a queued webhook job"""
+    job = job_store.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Unknown job: {job_id}"}, 404, {}
+    return job.to_dict(), 200, {}
+
+
+def metrics_reply():
+    """Worker pool utilisation, per-priority and per-underlying queue wait times"""
+    return {"ingest": ingest.stats.to_dict(), "broker_client": client_stats(),
+            "contract_cache": contract_cache.metrics(),
+            "expiry_calendar": expiry_calendar.metrics(),
+            "instrument_master": instrument_master.metrics(),
+            "instrument_index": instrument_index.metrics(),
+            "instrument_refresh": instrument_refresh.metrics(),
+            "strike_ladder": strike_ladder.metrics(),
+            "atm_resolver": atm_resolver.metrics(),
+            "rate_limits": rate_limiter.metrics(),
+            "resilience": resilience.metrics(),
+            "executor": executor.metrics(), "dedup": dedup_cache.stats()}, 200, {}
+
+
+def positions_reply():
+    """Current positions book: the copy published by the workers in shared mode"""
+    if shared_queue is not None:
+        state = shared_queue.read_state('positions')
+        if state is None:
+            return {"status": "error", "message": "No positions published by the workers yet"}, 503, {}
+        return {"status": "success", "positions": state['value'], "worker": state['worker'],
+                "updated_at": state['updated_at']}, 200, {}
+
+    positions = tsl.get_positions()
+    if hasattr(positions, 'to_dict'):
+        positions = positions.to_dict('records')
+    return {"status": "success", "positions": positions}, 200, {}
+
+
+def submit_once(key, submit):
+    """
+    dedup_cache.get_or_submit, except that a job that fails is dropped from
+    the cache so a retry of its alert runs again
+    Returns: (job, duplicate)
+    """
+    cache = dedup_cache
+    job, duplicate = cache.get_or_submit(key, submit)
+    if not duplicate:
+        def forget_failed(finished):
+            if finished.status == 'failed':
+                cache.discard(key, finished)
+        job.add_done_callback(forget_failed)
+    return job, duplicate
+
+
+def submit_alert(alert):
+    """
+    Route and queue one alert produced by ingest.read_alert
+    Returns: (job, duplicate, None) when a job was queued (or found by the
+    dedup cache), otherwise (None, False, reply) with the reply to send.
+    """
+    if alert is None:
+        logger.error("No data received in webhook")
+        return None, False, ({"status": "error", "message": "No data received"}, 400, {})
+
+    message = alert.message
+    logger.info(f"Processing {alert.kind} alert: {message}")
+
+    # Route the signal through the strategy table
+    signal = alert.signal
+    strategy = router.resolve(signal) if signal else None
+    if strategy is None:
+        if signal and signal.underlying in router.underlyings:
+            logger.warning(f"Unknown {signal.underlying} signal received: {message}")
+            return None, False, ({
+                "status": "ignored",
+                "message": f"Unknown {signal.underlying} signal: {message}"
+            }, 200, {})
+        logger.warning(f"Unknown signal received: {message}")
+        return None, False, ({
+            "status": "ignored",
+            "message": f"Unknown signal: {message}. Expected one of the signals listed at /routes."
+        }, 200, {})
+
+    # Every signal runs on its underlying's lane so same-symbol signals keep arrival order.
+    # A repeat of an alert seen within the dedup TTL gets the original job instead.
+    try:
+        job, duplicate = submit_once(dedup_key(signal.message, alert.alert_id),
+                                     lambda: executor.submit(signal, strategy))
+    except QueueFull as e:
+        logger.warning(f"Rejected {message}: {str(e)}")
+        return None, False, ({"status": "rejected", "message": str(e)}, 429,
+                             {'Retry-After': str(config.RETRY_AFTER_SECONDS)})
+    except ExecutorClosed as e:
+        return None, False, ({"status": "rejected", "message": str(e)}, 503,
+                             {'Retry-After': str(config.RETRY_AFTER_SECONDS)})
+    if duplicate:
+        logger.info(f"Duplicate alert {message}, returning job {job.id}")
+    return job, duplicate, None
+
+
+def accepted_reply(job, duplicate):
+    """202 reply for ack-fast mode"""
+    return {
+        "status": "accepted",
+        "message": f"Signal {job.signal.message} queued for execution",
+        "job_id": job.id,
+        "duplicate": duplicate,
+        "status_url": f"/jobs/{job.id}"
+    }, 202, {}
+
+
+def completed_reply(job, duplicate):
+    """Reply for a finished job, in the format the webhook has always returned"""
+    if job.status == 'failed':
+        return error_reply(f"Error processing webhook: {job.error}")
+
+    logger.info(f"Strategy execution result: {job.result}")
+    return {
+        "status": "success",
+        "message": "Strategy executed successfully",
+        "details": job.result,
+        "job_id": job.id,
+        "duplicate": duplicate
+    }, 200, {}
+
+
+def prefetch_entry_quotes(signals):
+    """
+    Fetch the ATM and candidate ITM quotes of every entry signal in one
+    get_ltp_data call, so the strategies read them from the quote snapshot
+    """
+    if tsl is None:
+        # Strategies run in the worker processes, which have their own snapshots
+        return
+    sides = {}
+    for signal in signals:
+        if signal.action == 'ENTRY':
+            sides.setdefault(signal.underlying, set()).add(signal.side)
+    if not sides:
+        return
+
+    def select_atm(underlying):
+        try:
+            return underlying, atm_resolver.resolve_atm(tsl, underlying)
+        except Exception as e:
+            logger.error(f"Error selecting ATM strike for {underlying}: {str(e)}")
+            return underlying, None
+
+    atm_results = list(prefetch_pool.map(select_atm, sides))
+
+    names = []
+    for underlying, atm in atm_results:
+        if not atm:
+            continue
+        CE_symbol_name, PE_symbol_name, strike_price = atm
+        expiry_str = expiry_calendar.current_expiry_label(tsl, underlying)
+        module = router.modules[underlying]
+        for side in sides[underlying]:
+            names.append(CE_symbol_name if side == 'CALL' else PE_symbol_name)
+            names.extend(module.get_batch_strike_symbols(strike_price, expiry_str, side)[1])
+
+    try:
+        quote_snapshot.prefetch(tsl, names)
+    except Exception as e:
+        # Strategies fall back to fetching their own quotes
+        logger.error(f"Error prefetching batch quotes: {str(e)}")
+
+
+def parse_batch(data):
+    """
+    Validate a batch body and route its messages
+    Returns: (results, routed, None) or (None, None, reply) for an invalid batch.
+    results holds the replies for messages that were not routed; routed is a
+    list of (index, item, signal, strategy).
+    """
+    items = data.get('messages') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None, None, ({"status": "error", "message": "Expected a non-empty list of messages"}, 400, {})
+    if len(items) > config.MAX_BATCH_SIZE:
+        return None, None, ({
+            "status": "error",
+            "message": f"Batch of {len(items)} exceeds the limit of {config.MAX_BATCH_SIZE} messages"
+        }, 400, {})
+
+    logger.info(f"Received batch of {len(items)} messages")
+    results = [None] * len(items)
+    routed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'message': item}
+        message = str(item.get('message', '')).strip().upper() if isinstance(item, dict) else ''
+        signal = parse_signal(message)
+        strategy = router.resolve(signal) if signal else None
+        if strategy is None:
+            results[index] = {"signal": message, "status": "ignored", "message": f"Unknown signal: {message}"}
+            continue
+        routed.append((index, item, signal, strategy))
+    return results, routed, None
+
+
+def submit_batch(results, routed):
+    """
+    Queue every routed batch message; rejected ones are recorded in results
+    Returns: list of (index, job, duplicate)
+    """
+    submitted = []
+    for index, item, signal, strategy in routed:
+        # Keyed like a /webhook alert, so a batch repeating one is deduplicated against it
+        key = dedup_key(signal.message, item.get('alert_id'))
+        try:
+            job, duplicate = submit_once(key, lambda signal=signal, strategy=strategy: executor.submit(signal, strategy))
+        except (QueueFull, ExecutorClosed) as e:
+            results[index] = {"signal": signal.message, "status": "rejected", "message": str(e)}
+            continue
+        submitted.append((index, job, duplicate))
+    return submitted
+
+
+def batch_item_result(job, duplicate, async_mode):
+    """Per-message entry of a batch reply"""
+    if async_mode:
+        return {"signal": job.signal.message, "status": "accepted", "job_id": job.id,
+                "duplicate": duplicate, "status_url": f"/jobs/{job.id}"}
+    if job.status == 'failed':
+        return {"signal": job.signal.message, "status": "error", "message": job.error,
+                "job_id": job.id, "duplicate": duplicate}
+    return {"signal": job.signal.message, "status": "success", "details": job.result,
+            "job_id": job.id, "duplicate": duplicate}
+
+
+def batch_reply(results, async_mode):
+    return {
+        "status": "accepted" if async_mode else "success",
+        "count": len(results),
+        "results": results
+    }, 202 if async_mode else 200, {}
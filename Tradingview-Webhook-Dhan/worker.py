@@ -0,0 +1,182 @@
+import argparse
+import logging
+import multiprocessing
+import signal as signals
+import threading
+import time
+import traceback
+
+import config
+from jobs import set_current_lane, set_current_priority, set_order_sent, signal_priority
+from shared_queue import SharedJobQueue
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler("worker_logs.log"),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Positions are published under this name in the shared state table
+POSITIONS_STATE = 'positions'
+
+
+def publish_positions(queue, tsl, worker_id):
+    """Publish the broker's positions book so the server (and other workers) can read it"""
+    try:
+        positions = tsl.get_positions()
+        if hasattr(positions, 'to_dict'):
+            positions = positions.to_dict('records')
+        queue.publish(POSITIONS_STATE, positions, worker=worker_id)
+        return True
+    except Exception as e:
+        logger.error(f"Error publishing positions: {str(e)}")
+        return False
+
+
+def run_worker(worker_id, path):
+    """
+    Worker process: claim jobs from the shared queue and run their strategies
+    Each process has its own broker client and strategy modules; the queue
+    only hands out a job once the previous job of its underlying has finished.
+    """
+    # Imported here so the supervisor process never logs in to the broker
+    from broker_clients import get_client
+    from signal_router import SignalRouter, parse_signal
+    import instrument_refresh
+    import rate_limiter
+    import warmup
+
+    stopping = threading.Event()
+    signals.signal(signals.SIGTERM, lambda *_: stopping.set())
+    signals.signal(signals.SIGINT, lambda *_: stopping.set())
+
+    queue = SharedJobQueue(path, aging_seconds=config.PRIORITY_AGING_SECONDS)
+    # One broker rate budget for all worker processes, not one per process
+    rate_limiter.share(queue)
+    router = SignalRouter.from_strategies()
+    tsl = get_client()
+    warmup.run(tsl, router.modules, threads=config.WARMUP_THREADS)
+    if config.INSTRUMENT_REFRESH_SECONDS > 0:
+        instrument_refresh.start(config.INSTRUMENT_REFRESH_SECONDS)
+
+    def heartbeat():
+        while not stopping.wait(5):
+            queue.heartbeat(worker_id)
+
+    queue.heartbeat(worker_id)
+    threading.Thread(target=heartbeat, name='heartbeat', daemon=True).start()
+    logger.info(f"Worker {worker_id} started")
+
+    positions_stale = True
+    last_published = 0.0
+    while not stopping.is_set():
+        claimed = queue.claim(worker_id)
+        if claimed is None:
+            # Republish positions while idle, at most once per interval
+            if positions_stale and time.monotonic() - last_published >= config.POSITIONS_PUBLISH_SECONDS:
+                positions_stale = not publish_positions(queue, tsl, worker_id)
+                last_published = time.monotonic()
+            stopping.wait(config.WORKER_POLL_SECONDS)
+            continue
+
+        job_id, message = claimed
+        logger.info(f"Worker {worker_id} running job {job_id} ({message})")
+        try:
+            signal = parse_signal(message)
+            strategy = router.resolve(signal) if signal else None
+            if strategy is None:
+                raise ValueError(f"No strategy for signal {message}")
+            set_current_priority(signal_priority(signal))
+            set_current_lane(signal.underlying)
+            set_order_sent(False)
+            queue.complete(job_id, 'completed', result=strategy())
+        except Exception as e:
+            logger.error(f"Job {job_id} ({message}) failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            queue.complete(job_id, 'failed', error=str(e))
+        finally:
+            set_current_priority(None)
+            set_current_lane(None)
+            set_order_sent(False)
+        positions_stale = True
+
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def restart_delay(crashes):
+    """Seconds to wait before restarting a worker after `crashes` crashes in a row"""
+    return min(config.WORKER_RESTART_MAX_SECONDS, 2 ** crashes)
+
+
+def supervise(processes, path):
+    """
+    Start the worker processes and restart any that exit unexpectedly
+    A worker that keeps crashing (e.g. the broker login fails) is restarted
+    with exponential backoff instead of every second.
+    """
+    queue = SharedJobQueue(path)
+    # Jobs still marked running belong to workers of a previous run
+    queue.abandon()
+
+    context = multiprocessing.get_context('spawn')
+    workers = {}
+    started_at = {}
+    crashes = {}
+    # worker id -> monotonic time its restart is due
+    restart_at = {}
+
+    def start(worker_id):
+        process = context.Process(target=run_worker, args=(worker_id, path), name=worker_id)
+        process.start()
+        workers[worker_id] = process
+        started_at[worker_id] = time.monotonic()
+
+    stopping = threading.Event()
+    signals.signal(signals.SIGTERM, lambda *_: stopping.set())
+    signals.signal(signals.SIGINT, lambda *_: stopping.set())
+
+    for index in range(processes):
+        start(f"worker-{index + 1}")
+    logger.info(f"Started {processes} worker processes on {path}")
+
+    last_purge = 0.0
+    while not stopping.wait(1):
+        now = time.monotonic()
+        for worker_id, process in list(workers.items()):
+            if worker_id in restart_at or process.is_alive():
+                continue
+            queue.abandon(worker_id)
+            if now - started_at[worker_id] >= config.WORKER_RESTART_MAX_SECONDS:
+                crashes[worker_id] = 0
+            delay = restart_delay(crashes.get(worker_id, 0))
+            crashes[worker_id] = crashes.get(worker_id, 0) + 1
+            restart_at[worker_id] = now + delay
+            logger.error(f"{worker_id} exited with code {process.exitcode}, restarting in {delay:.0f}s "
+                         f"(crash {crashes[worker_id]} in a row)")
+        for worker_id, due in list(restart_at.items()):
+            if now >= due:
+                del restart_at[worker_id]
+                start(worker_id)
+        if time.monotonic() - last_purge >= 3600:
+            queue.purge(config.SHARED_JOB_RETENTION_SECONDS)
+            last_purge = time.monotonic()
+
+    # Workers finish their current job before exiting
+    logger.info("Stopping worker processes...")
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run strategy worker processes for the shared job queue")
+    parser.add_argument('--workers', type=int, default=config.WORKER_PROCESSES)
+    parser.add_argument('--db', default=config.SHARED_QUEUE_PATH)
+    args = parser.parse_args()
+    supervise(args.workers, args.db)